@@ -1,19 +1,131 @@
 # blog/admin.py
+import difflib
+import re
+
 from django.contrib import admin
-from django.test import RequestFactory
+from django.core.exceptions import PermissionDenied
+from django import forms
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from .models import Post, Page, PageCategory, Category, Tag, Comment, Subscriber
-from .utils import send_post_notifications
+from django.utils import timezone
+from .models import (
+    Post, Page, PageCategory, Category, Tag, Comment, Subscriber, LegacyRedirect, Revision,
+    NotificationJob, NotificationDelivery, Subscription,
+)
+from .notifications import cancel_jobs, enqueue_post_notifications, retry_failed
+from .pagination import EstimatedCountPaginator
+from .revisions import TRACKED, kind_of, reconstruct, record_revision, stored_values
+from .search import search_ids
+from .subscribers import import_file, stream_csv, stream_json
+
+class RevisionHistoryMixin:
+    """Record a revision on each admin save and show the history with diffs"""
+    
+    def save_model(self, request, obj, form, change):
+        before = stored_values(obj) if change else None
+        super().save_model(request, obj, form, change)
+        record_revision(obj, request.user, 'admin', before)
+    
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                '<int:object_id>/revisions/',
+                self.admin_site.admin_view(self.revisions_view),
+                name='%s_%s_revisions' % info,
+            ),
+        ] + super().get_urls()
+    
+    def revision_history(self, obj):
+        """Link to the revision list from the edit form"""
+        if not obj or not obj.pk:
+            return "Saved revisions appear here"
+        count = Revision.objects.filter(kind=kind_of(obj), object_id=obj.pk).count()
+        url = reverse(f'admin:blog_{self.model._meta.model_name}_revisions', args=[obj.pk])
+        return format_html('<a href="{}">{} revision{}</a>', url, count, '' if count == 1 else 's')
+    revision_history.short_description = "Revisions"
+    
+    def revisions_view(self, request, object_id):
+        """List revisions; ?r=N shows revision N diffed against ?against= (default N-1)"""
+        obj = self.get_object(request, str(object_id))
+        if obj is None:
+            raise Http404
+        if not self.has_view_or_change_permission(request, obj):
+            raise PermissionDenied
+        
+        kind = kind_of(obj)
+        revisions = list(
+            Revision.objects.filter(kind=kind, object_id=obj.pk).defer('data').select_related('user')
+        )
+        diffs, number, against = [], None, None
+        if request.GET.get('r', '').isdigit():
+            number = int(request.GET['r'])
+            against = request.GET.get('against', '')
+            against = int(against) if against.isdigit() else number - 1
+            new = reconstruct(kind, obj.pk, number)
+            if new is None:
+                raise Http404
+            old = reconstruct(kind, obj.pk, against) or {}
+            for name in TRACKED[kind][1]:
+                if old.get(name, '') != new.get(name, ''):
+                    diffs.append((name, difflib.HtmlDiff(wrapcolumn=90).make_table(
+                        html_lines(old.get(name, '')), html_lines(new.get(name, '')),
+                        f'r{against}' if old else '(none)', f'r{number}', context=True, numlines=2,
+                    )))
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Revisions of {obj}',
+            'opts': self.model._meta,
+            'original': obj,
+            'revisions': revisions,
+            'latest': revisions[0].number if revisions else None,
+            'number': number,
+            'against': against,
+            'diffs': [(name, mark_safe(table)) for name, table in diffs],
+        }
+        return render(request, 'admin/blog/revisions.html', context)
+
+
+def is_changelist(request):
+    match = request.resolver_match
+    return bool(match and match.url_name and match.url_name.endswith('_changelist'))
+
+
+def html_lines(text):
+    """Break HTML between adjacent tags so diffs line up by block"""
+    return re.sub(r'>\s*<', '>\n<', text).splitlines()
+
+
+class PostCategoryFilter(admin.SimpleListFilter):
+    """Filter on one category through the post_categories table, without DISTINCT"""
+    title = 'category'
+    parameter_name = 'category'
+    
+    def lookups(self, request, model_admin):
+        return Category.objects.order_by('name').values_list('id', 'name')
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(
+                id__in=Post.categories.through.objects.filter(category_id=self.value()).values('post_id')
+            )
+        return queryset
+
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(RevisionHistoryMixin, admin.ModelAdmin):
     list_display = ['title', 'featured_image_thumbnail', 'status', 'created_date', 'published_date']
-    list_filter = ['status', 'created_date', 'categories']
+    list_filter = ['status', 'created_date', PostCategoryFilter]
     search_fields = ['title', 'content']
     prepopulated_fields = {'slug': ('title',)}
     filter_horizontal = ['categories', 'tags']
     actions = ['send_post_notifications_action']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     # Organize fields into logical sections
     fieldsets = (
@@ -39,9 +151,25 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('wp_post_id',),
             'classes': ('collapse',)
         }),
+        ('History', {
+            'fields': ('revision_history',),
+        }),
     )
     
-    readonly_fields = ['featured_image_preview', 'thumbnail_preview', 'banner_preview']
+    readonly_fields = ['featured_image_preview', 'thumbnail_preview', 'banner_preview', 'revision_history']
+    
+    def get_queryset(self, request):
+        """Leave the post bodies out of the changelist"""
+        queryset = super().get_queryset(request)
+        if is_changelist(request):
+            queryset = queryset.defer('content', 'plain_text')
+        return queryset
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of ILIKE over the content column"""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(id__in=search_ids(search_term, 'post')), False
     
     def featured_image_thumbnail(self, obj):
         """Display small thumbnail in list view"""
@@ -84,42 +212,19 @@ class PostAdmin(admin.ModelAdmin):
     banner_preview.short_description = "Banner Preview"
     
     def send_post_notifications_action(self, request, queryset):
-        """Admin action to manually send post notifications"""
-        total_sent = 0
-        total_failed = 0
-        
+        """Admin action to queue post notifications for the worker"""
+        jobs = []
         for post in queryset:
             if post.status != 'published':
                 self.message_user(request, f'Skipped "{post.title}" - not published', level='warning')
                 continue
-                
-            # Create a mock request for the email function
-            factory = RequestFactory()
-            mock_request = factory.get('/')
-            
-            # Send notifications
-            results = send_post_notifications(mock_request, post)
-            total_sent += results['success_count']
-            total_failed += results['failure_count']
-            
-            if results['success_count'] > 0:
-                self.message_user(
-                    request, 
-                    f'Sent {results["success_count"]} notifications for "{post.title}"'
-                )
-            
-            if results['failure_count'] > 0:
-                self.message_user(
-                    request, 
-                    f'Failed to send {results["failure_count"]} notifications for "{post.title}"',
-                    level='error'
-                )
+            jobs.append(enqueue_post_notifications(post, trigger='admin', user=request.user))
         
-        if total_sent > 0 or total_failed > 0:
-            self.message_user(
-                request, 
-                f'Notification summary: {total_sent} sent, {total_failed} failed'
-            )
+        if jobs:
+            self.message_user(request, format_html(
+                'Queued notifications for {} post{}. <a href="{}">Follow their progress</a>.',
+                len(jobs), '' if len(jobs) == 1 else 's', reverse('admin:blog_notificationjob_changelist'),
+            ))
     
     send_post_notifications_action.short_description = "Send email notifications to subscribers"
 
@@ -130,7 +235,7 @@ class PageCategoryAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
 
 @admin.register(Page)
-class PageAdmin(admin.ModelAdmin):
+class PageAdmin(RevisionHistoryMixin, admin.ModelAdmin):
     list_display = ['title', 'featured_image_thumbnail', 'category', 'toc_order', 'show_in_toc', 'is_published', 'created_date']
     list_filter = ['category', 'show_in_toc', 'is_published', 'created_date']
     search_fields = ['title', 'content']
@@ -160,9 +265,18 @@ class PageAdmin(admin.ModelAdmin):
             'fields': ('wp_page_id',),
             'classes': ('collapse',)
         }),
+        ('History', {
+            'fields': ('revision_history',),
+        }),
     )
     
-    readonly_fields = ['featured_image_preview', 'banner_preview']
+    readonly_fields = ['featured_image_preview', 'banner_preview', 'revision_history']
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of ILIKE over the content column"""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(id__in=search_ids(search_term, 'page')), False
     
     def featured_image_thumbnail(self, obj):
         """Display small thumbnail in list view"""
@@ -196,12 +310,12 @@ class PageAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug']
+    list_display = ['name', 'slug', 'post_count']
     prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug']
+    list_display = ['name', 'slug', 'post_count']
     prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Comment)
@@ -209,25 +323,66 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ['author_name', 'post', 'created_date', 'is_approved']
     list_filter = ['is_approved', 'created_date']
     search_fields = ['author_name', 'content']
+    list_select_related = ['post']
+    raw_id_fields = ['post']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        """Join the post for its title, without its body"""
+        return super().get_queryset(request).select_related('post').defer('post__content', 'post__plain_text')
+
+@admin.register(LegacyRedirect)
+class LegacyRedirectAdmin(admin.ModelAdmin):
+    list_display = ['old_path', 'post', 'page', 'target_url', 'created_at']
+    search_fields = ['old_path', 'target_url']
+    raw_id_fields = ['post', 'page']
+
+class SubscriberImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with an email column (plus any of tech, life, spirit, is_active, "
+                                     "confirmed_at), a JSON array as exported, or JSON Lines.")
+
+class SubscribedCategoryFilter(admin.SimpleListFilter):
+    """Filter on one followed category through the subscription index, without DISTINCT"""
+    title = 'category'
+    parameter_name = 'category'
+    
+    def lookups(self, request, model_admin):
+        return Category.objects.order_by('name').values_list('id', 'name')
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(
+                id__in=Subscription.objects.filter(category_id=self.value()).values('subscriber_id')
+            )
+        return queryset
+
+class SubscriptionInline(admin.TabularInline):
+    """Categories this subscriber wants to receive notifications for"""
+    model = Subscription
+    fields = ['category', 'created_at']
+    readonly_fields = ['created_at']
+    extra = 0
+    verbose_name = "Subscription preference"
 
 @admin.register(Subscriber)
 class SubscriberAdmin(admin.ModelAdmin):
-    list_display = ['email', 'tech', 'life', 'spirit', 'is_active', 'subscribed_at']
-    list_filter = ['tech', 'life', 'spirit', 'is_active', 'subscribed_at']
+    list_display = ['email', 'category_list', 'is_active', 'subscribed_at']
+    list_filter = [SubscribedCategoryFilter, 'is_active', 'confirmed_at', 'subscribed_at']
     search_fields = ['email']
-    readonly_fields = ['subscribed_at', 'confirmation_token', 'confirmed_at']
+    readonly_fields = ['subscribed_at', 'confirmation_token', 'confirmed_at', 'bounced_at', 'bounce_reason']
     list_editable = ['is_active']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/blog/subscriber/change_list.html'
+    inlines = [SubscriptionInline]
     
     fieldsets = (
         ('Subscriber Information', {
             'fields': ('email', 'is_active')
         }),
-        ('Subscription Preferences', {
-            'fields': ('tech', 'life', 'spirit'),
-            'description': 'Select which blog categories this subscriber wants to receive notifications for.'
-        }),
         ('Metadata', {
-            'fields': ('subscribed_at', 'confirmation_token', 'confirmed_at'),
+            'fields': ('subscribed_at', 'confirmation_token', 'confirmed_at', 'bounced_at', 'bounce_reason'),
             'classes': ('collapse',),
             'description': 'System-generated information about the subscription.'
         }),
@@ -235,9 +390,69 @@ class SubscriberAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """Override to show most recent subscribers first"""
-        return super().get_queryset(request).order_by('-subscribed_at')
+        return super().get_queryset(request).prefetch_related('categories').order_by('-subscribed_at')
+    
+    def save_model(self, request, obj, form, change):
+        """Subscribers added by hand skip the opt-in email"""
+        if not change and obj.confirmed_at is None:
+            obj.confirmed_at = timezone.now()
+        super().save_model(request, obj, form, change)
+    
+    def category_list(self, obj):
+        return ', '.join(category.name for category in obj.categories.all()) or '—'
+    category_list.short_description = "Categories"
+    
+    def get_urls(self):
+        return [
+            path('export/', self.admin_site.admin_view(self.export_view), name='blog_subscriber_export'),
+            path('import/', self.admin_site.admin_view(self.import_view), name='blog_subscriber_import'),
+        ] + super().get_urls()
     
-    actions = ['activate_subscribers', 'deactivate_subscribers']
+    def export_view(self, request):
+        """Stream the subscribers matching the changelist's filters as CSV or JSON"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        export_format = request.GET.get('format', 'csv')
+        # The rest of the query string is the changelist's filters and search
+        request.GET = request.GET.copy()
+        request.GET.pop('format', None)
+        queryset = self.get_changelist_instance(request).get_queryset(request)
+        
+        if export_format == 'json':
+            response = StreamingHttpResponse(stream_json(queryset), content_type='application/json')
+        else:
+            export_format = 'csv'
+            response = StreamingHttpResponse(stream_csv(queryset), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="subscribers-{timezone.localdate()}.{export_format}"'
+        return response
+    
+    def import_view(self, request):
+        """Upsert subscribers from an uploaded CSV or JSON file"""
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        form = SubscriberImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_file(upload.file, upload.name)
+            except ValueError as e:
+                form.add_error('file', str(e))
+            else:
+                self.message_user(request, f'Imported {result.imported} subscribers from {result.rows} rows '
+                                           f'({result.invalid} invalid rows skipped).')
+                for error in result.errors:
+                    self.message_user(request, error, level='warning')
+                return redirect('admin:blog_subscriber_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import subscribers',
+            'opts': self.model._meta,
+            'form': form,
+        }
+        return render(request, 'admin/blog/subscriber/import.html', context)
+    
+    actions = ['activate_subscribers', 'deactivate_subscribers', 'confirm_subscribers']
     
     def activate_subscribers(self, request, queryset):
         """Action to activate selected subscribers"""
@@ -249,4 +464,74 @@ class SubscriberAdmin(admin.ModelAdmin):
         """Action to deactivate selected subscribers"""
         updated = queryset.update(is_active=False)
         self.message_user(request, f'{updated} subscribers were successfully deactivated.')
-    deactivate_subscribers.short_description = "Deactivate selected subscribers"
\ No newline at end of file
+    deactivate_subscribers.short_description = "Deactivate selected subscribers"
+    
+    def confirm_subscribers(self, request, queryset):
+        """Action to confirm selected subscribers without the opt-in email"""
+        updated = queryset.filter(confirmed_at__isnull=True).update(confirmed_at=timezone.now(), confirmation_token='')
+        self.message_user(request, f'{updated} subscribers were marked as confirmed.')
+    confirm_subscribers.short_description = "Mark selected subscribers as confirmed"
+
+class NotificationDeliveryInline(admin.TabularInline):
+    """Failed deliveries of a job, with the error each one got"""
+    model = NotificationDelivery
+    fields = ['email', 'status', 'attempts', 'error']
+    readonly_fields = fields
+    extra = 0
+    max_num = 0
+    can_delete = False
+    verbose_name_plural = "Failed deliveries"
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(status='failed').order_by('id')
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ['post', 'status', 'progress', 'sent', 'failed', 'throughput', 'trigger', 'created_at']
+    list_filter = ['status', 'trigger']
+    list_select_related = ['post']
+    actions = ['retry_failed_action', 'cancel_action']
+    inlines = [NotificationDeliveryInline]
+    fields = [
+        'post', 'status', 'trigger', 'requested_by', 'progress', 'total', 'sent', 'failed', 'throughput',
+        'last_error', 'attempts', 'created_at', 'started_at', 'heartbeat_at', 'finished_at',
+    ]
+    readonly_fields = fields
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('post__content', 'post__plain_text')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def progress(self, obj):
+        """Share of deliveries finished, as a bar"""
+        done = obj.sent + obj.failed
+        percent = int(done * 100 / obj.total) if obj.total else (100 if obj.status == 'done' else 0)
+        return format_html(
+            '<div style="width: 120px; background: #eee; border-radius: 3px;">'
+            '<div style="width: {}%; background: #0054A6; height: 10px; border-radius: 3px;"></div></div>'
+            '{} / {}',
+            percent, done, obj.total,
+        )
+    progress.short_description = "Progress"
+    
+    def throughput(self, obj):
+        """Emails per minute since the job started"""
+        if not obj.started_at:
+            return "-"
+        seconds = ((obj.finished_at or timezone.now()) - obj.started_at).total_seconds()
+        return f'{(obj.sent + obj.failed) * 60 / max(seconds, 1):.0f}/min'
+    throughput.short_description = "Throughput"
+    
+    def retry_failed_action(self, request, queryset):
+        """Requeue the failed deliveries of finished or cancelled jobs"""
+        count = retry_failed(queryset)
+        self.message_user(request, f'{count} failed deliveries were queued again.')
+    retry_failed_action.short_description = "Retry failed deliveries"
+    
+    def cancel_action(self, request, queryset):
+        """Stop queued or running jobs after their current batch"""
+        count = cancel_jobs(queryset)
+        self.message_user(request, f'{count} jobs were cancelled.')
+    cancel_action.short_description = "Cancel selected jobs"
@@ -0,0 +1,95 @@
+# blog/archives.py
+
+"""
+Monthly archive counts, kept in ArchiveMonth.
+
+Rather than grouping Post by month on every render, the counts of a month
+are recomputed whenever a post enters, leaves or moves within it (publish,
+unpublish, date change, delete, category change). Each refresh is two
+small indexed queries for that one month. Months are in the site's
+TIME_ZONE, matching the dates shown on the site.
+"""
+
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import ArchiveMonth, Post, SECTION_CATEGORIES
+
+ARCHIVE_ALL = 'all'
+
+
+def month_of(value):
+    """Return the (year, month) a datetime falls in, in local time."""
+    local = timezone.localtime(value)
+    return local.year, local.month
+
+
+def month_range(year, month):
+    """Return the aware [start, end) datetimes of a month."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def posts_in_month(year, month):
+    start, end = month_range(year, month)
+    return Post.objects.filter(status='published', published_date__gte=start, published_date__lt=end)
+
+
+def refresh_archive_months(months):
+    """
+    Recompute the stored counts of the given months.
+
+    Args:
+        months: Iterable of (year, month) tuples
+
+    Returns:
+        int: Number of months refreshed
+    """
+    months = set(months)
+    section_names = {name: section for section, name in SECTION_CATEGORIES.items()}
+    for year, month in months:
+        posts = posts_in_month(year, month)
+        counts = dict.fromkeys(SECTION_CATEGORIES, 0)
+        counts[ARCHIVE_ALL] = posts.count()
+        by_category = (
+            posts.filter(categories__name__in=section_names)
+            .values_list('categories__name')
+            .annotate(count=Count('id'))
+        )
+        for name, count in by_category:
+            counts[section_names[name]] = count
+
+        with transaction.atomic():
+            for section, count in counts.items():
+                if count:
+                    ArchiveMonth.objects.update_or_create(
+                        section=section, year=year, month=month, defaults={'post_count': count}
+                    )
+                else:
+                    ArchiveMonth.objects.filter(section=section, year=year, month=month).delete()
+    return len(months)
+
+
+def rebuild_archive_months():
+    """Recompute every month from scratch."""
+    months = {
+        month_of(value)
+        for value in Post.objects.filter(status='published', published_date__isnull=False)
+        .annotate(month=TruncMonth('published_date'))
+        .values_list('month', flat=True)
+        .distinct()
+    }
+    with transaction.atomic():
+        ArchiveMonth.objects.all().delete()
+        refresh_archive_months(months)
+    return len(months)
+
+
+def archive_months(section=None):
+    """Archive navigation for a section (or the whole blog): one small-table read."""
+    return list(ArchiveMonth.objects.filter(section=section or ARCHIVE_ALL))
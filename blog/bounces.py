@@ -0,0 +1,183 @@
+# blog/bounces.py
+
+"""
+Bounce and complaint processing for the subscriber list.
+
+The bounce address's mail is delivered to a local mbox file or Maildir;
+manage.py process_bounces reads it with the standard library's mailbox
+module and looks at two kinds of machine-readable report:
+
+    multipart/report; report-type=delivery-status   (RFC 3464 DSN)
+    multipart/report; report-type=feedback-report   (RFC 5965 ARF complaint)
+
+A DSN recipient with Action: failed and a 5.x.x Status is a hard bounce;
+4.x.x and delayed reports are soft and only counted. A complaint means the
+reader marked a notification as spam. Hard bounces and complaints
+deactivate the subscriber with one UPDATE per reason, on an index of the
+lowercased address, so the next fan-out no longer includes them. Anything
+else in the mailbox (auto-replies, human mail) is left alone.
+"""
+
+import logging
+import mailbox
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from email.utils import getaddresses, parseaddr
+
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .dashboard import refresh_stats
+from .models import Subscriber
+
+logger = logging.getLogger(__name__)
+
+HARD = 'hard'
+SOFT = 'soft'
+COMPLAINT = 'complaint'
+
+
+@dataclass
+class Report:
+    email: str
+    kind: str
+    reason: str
+
+
+@dataclass
+class BounceResult:
+    messages: int = 0
+    reports: int = 0
+    counts: dict = field(default_factory=lambda: {HARD: 0, SOFT: 0, COMPLAINT: 0})
+    deactivated: int = 0
+
+
+def open_mailbox(path):
+    """A Maildir if `path` is a directory, otherwise an mbox file."""
+    if os.path.isdir(path):
+        return mailbox.Maildir(path, create=False)
+    return mailbox.mbox(path, create=False)
+
+
+def recipient_address(value):
+    """The address from a Final-Recipient/Original-Recipient field ('rfc822; a@b')."""
+    _, _, address = (value or '').partition(';')
+    return parseaddr(address.strip() or value or '')[1].strip()
+
+
+def header_blocks(part):
+    """The header blocks of a message/delivery-status or message/feedback-report part."""
+    payload = part.get_payload()
+    return payload if isinstance(payload, list) else []
+
+
+def delivery_status_reports(part):
+    # The first block describes the message, the rest one recipient each
+    for block in header_blocks(part)[1:]:
+        email = recipient_address(block.get('Final-Recipient') or block.get('Original-Recipient'))
+        if not email:
+            continue
+        action = (block.get('Action') or '').strip().lower()
+        status = (block.get('Status') or '').strip()
+        diagnostic = ' '.join((block.get('Diagnostic-Code') or '').split())
+        kind = HARD if action == 'failed' and status.startswith('5') else SOFT
+        yield Report(email, kind, f'{status} {diagnostic}'.strip()[:255])
+
+
+def feedback_reports(message, part):
+    fields = header_blocks(part)[0] if header_blocks(part) else {}
+    feedback_type = (fields.get('Feedback-Type') or 'abuse').strip()
+    recipients = [recipient_address(fields.get('Original-Rcpt-To'))]
+    if not recipients[0]:
+        # Fall back to the To: of the returned notification
+        for returned in message.walk():
+            if returned.get_content_type() in ('message/rfc822', 'text/rfc822-headers'):
+                original = returned.get_payload(0) if returned.is_multipart() else returned
+                recipients = [address for _, address in getaddresses(original.get_all('To', []))]
+                break
+    for email in recipients:
+        if email:
+            yield Report(email, COMPLAINT, f'Complaint ({feedback_type})')
+
+
+def parse_reports(message):
+    """
+    The bounce or complaint reports in one message.
+
+    Returns:
+        list: Report per recipient, empty for anything that isn't a DSN or ARF report
+    """
+    if message.get_content_type() != 'multipart/report':
+        return []
+    reports = []
+    for part in message.walk():
+        content_type = part.get_content_type()
+        if content_type == 'message/delivery-status':
+            reports.extend(delivery_status_reports(part))
+        elif content_type == 'message/feedback-report':
+            reports.extend(feedback_reports(message, part))
+    return reports
+
+
+def deactivate(reports):
+    """
+    Deactivate the subscribers behind hard bounces and complaints.
+
+    Returns:
+        int: Subscribers deactivated
+    """
+    by_reason = defaultdict(set)
+    for report in reports:
+        if report.kind in (HARD, COMPLAINT):
+            by_reason[report.reason].add(report.email.lower())
+    now = timezone.now()
+    count = 0
+    for reason, emails in by_reason.items():
+        # Addresses are stored as typed and reports may change their case;
+        # blog_subscriber_lower_idx serves the lookup
+        count += Subscriber.objects.alias(email_lower=Lower('email')).filter(
+            email_lower__in=emails, is_active=True
+        ).update(is_active=False, bounced_at=now, bounce_reason=reason)
+    return count
+
+
+def process_mailbox(path, delete=False):
+    """
+    Read every message in a mailbox and act on its bounce and complaint reports.
+
+    Args:
+        path: mbox file or Maildir directory
+        delete: Remove the messages that were reports once processed
+
+    Returns:
+        BounceResult
+    """
+    box = open_mailbox(path)
+    result = BounceResult()
+    reports, processed = [], []
+    box.lock()
+    try:
+        for key, message in box.iteritems():
+            result.messages += 1
+            found = parse_reports(message)
+            if found:
+                processed.append(key)
+                reports.extend(found)
+        result.deactivated = deactivate(reports)
+        if delete:
+            for key in processed:
+                box.remove(key)
+            box.flush()
+    finally:
+        box.unlock()
+        box.close()
+
+    result.reports = len(reports)
+    for report in reports:
+        result.counts[report.kind] += 1
+    if result.deactivated:
+        refresh_stats('subscribers')
+    logger.info(f'Processed {result.messages} messages from {path}: {result.counts}, '
+                f'{result.deactivated} subscribers deactivated')
+    return result
@@ -0,0 +1,185 @@
+# blog/caching.py
+
+"""
+Version stamps and conditional-request support for the HTML views.
+
+ContentVersion rows are bumped by blog.signals whenever the TOC, the set of
+published posts, or a section listing changes, and by blog.taxonomy when
+tag counts (the tag cloud) change. A view's ETag is built from
+the stamps it depends on (plus the object's own modified_date for detail
+views), so deciding whether a client's copy is current costs one or two
+indexed reads. A 304 is returned by django's condition() before the view
+runs, so no template is rendered and the TOC context processor never fires.
+The same dependencies become Surrogate-Key headers for the edge cache
+(see blog.cdn).
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cdn import add_cdn_headers
+from .models import ContentVersion, Page, Post, SECTION_CATEGORIES
+
+HOMEPAGE_SLUG = 'well-scripted-life-by-greg-dyche'
+
+
+def section_key(section):
+    return f'section:{section}'
+
+
+def bump_versions(*keys):
+    """Increment the given version stamps, creating missing ones."""
+    now = timezone.now()
+    for key in set(keys):
+        updated = ContentVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now)
+        if not updated:
+            ContentVersion.objects.get_or_create(key=key)
+
+
+def get_versions(keys):
+    """
+    Read version stamps in one query.
+
+    Returns:
+        dict: key -> (version, updated_at); missing keys are (0, None)
+    """
+    found = {
+        key: (version, updated_at)
+        for key, version, updated_at in ContentVersion.objects.filter(key__in=keys).values_list(
+            'key', 'version', 'updated_at'
+        )
+    }
+    return {key: found.get(key, (0, None)) for key in keys}
+
+
+def request_versions(request, keys):
+    """
+    Version stamps for `keys`, reusing those the conditional probe already
+    read for this request when possible.
+    """
+    known = getattr(request, '_content_versions', {})
+    if all(key in known for key in keys):
+        return {key: known[key] for key in keys}
+    return get_versions(keys)
+
+
+def is_cacheable_request(request):
+    """
+    Only anonymous GET/HEAD requests without pending flash messages get
+    validators; staff pages carry the editor and must always be fresh.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if 'messages' in request.COOKIES:
+        return False
+    return not request.user.is_authenticated
+
+
+def content_probe(request, keys, queryset=None, **lookup):
+    """
+    Compute the validators for a response.
+
+    Args:
+        request: The HTTP request object
+        keys: ContentVersion keys the response depends on
+        queryset: Optional queryset holding the displayed object
+        **lookup: Filter selecting that object (e.g. slug=...)
+
+    Returns:
+        tuple: (etag, last_modified), or (None, None) when the request isn't
+        cacheable or the object doesn't exist (the view then handles the 404).
+        The surrogate keys are left on request._surrogate_keys.
+    """
+    cached = getattr(request, '_content_probe', None)
+    if cached is not None:
+        return cached
+
+    result = (None, None)
+    if is_cacheable_request(request):
+        parts = [settings.CONTENT_ETAG_SALT, request.get_full_path()]
+        dates = []
+        row = True
+        surrogate_keys = list(keys)
+        if queryset is not None:
+            row = queryset.filter(**lookup).values_list('pk', 'modified_date').first()
+            if row:
+                parts.append(f'{row[0]}@{row[1].timestamp()}')
+                dates.append(row[1])
+                surrogate_keys.append(f'{queryset.model._meta.model_name}-{row[0]}')
+        if row:
+            request._surrogate_keys = surrogate_keys
+            request._content_versions = get_versions(keys)
+            for key, (version, updated_at) in request._content_versions.items():
+                parts.append(f'{key}={version}')
+                if updated_at:
+                    dates.append(updated_at)
+            etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+            result = (etag, max(dates) if dates else None)
+
+    request._content_probe = result
+    return result
+
+
+def conditional_view(probe):
+    """
+    Decorate a view with ETag/Last-Modified handling driven by `probe`,
+    a function (request, *args, **kwargs) -> (etag, last_modified).
+
+    Responses that carry validators are marked for revalidation on every
+    use, so browsers keep them but always ask (and usually get a 304).
+    Shared caches may keep them for CDN_S_MAXAGE unless the page embeds a
+    CSRF token, which is per visitor. Staff responses are private.
+    """
+    def decorator(view):
+        conditional = condition(
+            etag_func=lambda request, *args, **kwargs: probe(request, *args, **kwargs)[0],
+            last_modified_func=lambda request, *args, **kwargs: probe(request, *args, **kwargs)[1],
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if probe(request, *args, **kwargs)[0] and response.status_code in (200, 304):
+                patch_cache_control(response, max_age=0, must_revalidate=True)
+
+                def share(response):
+                    if not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+                        add_cdn_headers(response, request._surrogate_keys)
+
+                # TemplateResponses only know whether they used a CSRF token once rendered
+                if getattr(response, 'is_rendered', True):
+                    share(response)
+                else:
+                    response.add_post_render_callback(share)
+            elif request.method in ('GET', 'HEAD') and request.user.is_authenticated:
+                patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def post_detail_probe(request, slug):
+    # 'posts' covers related posts and anything else drawn from other posts
+    return content_probe(request, ['toc', 'posts'], Post.objects.filter(status='published'), slug=slug)
+
+
+def page_detail_probe(request, slug):
+    return content_probe(request, ['toc'], Page.objects.filter(is_published=True), slug=slug)
+
+
+def section_probe(request, section=None, **archive_kwargs):
+    # Also covers the monthly archives (year/month kwargs), whose path keeps their ETags apart
+    keys = ['toc', section_key(section)] if section in SECTION_CATEGORIES else ['toc', 'posts']
+    # Every listing embeds the site-wide tag cloud
+    return content_probe(request, [*keys, 'tags'])
+
+
+def home_probe(request):
+    # 'posts' covers the latest-per-section block
+    return content_probe(request, ['toc', 'posts'], Page.objects.filter(is_published=True), slug=HOMEPAGE_SLUG)
@@ -0,0 +1,98 @@
+# blog/cdn.py
+
+"""
+Edge-cache headers and purging.
+
+Anonymous HTML responses are marked cacheable by shared caches
+(s-maxage, stale-while-revalidate) and tagged with Surrogate-Key headers
+naming what they depend on: 'post-<id>', 'page-<id>', 'section-<slug>',
+'posts', 'tags' and 'toc'. blog.signals purges those keys when content changes,
+through the backend named in settings.CDN_PURGE_BACKEND.
+"""
+
+import logging
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def surrogate_key(key):
+    """Map a ContentVersion key ('section:tech') to a surrogate key ('section-tech')."""
+    return key.replace(':', '-')
+
+
+def add_cdn_headers(response, keys):
+    """Let shared caches store `response` and tag it with surrogate keys."""
+    patch_cache_control(
+        response,
+        public=True,
+        s_maxage=settings.CDN_S_MAXAGE,
+        stale_while_revalidate=settings.CDN_STALE_WHILE_REVALIDATE,
+    )
+    response['Surrogate-Key'] = ' '.join(sorted(surrogate_key(key) for key in keys))
+
+
+class PurgeBackend:
+    """Base class for purge backends; subclasses implement purge()."""
+
+    def purge(self, keys):
+        raise NotImplementedError
+
+
+class LocalPurgeBackend(PurgeBackend):
+    """
+    Stand-in used when no CDN is configured (development and tests).
+    Records what would have been purged.
+    """
+
+    def __init__(self):
+        self.purged = []
+
+    def purge(self, keys):
+        self.purged.append(sorted(keys))
+        logger.debug(f'CDN purge (local): {" ".join(sorted(keys))}')
+
+
+class FastlyPurgeBackend(PurgeBackend):
+    """Purge by surrogate key through the Fastly API."""
+
+    def purge(self, keys):
+        response = requests.post(
+            f'https://api.fastly.com/service/{settings.FASTLY_SERVICE_ID}/purge',
+            headers={
+                'Fastly-Key': settings.FASTLY_API_TOKEN,
+                'Surrogate-Key': ' '.join(sorted(keys)),
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+
+
+@lru_cache(maxsize=None)
+def get_purge_backend():
+    return import_string(settings.CDN_PURGE_BACKEND)()
+
+
+def purge(*keys):
+    """
+    Purge surrogate keys once the current transaction commits.
+
+    Args:
+        *keys: ContentVersion keys or surrogate keys ('post-12', 'toc', ...)
+    """
+    keys = {surrogate_key(key) for key in keys}
+
+    def send():
+        try:
+            get_purge_backend().purge(keys)
+        except Exception as e:
+            # A failed purge only leaves stale copies until s-maxage runs out
+            logger.error(f'CDN purge failed for {" ".join(sorted(keys))}: {e}')
+
+    transaction.on_commit(send)
@@ -0,0 +1,150 @@
+# blog/dashboard.py
+
+"""
+Figures for the admin dashboard, kept in SiteStat.
+
+Each group is recomputed in one pass and stored as a handful of rows:
+
+    posts          per status, and published posts per section
+    subscribers    total, active, confirmed, and active subscribers per section
+    notifications  emails sent and failed over the last week, and throughput
+
+'posts' is refreshed after post changes commit (the table is small);
+'notifications' after each notification job. 'subscribers' can be a
+million rows, so the notification worker refreshes it every
+DASHBOARD_REFRESH_INTERVAL seconds, as does manage.py refresh_dashboard
+for cron or a "Refresh now" from the dashboard. Opening the admin only
+reads SiteStat plus the five most recent failed jobs.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import NotificationJob, Post, SECTION_CATEGORIES, SiteStat, Subscriber, Subscription
+
+RECENT_WINDOW = timedelta(days=7)
+RECENT_FAILURES = 5
+
+
+def post_stats():
+    stats = {f'status:{status}': 0 for status, _ in Post.STATUS_CHOICES}
+    for status, count in Post.objects.values_list('status').annotate(n=Count('id')).order_by():
+        stats[f'status:{status}'] = count
+    names = {name: slug for slug, name in SECTION_CATEGORIES.items()}
+    sections = (
+        Post.categories.through.objects.filter(post__status='published', category__name__in=names)
+        .values_list('category__name').annotate(n=Count('post_id', distinct=True)).order_by()
+    )
+    stats.update({f'section:{slug}': 0 for slug in SECTION_CATEGORIES})
+    for name, count in sections:
+        stats[f'section:{names[name]}'] = count
+    return stats
+
+
+def subscriber_stats():
+    stats = Subscriber.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        confirmed=Count('id', filter=Q(confirmed_at__isnull=False)),
+    )
+    names = {name: slug for slug, name in SECTION_CATEGORIES.items()}
+    sections = (
+        Subscription.objects.filter(subscriber__is_active=True, category__name__in=names)
+        .values_list('category__name').annotate(n=Count('id')).order_by()
+    )
+    stats.update({f'section:{slug}': 0 for slug in SECTION_CATEGORIES})
+    for name, count in sections:
+        stats[f'section:{names[name]}'] = count
+    return stats
+
+
+def notification_stats():
+    since = timezone.now() - RECENT_WINDOW
+    jobs = NotificationJob.objects.filter(started_at__gte=since)
+    totals = jobs.aggregate(sent=Sum('sent'), failed=Sum('failed'), jobs=Count('id'))
+    done, seconds = 0, 0
+    for started, finished, sent, failed in jobs.filter(finished_at__isnull=False).values_list(
+        'started_at', 'finished_at', 'sent', 'failed'
+    ):
+        done += sent + failed
+        seconds += (finished - started).total_seconds()
+    return {
+        'jobs': totals['jobs'],
+        'sent': totals['sent'] or 0,
+        'failed': totals['failed'] or 0,
+        'per_minute': done * 60 / seconds if seconds else 0,
+    }
+
+
+STAT_GROUPS = {
+    'posts': post_stats,
+    'subscribers': subscriber_stats,
+    'notifications': notification_stats,
+}
+
+
+def refresh_stats(*groups):
+    """
+    Recompute and store the given groups (all of them by default).
+
+    Returns:
+        list: The groups refreshed
+    """
+    groups = groups or tuple(STAT_GROUPS)
+    now = timezone.now()
+    for group in groups:
+        stats = STAT_GROUPS[group]()
+        with transaction.atomic():
+            SiteStat.objects.filter(group=group).delete()
+            SiteStat.objects.bulk_create([
+                SiteStat(group=group, key=key, value=value, updated_at=now) for key, value in stats.items()
+            ])
+    return list(groups)
+
+
+def refresh_stale_stats():
+    """
+    Refresh the groups not updated within DASHBOARD_REFRESH_INTERVAL seconds.
+
+    Returns:
+        list: The groups refreshed
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.DASHBOARD_REFRESH_INTERVAL)
+    fresh = set(
+        SiteStat.objects.values_list('group').annotate(updated=Max('updated_at'))
+        .filter(updated__gte=cutoff).values_list('group', flat=True)
+    )
+    stale = [group for group in STAT_GROUPS if group not in fresh]
+    return refresh_stats(*stale) if stale else []
+
+
+def dashboard_context():
+    """
+    Everything the dashboard shows: stored figures and the latest failed jobs.
+
+    Returns:
+        dict
+    """
+    stats, updated = {}, {}
+    for group, key, value, updated_at in SiteStat.objects.values_list('group', 'key', 'value', 'updated_at'):
+        stats.setdefault(group, {})[key] = value
+        updated[group] = updated_at
+    posts = stats.get('posts', {})
+    subscribers = stats.get('subscribers', {})
+    return {
+        'post_statuses': [(label, int(posts.get(f'status:{status}', 0))) for status, label in Post.STATUS_CHOICES],
+        'sections': [
+            (name, int(posts.get(f'section:{slug}', 0)), int(subscribers.get(f'section:{slug}', 0)))
+            for slug, name in SECTION_CATEGORIES.items()
+        ],
+        'subscribers': {key: int(subscribers.get(key, 0)) for key in ('total', 'active', 'confirmed')},
+        'notifications': stats.get('notifications', {}),
+        'updated': updated,
+        'recent_failures': NotificationJob.objects.filter(failed__gt=0).select_related('post').only(
+            'post__title', 'failed', 'sent', 'total', 'last_error', 'created_at'
+        ).order_by('-created_at')[:RECENT_FAILURES],
+    }
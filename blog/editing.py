@@ -0,0 +1,297 @@
+# blog/editing.py
+
+"""
+Delta saves with optimistic concurrency for the frontend editor.
+
+A save request names the version it was based on and carries only what
+changed:
+
+    {
+        "version": "<modified_date the editor loaded>",
+        "fields": {"title": "New title"},
+        "patches": {"content": {"base_hash": "<sha256 of the base text>",
+                                "ops": [[start, end, "replacement"], ...]}}
+    }
+
+`fields` replace whole values; `patches` splice a text field, with offsets
+in UTF-16 code units as JavaScript strings count them. If the object
+changed since `version`, nothing is written and the response is 409 with
+reason 'conflict'. If a patch's base text isn't the stored text (the
+browser re-serialized the HTML), the response is 409 with reason
+'stale_base' and the editor resends that field whole. Only the changed
+columns are written, via save(update_fields=...).
+
+Autosaves go elsewhere: EditorDraft keeps one row per (object, user,
+field), written with a single upsert that never loads or locks the live
+row and sends no signals, so nothing is bumped, purged or mailed however
+often the editor saves. Publishing a draft merges it into the live row and
+deletes it in one transaction, through the same version check and
+update_fields save as a direct edit. Both record a Revision
+(blog.revisions) when something changed.
+"""
+
+import hashlib
+import json
+
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .models import EditorDraft, Page, Post
+from .revisions import current_values, record_revision
+
+# kind -> (model, fields the editor may change)
+EDITABLE = {
+    'post': (Post, ('title', 'content', 'excerpt')),
+    'page': (Page, ('title', 'content')),
+}
+
+
+class EditRejected(Exception):
+    def __init__(self, status, reason, message):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+def version_token(obj):
+    return obj.modified_date.isoformat()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def apply_ops(text, ops):
+    """
+    Apply [start, end, replacement] splices, offsets in UTF-16 code units.
+
+    Raises:
+        EditRejected: if an op is malformed, out of range, overlapping or
+        splits a surrogate pair
+    """
+    data = text.encode('utf-16-le')
+    units = len(data) // 2
+    previous_start = units + 1
+    try:
+        # Right to left, so earlier offsets stay valid
+        for start, end, replacement in sorted(ops, key=lambda op: op[0], reverse=True):
+            if not (isinstance(start, int) and isinstance(end, int) and isinstance(replacement, str)):
+                raise ValueError
+            if not 0 <= start <= end <= units or end > previous_start:
+                raise ValueError
+            data = data[:start * 2] + replacement.encode('utf-16-le') + data[end * 2:]
+            previous_start = start
+        return data.decode('utf-16-le')
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise EditRejected(400, 'invalid', 'Invalid patch')
+
+
+def parse_body(body):
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError
+    return data
+
+
+def invalid(message):
+    return JsonResponse({'success': False, 'reason': 'invalid', 'message': message}, status=400)
+
+
+def check_fields(names, editable_fields):
+    unknown = set(names) - set(editable_fields)
+    if unknown:
+        raise EditRejected(400, 'invalid', f'Cannot edit {", ".join(sorted(unknown))}')
+
+
+def check_version(obj, version):
+    if version != version_token(obj):
+        raise EditRejected(409, 'conflict', 'This was changed by someone else since you loaded it')
+
+
+def write_changes(obj, fields, patches=None):
+    """
+    Set whole values and apply patches on a locked object, then save only
+    the columns that changed.
+
+    Returns:
+        list: Names of the changed fields
+    """
+    changed = []
+    for name, value in fields.items():
+        if not isinstance(value, str):
+            raise EditRejected(400, 'invalid', f'{name} must be a string')
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
+            changed.append(name)
+    for name, patch in (patches or {}).items():
+        current = getattr(obj, name)
+        if not isinstance(patch, dict) or patch.get('base_hash') != text_hash(current):
+            raise EditRejected(409, 'stale_base', f'Resend {name} in full')
+        value = apply_ops(current, patch.get('ops') or [])
+        if value != current:
+            setattr(obj, name, value)
+            changed.append(name)
+
+    if changed:
+        # DerivedContentModel.save adds the derived columns when content changes
+        obj.save(update_fields=[*changed, 'modified_date'])
+    return changed
+
+
+def rejected(model, pk, error):
+    response = {'success': False, 'reason': error.reason, 'message': str(error)}
+    if error.reason == 'conflict':
+        response['version'] = version_token(model.objects.only('modified_date').get(pk=pk))
+    return JsonResponse(response, status=error.status)
+
+
+def apply_edit(model, pk, body, editable_fields, user=None):
+    """
+    Apply a save request from the frontend editor.
+
+    Args:
+        model: Post or Page
+        pk: Primary key of the object being edited
+        body: Raw JSON request body
+        editable_fields: Field names the editor may change
+        user: Who made the edit, for the revision history
+
+    Returns:
+        JsonResponse: 200 with the new version, 400, or 409 on conflict
+    """
+    try:
+        data = parse_body(body)
+    except ValueError:
+        return invalid('Invalid JSON')
+
+    # Older clients post whole values at the top level without a version
+    fields = data.get('fields', {name: data[name] for name in editable_fields if name in data})
+    patches = data.get('patches', {})
+    if not isinstance(fields, dict) or not isinstance(patches, dict):
+        return invalid('fields and patches must be objects')
+
+    try:
+        check_fields([*fields, *patches], editable_fields)
+        with transaction.atomic():
+            obj = get_object_or_404(model.objects.select_for_update(), pk=pk)
+            if 'version' in data:
+                check_version(obj, data['version'])
+            before = current_values(obj)
+            changed = write_changes(obj, fields, patches)
+            if changed:
+                record_revision(obj, user, 'editor', before)
+    except EditRejected as e:
+        return rejected(model, pk, e)
+
+    return JsonResponse({
+        'success': True,
+        'message': f'{model._meta.verbose_name.capitalize()} updated successfully',
+        'version': version_token(obj),
+        'updated_fields': changed,
+    })
+
+
+def autosave(kind, pk, user, body):
+    """
+    Store the editor's current field values as the user's draft.
+
+    The body is {"version": "<version the editor loaded>", "fields": {...}}
+    with whole values. One INSERT ... ON CONFLICT DO UPDATE; the live object
+    is neither read nor written.
+
+    Returns:
+        JsonResponse: 200 with the saved field names, 400, or 404
+    """
+    model, editable_fields = EDITABLE[kind]
+    if not model.objects.filter(pk=pk).exists():
+        raise Http404
+    try:
+        data = parse_body(body)
+        fields, version = data['fields'], data['version']
+        if not isinstance(fields, dict) or not isinstance(version, str):
+            raise ValueError
+    except (ValueError, KeyError):
+        return invalid('Expected version and fields')
+    try:
+        check_fields(fields, editable_fields)
+    except EditRejected as e:
+        return JsonResponse({'success': False, 'reason': e.reason, 'message': str(e)}, status=e.status)
+    if not all(isinstance(value, str) for value in fields.values()):
+        return invalid('Field values must be strings')
+
+    # bulk_create sends no signals. An existing draft keeps the version it
+    # was started from, so publishing it still detects edits made since.
+    EditorDraft.objects.bulk_create(
+        [
+            EditorDraft(kind=kind, object_id=pk, user=user, field=name, value=value, base_version=version)
+            for name, value in fields.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id', 'user', 'field'],
+        update_fields=['value', 'updated_at'],
+    )
+    return JsonResponse({'success': True, 'message': 'Draft saved', 'saved_fields': sorted(fields)})
+
+
+def load_draft(kind, pk, user):
+    """
+    Return the user's unpublished draft of an object, if any.
+
+    Returns:
+        JsonResponse: {"fields": {...}, "version": base version, "updated_at": ...},
+        with empty fields when there is no draft
+    """
+    drafts = EditorDraft.objects.filter(kind=kind, object_id=pk, user=user)
+    fields, version, updated_at = {}, None, None
+    for draft in drafts:
+        fields[draft.field] = draft.value
+        # Fields saved at different times may have different bases; the
+        # oldest is the one publishing will check against
+        version = min(version or draft.base_version, draft.base_version)
+        updated_at = max(updated_at or draft.updated_at, draft.updated_at)
+    return JsonResponse({
+        'success': True,
+        'fields': fields,
+        'version': version,
+        'updated_at': updated_at.isoformat() if updated_at else None,
+    })
+
+
+def discard_draft(kind, pk, user):
+    EditorDraft.objects.filter(kind=kind, object_id=pk, user=user).delete()
+    return JsonResponse({'success': True, 'message': 'Draft discarded'})
+
+
+def publish_draft(kind, pk, user):
+    """
+    Merge the user's draft into the live object and delete it, in one
+    transaction. If the object changed after the draft was started the
+    response is 409 and the draft is kept.
+
+    Returns:
+        JsonResponse: 200 with the new version, or 409 on conflict
+    """
+    model, editable_fields = EDITABLE[kind]
+    try:
+        with transaction.atomic():
+            obj = get_object_or_404(model.objects.select_for_update(), pk=pk)
+            drafts = list(EditorDraft.objects.filter(kind=kind, object_id=pk, user=user))
+            for draft in drafts:
+                check_version(obj, draft.base_version)
+            before = current_values(obj)
+            changed = write_changes(
+                obj, {draft.field: draft.value for draft in drafts if draft.field in editable_fields}
+            )
+            if changed:
+                record_revision(obj, user, 'editor', before)
+            EditorDraft.objects.filter(pk__in=[draft.pk for draft in drafts]).delete()
+    except EditRejected as e:
+        return rejected(model, pk, e)
+
+    return JsonResponse({
+        'success': True,
+        'message': f'{model._meta.verbose_name.capitalize()} published' if changed else 'No changes to publish',
+        'version': version_token(obj),
+        'updated_fields': changed,
+    })
@@ -0,0 +1,137 @@
+# blog/feeds.py
+
+"""
+Precomputed RSS/Atom feeds, site-wide and per blog section.
+
+A feed is rendered on the first request after a content change and stored
+in RenderedFeed together with its ETag and Last-Modified (the newest
+modified_date among its items). Later requests read that row without the
+body and answer conditional GETs with 304, so polling aggregators cost a
+single indexed lookup.
+"""
+
+import hashlib
+
+from django.contrib.sites.shortcuts import get_current_site
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .cdn import add_cdn_headers
+from .models import Post, RenderedFeed, SECTION_CATEGORIES
+
+FEED_ITEMS = 20
+
+FEED_FORMATS = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+}
+
+SECTION_TITLES = {
+    'tech': 'Technology Blog',
+    'life': 'Life Management Blog',
+    'spirit': 'Spiritual Growth Blog',
+}
+
+
+def feed_key(section, feed_format):
+    return f'{section or "all"}:{feed_format}'
+
+
+def invalidate_feeds():
+    """Drop all rendered feeds; each is re-rendered on its next request."""
+    RenderedFeed.objects.all().delete()
+
+
+def render_feed(request, section, feed_format):
+    """
+    Render a feed and store it.
+
+    Args:
+        request: The HTTP request object (for domain and scheme)
+        section: Section slug, or None for the site-wide feed
+        feed_format: 'rss' or 'atom'
+
+    Returns:
+        RenderedFeed: The stored feed
+    """
+    posts = Post.objects.filter(status='published')
+    if section:
+        posts = posts.filter(categories__name=SECTION_CATEGORIES[section]).distinct()
+    posts = list(
+        posts.defer('content', 'plain_text')
+        .prefetch_related('categories')
+        .order_by('-published_date', '-id')[:FEED_ITEMS]
+    )
+
+    base_url = f'{request.scheme}://{get_current_site(request).domain}'
+    if section:
+        title = f'{SECTION_TITLES[section]} - Well Scripted Life'
+        link = reverse('blog:blog_section', kwargs={'section': section})
+        feed_url = reverse(f'blog:section_feed_{feed_format}', kwargs={'section': section})
+    else:
+        title = 'Well Scripted Life'
+        link = '/'
+        feed_url = reverse(f'blog:feed_{feed_format}')
+
+    feed = FEED_FORMATS[feed_format](
+        title=title,
+        link=base_url + link,
+        description='Modern insights on technology, education, and life optimization from Greg Dyche.',
+        feed_url=base_url + feed_url,
+        language='en',
+    )
+    for post in posts:
+        url = base_url + post.get_absolute_url()
+        feed.add_item(
+            title=post.title,
+            link=url,
+            unique_id=url,
+            description=post.excerpt or post.auto_excerpt,
+            pubdate=post.published_date,
+            updateddate=post.modified_date,
+            categories=[category.name for category in post.categories.all()],
+        )
+
+    body = feed.writeString('utf-8')
+    last_modified = max((post.modified_date for post in posts), default=None)
+    if last_modified is None:
+        last_modified = Post.objects.aggregate(latest=Max('modified_date'))['latest'] or timezone.now()
+
+    rendered, _ = RenderedFeed.objects.update_or_create(
+        key=feed_key(section, feed_format),
+        defaults={
+            'body': body,
+            'etag': '"%s"' % hashlib.md5(body.encode()).hexdigest(),
+            'last_modified': last_modified,
+        },
+    )
+    return rendered
+
+
+@require_safe
+def feed_view(request, section=None, feed_format='rss'):
+    """Serve a stored feed, honouring If-None-Match / If-Modified-Since."""
+    if section is not None and section not in SECTION_CATEGORIES:
+        raise Http404('Unknown section')
+
+    # The body column is only read if we actually have to send it
+    feed = RenderedFeed.objects.defer('body').filter(key=feed_key(section, feed_format)).first()
+    if feed is None:
+        feed = render_feed(request, section, feed_format)
+
+    last_modified = int(feed.last_modified.timestamp())
+    response = get_conditional_response(request, etag=feed.etag, last_modified=last_modified)
+    if response is None:
+        content_type = FEED_FORMATS[feed_format].content_type
+        response = HttpResponse(feed.body, content_type=content_type)
+    response['ETag'] = feed.etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'public, max-age=300'
+    # Purged with 'posts' whenever published content or categories change
+    add_cdn_headers(response, ['posts'])
+    return response
@@ -1,59 +1,76 @@
 from django import forms
-from .models import Subscriber
+from django.db import transaction
+from .models import Category, Subscriber
 
 class SubscriptionForm(forms.ModelForm):
     """Form for blog subscription signup"""
     
+    # One checkbox per blog section, saved as Subscription rows
+    SECTIONS = {
+        'tech': ('Technology Blog', 'Python development, AI/ML insights, and emerging technologies'),
+        'life': ('Life Management Blog', 'Personal productivity, education, and life optimization'),
+        'spirit': ('Spiritual Growth Blog', 'Faith, intentional living, and finding meaning in daily life'),
+    }
+    
     class Meta:
         model = Subscriber
-        fields = ['email', 'tech', 'life', 'spirit']
+        fields = ['email']
         widgets = {
             'email': forms.EmailInput(attrs={
                 'class': 'form-input',
                 'placeholder': 'Enter your email address',
                 'required': True
             }),
-            'tech': forms.CheckboxInput(attrs={
-                'class': 'form-checkbox'
-            }),
-            'life': forms.CheckboxInput(attrs={
-                'class': 'form-checkbox'
-            }),
-            'spirit': forms.CheckboxInput(attrs={
-                'class': 'form-checkbox'
-            }),
         }
         labels = {
             'email': 'Email Address',
-            'tech': 'Technology Blog',
-            'life': 'Life Management Blog',
-            'spirit': 'Spiritual Growth Blog',
         }
         help_texts = {
             'email': 'We\'ll never share your email with anyone else.',
-            'tech': 'Python development, AI/ML insights, and emerging technologies',
-            'life': 'Personal productivity, education, and life optimization',
-            'spirit': 'Faith, intentional living, and finding meaning in daily life',
         }
     
+    def clean_email(self):
+        email = self.cleaned_data['email']
+        # An unconfirmed or unsubscribed address may sign up again; it is
+        # reactivated and sent a new confirmation link
+        existing = Subscriber.objects.filter(email=email).first()
+        if existing and not (existing.is_active and existing.is_confirmed):
+            self.instance = existing
+        return email
+    
     def clean(self):
         cleaned_data = super().clean()
-        tech = cleaned_data.get('tech')
-        life = cleaned_data.get('life')
-        spirit = cleaned_data.get('spirit')
         
         # Ensure at least one category is selected
-        if not any([tech, life, spirit]):
+        if not self.selected_sections():
             raise forms.ValidationError(
                 "Please select at least one blog category to subscribe to."
             )
         
         return cleaned_data
     
+    def selected_sections(self):
+        return [section for section in self.SECTIONS if self.cleaned_data.get(section)]
+    
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+        self.instance.is_active = True
+        self.instance.reset_confirmation()
+        with transaction.atomic():
+            subscriber = super().save()
+            subscriber.categories.set(Category.for_sections(self.selected_sections()))
+        return subscriber
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Make email field required
         self.fields['email'].required = True
+        for section, (label, help_text) in self.SECTIONS.items():
+            self.fields[section] = forms.BooleanField(
+                required=False, label=label, help_text=help_text,
+                widget=forms.CheckboxInput(attrs={'class': 'form-checkbox'}),
+            )
 
 
 class CoachingInquiryForm(forms.Form):
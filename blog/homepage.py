@@ -0,0 +1,83 @@
+# blog/homepage.py
+
+"""
+The homepage's "latest in each section" block.
+
+All sections come from one query: published posts joined to their section
+category, numbered per section with ROW_NUMBER() OVER (PARTITION BY
+category ORDER BY published_date DESC, id DESC) and cut at N. The rows
+are cached under the current 'posts' version stamp, which blog.signals
+bumps on every publish, unpublish or edit of a published post, so the
+cache holds until the next such event in every process.
+"""
+
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
+
+from .caching import request_versions
+from .feeds import SECTION_TITLES
+from .models import Post, SECTION_CATEGORIES
+
+POSTS_PER_SECTION = 3
+
+
+def fetch_latest_by_section(limit=POSTS_PER_SECTION):
+    """
+    Returns:
+        dict: section slug -> list of post value dicts, newest first
+    """
+    sections = {name: section for section, name in SECTION_CATEGORIES.items()}
+    rows = (
+        Post.categories.through.objects.filter(
+            category__name__in=sections,
+            post__status='published',
+            post__published_date__isnull=False,
+        )
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F('category__name')],
+            order_by=[F('post__published_date').desc(), F('post__id').desc()],
+        ))
+        .filter(position__lte=limit)
+        .order_by('category__name', 'position')
+        .values(
+            'category__name', 'post__slug', 'post__title', 'post__published_date',
+            'post__excerpt', 'post__auto_excerpt', 'post__reading_time',
+        )
+    )
+    latest = {section: [] for section in SECTION_CATEGORIES}
+    for row in rows:
+        latest[sections[row['category__name']]].append({
+            'url': reverse('blog:post_detail', kwargs={'slug': row['post__slug']}),
+            'title': row['post__title'],
+            'published_date': row['post__published_date'],
+            'excerpt': row['post__excerpt'] or row['post__auto_excerpt'],
+            'reading_time': row['post__reading_time'],
+        })
+    return latest
+
+
+def latest_by_section(request):
+    """
+    The block's context: one entry per section with its newest posts.
+
+    Returns:
+        list: dicts with section, title, url and posts
+    """
+    version = request_versions(request, ['posts'])['posts'][0]
+    key = f'blog:homepage:latest:{version}'
+    latest = cache.get(key)
+    if latest is None:
+        latest = fetch_latest_by_section()
+        cache.set(key, latest, None)
+    return [
+        {
+            'section': section,
+            'title': SECTION_TITLES[section],
+            'url': reverse('blog:blog_section', kwargs={'section': section}),
+            'posts': posts,
+        }
+        for section, posts in latest.items()
+    ]
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post, Page
+
+
+class Command(BaseCommand):
+    help = 'Compute plain text, excerpt, word count and reading time for existing posts and pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Rows loaded and written per batch'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for model in (Post, Page):
+            fields = list(model.DERIVED_FIELDS)
+            batch = []
+            updated = 0
+            # bulk_update skips save(), signals and auto_now on modified_date
+            for obj in model.objects.only('id', 'content').iterator(chunk_size=batch_size):
+                obj.update_derived_fields()
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    updated += model.objects.bulk_update(batch, fields)
+                    batch = []
+            if batch:
+                updated += model.objects.bulk_update(batch, fields)
+
+            self.stdout.write(
+                self.style.SUCCESS(f'Updated derived fields for {updated} {model._meta.verbose_name_plural}')
+            )
@@ -0,0 +1,359 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class Command(BaseCommand):
+    help = 'Run micro-benchmarks for blog subsystems'
+
+    targets = ['media', 'search', 'derived', 'revisions', 'admin', 'fanout']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target',
+            choices=self.targets,
+            help='Subsystem to benchmark'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of requests/operations to time'
+        )
+        parser.add_argument(
+            '--size-mb',
+            type=int,
+            default=8,
+            help='Size of the synthetic image for the media benchmark'
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=100000,
+            help='Size of the synthetic corpus for the search benchmark'
+        )
+        parser.add_argument(
+            '--edits',
+            type=int,
+            default=300,
+            help='Length of the synthetic edit history for the revisions benchmark'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Comments and subscribers to create for the admin and fanout benchmarks'
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, f'bench_{options["target"]}')(options)
+
+    def report(self, label, elapsed, count, nbytes=None):
+        """Print requests/sec (and MB/s when bytes were transferred)."""
+        line = f'{label:<28} {count / elapsed:>10.1f} req/s'
+        if nbytes is not None:
+            line += f' {nbytes / elapsed / (1024 * 1024):>10.1f} MB/s'
+        self.stdout.write(line)
+
+    def report_latencies(self, label, samples):
+        """Print p50/p95/max latency in milliseconds."""
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        self.stdout.write(
+            f'{label:<28} p50 {statistics.median(samples) * 1000:>8.2f} ms'
+            f'   p95 {p95 * 1000:>8.2f} ms   max {samples[-1] * 1000:>8.2f} ms'
+        )
+
+    def bench_media(self, options):
+        """Throughput of blog.media.serve_media on a large image."""
+        from blog.media import serve_media
+
+        iterations = options['iterations']
+        size = options['size_mb'] * 1024 * 1024
+        media_root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(media_root, 'large.jpg')
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size))
+
+            factory = RequestFactory()
+
+            def run(label, **headers):
+                total = 0
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    response = serve_media(factory.get('/media/large.jpg', **headers), 'large.jpg')
+                    if response.streaming:
+                        for chunk in response.streaming_content:
+                            total += len(chunk)
+                    response.close()
+                elapsed = time.perf_counter() - start
+                self.report(f'{label} ({response.status_code})', elapsed, iterations, total or None)
+                return response
+
+            with override_settings(MEDIA_ROOT=media_root):
+                full = run('full body')
+                run('range 1MB', HTTP_RANGE='bytes=0-1048575')
+                run('If-None-Match', HTTP_IF_NONE_MATCH=full['ETag'])
+                run('If-Modified-Since', HTTP_IF_MODIFIED_SINCE=full['Last-Modified'])
+
+            self.stdout.write(
+                'Bodies are iterated in Python here; under gunicorn the same '
+                'responses go through sendfile() via wsgi.file_wrapper.'
+            )
+        finally:
+            shutil.rmtree(media_root)
+
+    def bench_search(self, options):
+        """p95 latency of blog.search on a synthetic corpus (rolled back afterwards)."""
+        from blog.models import SearchDocument
+        from blog.search import search_page, cached_search_results
+
+        rng = random.Random(42)
+        vocabulary = [f'word{i}' for i in range(5000)] + [
+            'python', 'django', 'faith', 'prayer', 'productivity', 'workflow',
+            'teaching', 'systems', 'habits', 'automation', 'reflection', 'coding',
+        ]
+        # Zipf-ish weights so some terms are common and most are rare
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        rng.shuffle(weights)
+        queries = ['python', 'faith prayer', 'django workflow', 'habits', 'word17', 'teaching systems']
+
+        with transaction.atomic():
+            self.stdout.write(f'Building corpus of {options["posts"]} documents...')
+            start = time.perf_counter()
+            batch = []
+            for i in range(options['posts']):
+                words = rng.choices(vocabulary, weights, k=300)
+                batch.append(SearchDocument(
+                    kind='post', object_id=10_000_000 + i,
+                    title=' '.join(words[:6]), body=' '.join(words), is_public=True,
+                ))
+                if len(batch) == 2000:
+                    SearchDocument.objects.bulk_create(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            self.stdout.write(f'Corpus built in {time.perf_counter() - start:.1f}s')
+
+            iterations = options['iterations']
+            for label, after_pages in (('first page', 0), ('third page (keyset)', 2)):
+                samples = []
+                for i in range(iterations):
+                    query = queries[i % len(queries)]
+                    cursor = None
+                    for _ in range(after_pages):
+                        cursor = search_page(query, after=cursor)['next_cursor']
+                    start = time.perf_counter()
+                    search_page(query, after=cursor)
+                    samples.append(time.perf_counter() - start)
+                self.report_latencies(label, samples)
+
+            samples = []
+            for i in range(iterations):
+                start = time.perf_counter()
+                cached_search_results(queries[i % len(queries)])
+                samples.append(time.perf_counter() - start)
+            self.report_latencies('cached (popular queries)', samples)
+
+            transaction.set_rollback(True)
+
+    def bench_derived(self, options):
+        """Per-request CPU of striptags|truncatewords versus stored excerpts."""
+        from django.template import Context, Template
+        from blog.models import Post
+
+        rng = random.Random(42)
+        words = ['python', 'faith', 'habits', 'teaching', 'systems', 'workflow', 'reflection', 'django']
+        posts = []
+        for i in range(10):
+            paragraphs = [
+                '<p>%s <a href="/x/">link</a> <strong>%s</strong></p>' % (
+                    ' '.join(rng.choices(words, k=60)), ' '.join(rng.choices(words, k=10))
+                )
+                for _ in range(60)
+            ]
+            post = Post(title=f'Post {i}', content='\n'.join(paragraphs))
+            post.update_derived_fields()
+            posts.append(post)
+        self.stdout.write(f'Synthetic posts: 10 x {len(posts[0].content) // 1024} KB of HTML')
+
+        # The card body from blog_section.html, before and after this change
+        templates = {
+            'striptags per request': Template(
+                '{% for post in posts %}{{ post.content|striptags|truncatewords:25 }}{% endfor %}'
+            ),
+            'stored auto_excerpt': Template('{% for post in posts %}{{ post.auto_excerpt }}{% endfor %}'),
+        }
+        iterations = options['iterations']
+        timings = {}
+        for label, template in templates.items():
+            context = Context({'posts': posts})
+            start = time.process_time()
+            for _ in range(iterations):
+                template.render(context)
+            timings[label] = (time.process_time() - start) / iterations
+            self.stdout.write(f'{label:<28} {timings[label] * 1000:>8.3f} ms CPU per section page')
+
+        saved = timings['striptags per request'] - timings['stored auto_excerpt']
+        self.stdout.write(f'{"saved per request":<28} {saved * 1000:>8.3f} ms CPU')
+
+    def bench_revisions(self, options):
+        """Storage of blog.revisions versus full copies, and rebuild latency (rolled back afterwards)."""
+        from blog.models import Post, Revision
+        from blog.revisions import SNAPSHOT_INTERVAL, reconstruct, record_revision
+
+        rng = random.Random(42)
+        words = ['python', 'faith', 'habits', 'teaching', 'systems', 'workflow', 'reflection', 'django']
+        paragraphs = [
+            '<p>%s</p>' % ' '.join(rng.choices(words, k=80)) for _ in range(100)
+        ]
+
+        with transaction.atomic():
+            post = Post.objects.create(title='Revision benchmark', slug='revision-benchmark-synthetic',
+                                       content='\n'.join(paragraphs))
+            full_bytes = 0
+            start = time.perf_counter()
+            for _ in range(options['edits']):
+                # Typical edits: reword a sentence, add or drop a paragraph
+                index = rng.randrange(len(paragraphs))
+                action = rng.random()
+                if action < 0.8:
+                    paragraphs[index] = '<p>%s</p>' % ' '.join(rng.choices(words, k=80))
+                elif action < 0.9 or len(paragraphs) < 10:
+                    paragraphs.insert(index, '<p>%s</p>' % ' '.join(rng.choices(words, k=80)))
+                else:
+                    paragraphs.pop(index)
+                post.content = '\n'.join(paragraphs)
+                record_revision(post, source='benchmark')
+                full_bytes += len(post.content.encode('utf-8')) + len(post.title.encode('utf-8'))
+            elapsed = time.perf_counter() - start
+
+            revisions = Revision.objects.filter(kind='post', object_id=post.pk)
+            stored = sum(len(data) for data in revisions.values_list('data', flat=True))
+            edits = options['edits']
+            self.stdout.write(f'Synthetic post: {len(post.content) // 1024} KB of HTML, {edits} edits')
+            self.stdout.write(f'{"full copies":<28} {full_bytes / 1024:>10.1f} KB')
+            self.stdout.write(
+                f'{"snapshots + diffs":<28} {stored / 1024:>10.1f} KB'
+                f'   ({stored / full_bytes:.1%}, snapshot every {SNAPSHOT_INTERVAL})'
+            )
+            self.stdout.write(f'{"record per save":<28} {elapsed / edits * 1000:>10.2f} ms')
+
+            samples = []
+            for _ in range(options['iterations']):
+                number = rng.randint(1, edits)
+                start = time.perf_counter()
+                reconstruct('post', post.pk, number)
+                samples.append(time.perf_counter() - start)
+            self.report_latencies('rebuild any revision', samples)
+
+            transaction.set_rollback(True)
+
+    def bench_admin(self, options):
+        """Queries and latency of the busiest admin changelists (rolled back afterwards)."""
+        from django.contrib.auth.models import User
+        from blog.models import Category, Comment, Post, Subscriber, Subscription
+
+        rows = options['rows']
+        rng = random.Random(42)
+        with transaction.atomic():
+            self.stdout.write(f'Building {rows} comments and {rows} subscribers...')
+            user = User.objects.create_superuser('admin-benchmark', 'admin-benchmark@example.com', None)
+            categories = [Category.objects.get_or_create(name=name)[0] for name in ('Tech', 'Life', 'Spirit')]
+            posts = Post.objects.bulk_create([
+                Post(title=f'Benchmark post {i}', slug=f'admin-benchmark-{i}', content='<p>x</p>' * 2000,
+                     status='published')
+                for i in range(200)
+            ])
+            for post in posts:
+                post.categories.add(rng.choice(categories))
+            now = time.time()
+            Comment.objects.bulk_create([
+                Comment(post=rng.choice(posts), author_name=f'reader{i}', content='Thanks!',
+                        created_date=datetime.fromtimestamp(now - i * 60, tz=dt_timezone.utc),
+                        is_approved=i % 10 != 0)
+                for i in range(rows)
+            ], batch_size=5000)
+            subscribers = Subscriber.objects.bulk_create([
+                Subscriber(email=f'reader{i}@example.com', is_active=i % 20 != 0)
+                for i in range(rows)
+            ], batch_size=5000)
+            Subscription.objects.bulk_create([
+                Subscription(subscriber=subscriber, category=category)
+                for i, subscriber in enumerate(subscribers)
+                for category, follows in ((categories[0], i % 2 == 0), (categories[1], i % 3 == 0))
+                if follows
+            ], batch_size=5000)
+
+            client = Client()
+            client.force_login(user)
+            urls = [
+                ('posts', '/admin/blog/post/'),
+                ('posts by category', f'/admin/blog/post/?category={categories[0].pk}'),
+                ('comments', '/admin/blog/comment/'),
+                ('comments (approved)', '/admin/blog/comment/?is_approved__exact=1'),
+                ('subscribers', '/admin/blog/subscriber/'),
+                ('subscribers (active)', '/admin/blog/subscriber/?is_active__exact=1'),
+                ('subscribers (last page)', f'/admin/blog/subscriber/?p={rows // 100 - 1}'),
+            ]
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for label, url in urls:
+                    client.get(url)  # warm up
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = client.get(url)
+                        elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'{label:<28} {response.status_code} {len(queries.captured_queries):>4} queries'
+                        f' {elapsed * 1000:>10.1f} ms'
+                    )
+
+            transaction.set_rollback(True)
+
+    def bench_fanout(self, options):
+        """Finding a post's recipients for a common and a rare category (rolled back afterwards)."""
+        from blog.models import Category, Post, Subscriber, Subscription
+        from blog.utils import post_notification_recipients
+
+        rows = options['rows']
+        iterations = min(options['iterations'], 50)
+        with transaction.atomic():
+            self.stdout.write(f'Building {rows} subscribers...')
+            common = Category.objects.create(name='Fanout common')
+            rare = Category.objects.create(name='Fanout rare')
+            confirmed_at = datetime.now(dt_timezone.utc)
+            subscribers = Subscriber.objects.bulk_create([
+                Subscriber(email=f'fanout{i}@example.com', is_active=i % 20 != 0, confirmed_at=confirmed_at)
+                for i in range(rows)
+            ], batch_size=5000)
+            Subscription.objects.bulk_create([
+                Subscription(subscriber=subscriber, category=category)
+                for i, subscriber in enumerate(subscribers)
+                for category, follows in ((common, i % 2 == 0), (rare, i % 100 == 1))
+                if follows
+            ], batch_size=5000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            for category in (common, rare):
+                post = Post.objects.create(title=f'Fanout {category.name}', content='<p>x</p>', status='draft')
+                post.categories.add(category)
+                _, recipients = post_notification_recipients(post)
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    count = len(list(recipients.values_list('id', 'email')))
+                    samples.append(time.perf_counter() - start)
+                self.report_latencies(f'{category.name} ({count})', samples)
+                self.stdout.write('    ' + recipients.values_list('id', 'email').explain().replace('\n', '\n    '))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from blog.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Rebuild all sitemap shards and the sitemap index'
+
+    def handle(self, *args, **options):
+        count = build_sitemaps()
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {count} sitemap shards to {settings.SITEMAP_ROOT}')
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from blog.subscribers import import_file
+
+
+class Command(BaseCommand):
+    help = 'Upsert subscribers from a CSV, JSON or JSON Lines file, matching on email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='Path to a .csv, .json or .jsonl file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows validated and written per INSERT'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            with open(options['file'], 'rb') as f:
+                result = import_file(f, options['file'], batch_size=options['batch_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} subscribers from {result.rows} rows '
+            f'({result.invalid} invalid) in {time.perf_counter() - start:.1f}s'
+        ))
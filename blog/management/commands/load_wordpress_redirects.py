@@ -0,0 +1,70 @@
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand
+from blog.models import LegacyRedirect, Page, Post
+from blog.redirects import UPLOADS_PREFIX, UPLOADS_TARGET, invalidate_redirect_map, normalize_path
+
+
+class Command(BaseCommand):
+    help = 'Record the original URLs from a WordPress XML export as legacy redirects'
+
+    namespaces = {'wp': 'http://wordpress.org/export/1.2/'}
+
+    def add_arguments(self, parser):
+        parser.add_argument('xml_file', type=str, help='Path to WordPress XML export file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows written per INSERT'
+        )
+
+    def handle(self, *args, **options):
+        posts = dict(Post.objects.filter(wp_post_id__isnull=False).values_list('wp_post_id', 'id'))
+        pages = dict(Page.objects.filter(wp_page_id__isnull=False).values_list('wp_page_id', 'id'))
+
+        redirects = {}
+        skipped = 0
+        # iterparse keeps memory flat on large exports
+        for _, item in ET.iterparse(options['xml_file']):
+            if item.tag != 'item':
+                continue
+            post_type = item.findtext('wp:post_type', 'post', self.namespaces)
+            wp_id = int(item.findtext('wp:post_id', '0', self.namespaces) or 0)
+            link_path = urlparse(item.findtext('link') or '').path
+
+            if post_type == 'attachment':
+                file_path = urlparse(item.findtext('wp:attachment_url', '', self.namespaces)).path
+                if file_path.startswith(UPLOADS_PREFIX):
+                    target = UPLOADS_TARGET + file_path[len(UPLOADS_PREFIX):]
+                    redirects[normalize_path(file_path)] = LegacyRedirect(
+                        old_path=normalize_path(file_path), target_url=target
+                    )
+            elif post_type == 'post' and wp_id in posts and link_path:
+                redirects[normalize_path(link_path)] = LegacyRedirect(
+                    old_path=normalize_path(link_path), post_id=posts[wp_id]
+                )
+            elif post_type == 'page' and wp_id in pages and link_path:
+                redirects[normalize_path(link_path)] = LegacyRedirect(
+                    old_path=normalize_path(link_path), page_id=pages[wp_id]
+                )
+            else:
+                skipped += 1
+            item.clear()
+
+        # Links to the site root would shadow the homepage
+        redirects.pop('/', None)
+        LegacyRedirect.objects.bulk_create(
+            redirects.values(),
+            batch_size=options['batch_size'],
+            update_conflicts=True,
+            unique_fields=['old_path'],
+            update_fields=['post', 'page', 'target_url'],
+        )
+        # bulk_create sends no signals
+        invalidate_redirect_map()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recorded {len(redirects)} legacy URLs ({skipped} items without a match skipped)'
+        ))
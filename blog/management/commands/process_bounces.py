@@ -0,0 +1,37 @@
+import mailbox
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from blog.bounces import COMPLAINT, HARD, SOFT, process_mailbox
+
+
+class Command(BaseCommand):
+    help = ('Read bounce (DSN) and complaint (ARF) reports from an mbox file or Maildir and '
+            'deactivate subscribers whose address hard-bounced or complained')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'mailbox',
+            nargs='?',
+            default=settings.BOUNCE_MAILBOX,
+            help='mbox file or Maildir directory (default: BOUNCE_MAILBOX)'
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Remove the reports from the mailbox once processed'
+        )
+
+    def handle(self, *args, **options):
+        if not options['mailbox']:
+            raise CommandError('Give a mailbox path or set BOUNCE_MAILBOX')
+        try:
+            result = process_mailbox(options['mailbox'], delete=options['delete'])
+        except (OSError, mailbox.Error) as e:
+            raise CommandError(f'Cannot read {options["mailbox"]}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {result.messages} messages: {result.counts[HARD]} hard bounces, '
+            f'{result.counts[SOFT]} soft bounces, {result.counts[COMPLAINT]} complaints; '
+            f'{result.deactivated} subscribers deactivated'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from blog.archives import rebuild_archive_months
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly archive counts table'
+
+    def handle(self, *args, **options):
+        months = rebuild_archive_months()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt archive counts for {months} months'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from blog.navigation import rebuild_navigation
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored previous/next links of every published post'
+
+    def handle(self, *args, **options):
+        stored = rebuild_navigation()
+        self.stdout.write(self.style.SUCCESS(f'Stored navigation for {stored} posts'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog.models import Post, Page, SearchDocument
+from blog.search import index_object
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all posts and pages'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            SearchDocument.objects.all().delete()
+            count = 0
+            for model in (Post, Page):
+                for obj in model.objects.iterator():
+                    index_object(obj)
+                    count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} posts and pages'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from blog.dashboard import STAT_GROUPS, refresh_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin dashboard figures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'groups',
+            nargs='*',
+            help=f'Only refresh these groups: {", ".join(STAT_GROUPS)} (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['groups']) - set(STAT_GROUPS)
+        if unknown:
+            raise CommandError(f'Unknown group: {", ".join(sorted(unknown))}')
+        groups = refresh_stats(*options['groups'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed dashboard figures: {", ".join(groups)}'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from blog.related import rebuild_related_posts, refresh_related_posts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed related-posts table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post',
+            type=int,
+            action='append',
+            help='Only refresh this post (and its neighbours); may be repeated'
+        )
+
+    def handle(self, *args, **options):
+        if options['post']:
+            stored = refresh_related_posts(options['post'])
+        else:
+            stored = rebuild_related_posts()
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} related-post entries'))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from blog.dashboard import refresh_stale_stats
+from blog.notifications import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = ('Send queued new-post notification emails and keep the admin dashboard figures fresh '
+            '(runs until stopped unless --once)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the jobs queued now and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = run_pending_jobs()
+            refresh_stale_stats()
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} notification jobs'))
+            return
+
+        self.stdout.write(f'Waiting for notification jobs (polling every {settings.NOTIFICATION_POLL_INTERVAL}s)')
+        while True:
+            count = run_pending_jobs()
+            refresh_stale_stats()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'Ran {count} notification jobs'))
+            time.sleep(settings.NOTIFICATION_POLL_INTERVAL)
@@ -0,0 +1,217 @@
+# blog/media.py
+
+"""
+Production serving for user-uploaded media (MEDIA_ROOT).
+
+WhiteNoise only knows about collected static files, so uploads need their own
+path when DEBUG is off. Files are handed to FileResponse, which lets gunicorn
+use sendfile() via wsgi.file_wrapper, and the view answers conditional
+requests (If-None-Match / If-Modified-Since), single byte ranges and
+precompressed .br/.gz siblings without reading the file in Python.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# Precompressed siblings we look for, in order of preference
+PRECOMPRESSED_VARIANTS = [
+    ('br', '.br'),
+    ('gzip', '.gz'),
+]
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Limit reads on an open file to a single byte range.
+
+    fileno() is passed through so gunicorn can still sendfile() the range:
+    it starts at the current file offset and stops at Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def make_etag(st, encoding=''):
+    """Build a strong ETag from file mtime and size (and content coding)."""
+    suffix = f'-{encoding}' if encoding else ''
+    return f'"{int(st.st_mtime_ns):x}-{st.st_size:x}{suffix}"'
+
+
+def accepted_encodings(request):
+    """Return the content codings the client accepts (ignoring q=0)."""
+    encodings = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if coding:
+            encodings.add(coding.lower())
+    return encodings
+
+
+def etag_matches(header, etag):
+    """Weak comparison of an If-None-Match / If-Range header against an ETag."""
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header.
+
+    Returns:
+        tuple: (start, end) inclusive byte offsets, None if the header should be
+        ignored (multiple or malformed ranges), or False if unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if start >= size:
+        return False
+    end = int(last) if last else size - 1
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def not_modified(request, etag, mtime):
+    """Evaluate If-None-Match, falling back to If-Modified-Since."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def serve_file(request, root, path, max_age=None):
+    """
+    Serve a file below `root` with conditional, range and precompression support.
+
+    Args:
+        request: The HTTP request object
+        root: Directory the path is resolved against
+        path: Relative path from the URL
+        max_age: Cache-Control max-age in seconds
+
+    Returns:
+        HttpResponse: 200/206 FileResponse, 304, or 416
+    """
+    try:
+        fullpath = safe_join(root, path)
+    except Exception:
+        raise Http404('Invalid path')
+
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404('File not found')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('File not found')
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    # Prefer a precompressed sibling if the client accepts it and it's fresh
+    encoding = ''
+    accepted = accepted_encodings(request)
+    for coding, extension in PRECOMPRESSED_VARIANTS:
+        if coding not in accepted:
+            continue
+        try:
+            variant_st = os.stat(fullpath + extension)
+        except OSError:
+            continue
+        if variant_st.st_mtime >= st.st_mtime:
+            fullpath, st, encoding = fullpath + extension, variant_st, coding
+            break
+
+    etag = make_etag(st, encoding)
+    last_modified = http_date(st.st_mtime)
+
+    def finalize(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Accept-Ranges'] = 'bytes'
+        if max_age is not None:
+            response['Cache-Control'] = f'public, max-age={max_age}'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    if not_modified(request, etag, st.st_mtime):
+        return finalize(HttpResponseNotModified())
+
+    size = st.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and size:
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None or etag_matches(if_range, etag) or if_range.strip() == last_modified:
+            byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finalize(response)
+
+    file = open(fullpath, 'rb')
+    filename = os.path.basename(path)
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(file, start, length), status=206, content_type=content_type, filename=filename
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(file, content_type=content_type, filename=filename)
+        response['Content-Length'] = str(size)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return finalize(response)
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded file from MEDIA_ROOT in production."""
+    return serve_file(request, settings.MEDIA_ROOT, path, max_age=settings.MEDIA_CACHE_MAX_AGE)
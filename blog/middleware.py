@@ -0,0 +1,53 @@
+# blog/middleware.py
+
+from django.conf import settings
+from django.http import HttpResponsePermanentRedirect
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .redirects import find_redirect
+
+
+class SitemapMiddleware:
+    """
+    Serve the generated sitemap files (see blog.sitemaps) through WhiteNoise.
+
+    The regular WhiteNoiseMiddleware indexes STATIC_ROOT once at startup, but
+    sitemap files are rewritten while the process runs, so this instance looks
+    files up on each request (autorefresh). Only /sitemap*.xml paths are
+    checked; everything else goes straight to the next middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.files = WhiteNoise(None, autorefresh=True, max_age=settings.SITEMAP_MAX_AGE)
+        self.files.add_files(settings.SITEMAP_ROOT, prefix='/')
+
+    def __call__(self, request):
+        path = request.path_info
+        if path.startswith('/sitemap') and path.endswith('.xml'):
+            static_file = self.files.find_file(path)
+            if static_file is not None:
+                return WhiteNoiseMiddleware.serve(static_file, request)
+        return self.get_response(request)
+
+
+class LegacyRedirectMiddleware:
+    """
+    301 old WordPress URLs (/2019/03/14/slug/, /?p=123, /wp-content/uploads/...)
+    to their current location, using the in-memory map in blog.redirects.
+    Runs before sessions and auth, so a redirect costs no database query.
+    """
+
+    SKIP_PREFIXES = ('/admin/', '/static/', '/media/', '/ckeditor/')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info
+        if request.method in ('GET', 'HEAD') and not path.startswith(self.SKIP_PREFIXES):
+            url = find_redirect(path, request.GET)
+            if url:
+                return HttpResponsePermanentRedirect(url)
+        return self.get_response(request)
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE blog_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX blog_searchdocument_vector_idx ON blog_searchdocument USING GIN (search_vector)',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS blog_searchdocument_vector_idx',
+    'ALTER TABLE blog_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE blog_searchdocument_fts USING fts5(
+        title, body,
+        content='blog_searchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_searchdocument_ai AFTER INSERT ON blog_searchdocument BEGIN
+        INSERT INTO blog_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_searchdocument_ad AFTER DELETE ON blog_searchdocument BEGIN
+        INSERT INTO blog_searchdocument_fts(blog_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_searchdocument_au AFTER UPDATE ON blog_searchdocument BEGIN
+        INSERT INTO blog_searchdocument_fts(blog_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO blog_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS blog_searchdocument_au',
+    'DROP TRIGGER IF EXISTS blog_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS blog_searchdocument_ai',
+    'DROP TABLE IF EXISTS blog_searchdocument_fts',
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for sql in vendor_statements:
+            schema_editor.execute(sql)
+    return run
+
+
+def populate_search_documents(apps, schema_editor):
+    """Index every existing post and page."""
+    from blog.utils import html_to_text
+
+    Post = apps.get_model('blog', 'Post')
+    Page = apps.get_model('blog', 'Page')
+    SearchDocument = apps.get_model('blog', 'SearchDocument')
+
+    documents = []
+    for post in Post.objects.only('id', 'title', 'content', 'status').iterator():
+        documents.append(SearchDocument(
+            kind='post', object_id=post.id, title=post.title,
+            body=html_to_text(post.content), is_public=post.status == 'published',
+        ))
+    for page in Page.objects.only('id', 'title', 'content', 'is_published').iterator():
+        documents.append(SearchDocument(
+            kind='page', object_id=page.id, title=page.title,
+            body=html_to_text(page.content), is_public=page.is_published,
+        ))
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_alter_page_content_alter_post_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('page', 'Page')], max_length=4)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=250)),
+                ('body', models.TextField(blank=True, help_text='Content with HTML stripped')),
+                ('is_public', models.BooleanField(default=False, help_text='Published and visible on the site')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='blog_searchdocument_unique_object')],
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+RELATED_POSTS_COUNT = 5
+
+
+def top_related(post_id, features, inverted):
+    # Copy of blog.related.top_related: Jaccard similarity, ties favour newer posts
+    own = features.get(post_id)
+    if not own:
+        return []
+    candidates = set()
+    for feature in own:
+        candidates.update(inverted[feature])
+    candidates.discard(post_id)
+    scored = sorted(
+        ((len(own & features[candidate]) / len(own | features[candidate]), candidate) for candidate in candidates),
+        key=lambda item: (-item[0], -item[1]),
+    )
+    return [(candidate, score) for score, candidate in scored[:RELATED_POSTS_COUNT]]
+
+
+def rank_related(apps, schema_editor):
+    # Same rows as blog.related.rebuild_related_posts, from historical models
+    Post = apps.get_model('blog', 'Post')
+    RelatedPost = apps.get_model('blog', 'RelatedPost')
+    features = defaultdict(set)
+    inverted = defaultdict(set)
+    for prefix, relation, column in (('t', 'tags', 'tag_id'), ('c', 'categories', 'category_id')):
+        links = getattr(Post, relation).through.objects.filter(post__status='published')
+        for post_id, feature_id in links.values_list('post_id', column).iterator():
+            features[post_id].add((prefix, feature_id))
+            inverted[(prefix, feature_id)].add(post_id)
+    RelatedPost.objects.bulk_create(
+        [RelatedPost(post_id=post_id, related_id=related_id, rank=rank, score=score)
+         for post_id in Post.objects.values_list('id', flat=True)
+         for rank, (related_id, score) in enumerate(top_related(post_id, features, inverted), start=1)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 = most related')),
+                ('score', models.FloatField(help_text='Jaccard similarity of tags and categories')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='blog.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post')),
+            ],
+            options={
+                'ordering': ['post', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'rank'), name='blog_relatedpost_unique_rank')],
+            },
+        ),
+        migrations.RunPython(rank_related, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:38
+
+import math
+import re
+from html import unescape
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def html_to_text(html):
+    # Copy of blog.utils.html_to_text
+    html = re.sub(r'<(br|/p|/div|/li|/h[1-6]|/tr|/blockquote)\b[^>]*>', ' ', html or '', flags=re.I)
+    return ' '.join(unescape(strip_tags(html)).split())
+
+
+def fill_derived_fields(apps, schema_editor):
+    # Historical models have no update_derived_fields(); this mirrors it
+    for model_name in ('Post', 'Page'):
+        model = apps.get_model('blog', model_name)
+        rows = list(model.objects.only('pk', 'content'))
+        for row in rows:
+            row.plain_text = html_to_text(row.content)
+            row.auto_excerpt = Truncator(row.plain_text).words(25)[:300]
+            row.word_count = len(row.plain_text.split())
+            row.reading_time = math.ceil(row.word_count / 200)
+        model.objects.bulk_update(
+            rows, ['plain_text', 'auto_excerpt', 'word_count', 'reading_time'], batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='auto_excerpt',
+            field=models.CharField(blank=True, editable=False, help_text='First words of the content', max_length=300),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False, help_text='Content with HTML stripped'),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='auto_excerpt',
+            field=models.CharField(blank=True, editable=False, help_text='First words of the content', max_length=300),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False, help_text='Content with HTML stripped'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_derived_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_derived_content_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=20, unique=True)),
+                ('body', models.TextField()),
+                ('etag', models.CharField(max_length=40)),
+                ('last_modified', models.DateTimeField()),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
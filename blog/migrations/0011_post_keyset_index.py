@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_contentversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-published_date', '-id'], name='blog_post_pub_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:45
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+SECTION_CATEGORIES = {
+    'tech': 'Tech',
+    'life': 'Life',
+    'spirit': 'Spirit',
+}
+
+
+def count_months(apps, schema_editor):
+    # Same counts as blog.archives.rebuild_archive_months, from historical models
+    Post = apps.get_model('blog', 'Post')
+    ArchiveMonth = apps.get_model('blog', 'ArchiveMonth')
+    section_names = {name: section for section, name in SECTION_CATEGORIES.items()}
+    published = Post.objects.filter(status='published', published_date__isnull=False)
+
+    months = {}
+    for post_id, published_date in published.values_list('id', 'published_date').iterator():
+        local = timezone.localtime(published_date)
+        months[post_id] = (local.year, local.month)
+    counts = Counter(('all', *month) for month in months.values())
+    sections = Post.categories.through.objects.filter(
+        post_id__in=published.values('id'), category__name__in=section_names
+    ).values_list('post_id', 'category__name')
+    for post_id, name in sections.iterator():
+        counts[(section_names[name], *months[post_id])] += 1
+
+    ArchiveMonth.objects.bulk_create(
+        [ArchiveMonth(section=section, year=year, month=month, post_count=count)
+         for (section, year, month), count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=20)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['section', '-year', '-month'],
+                'constraints': [models.UniqueConstraint(fields=('section', 'year', 'month'), name='blog_archivemonth_unique_month')],
+            },
+        ),
+        migrations.RunPython(count_months, migrations.RunPython.noop),
+    ]
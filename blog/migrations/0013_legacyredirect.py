@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_archivemonth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegacyRedirect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_path', models.CharField(max_length=500, unique=True)),
+                ('target_url', models.CharField(blank=True, help_text="Used when there's no post or page", max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('page', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='blog.page')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='blog.post')),
+            ],
+            options={
+                'ordering': ['old_path'],
+            },
+        ),
+    ]
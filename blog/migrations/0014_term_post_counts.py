@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:48
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    for model_name, relation, term_field in (('Tag', 'tags', 'tag'), ('Category', 'categories', 'category')):
+        through = getattr(Post, relation).through
+        published = (
+            through.objects.filter(**{term_field: OuterRef('pk')}, post__status='published')
+            .values(term_field)
+            .annotate(count=Count('post'))
+            .values('count')
+        )
+        apps.get_model('blog', model_name).objects.update(
+            post_count=Coalesce(Subquery(published, output_field=IntegerField()), Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_legacyredirect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SECTION_CATEGORIES = {
+    'tech': 'Tech',
+    'life': 'Life',
+    'spirit': 'Spirit',
+}
+
+
+def link_posts(apps, schema_editor):
+    # Same links as blog.navigation.rebuild_navigation, from historical models
+    Post = apps.get_model('blog', 'Post')
+    PostNavigation = apps.get_model('blog', 'PostNavigation')
+    published = Post.objects.filter(status='published', published_date__isnull=False)
+    links = {}
+    for scope in ('all', *SECTION_CATEGORIES):
+        posts = published if scope == 'all' else published.filter(categories__name=SECTION_CATEGORIES[scope])
+        ordered = list(posts.order_by('published_date', 'id').values('id', 'slug', 'title'))
+        for index, row in enumerate(ordered):
+            links.setdefault(row['id'], {})[scope] = {
+                'previous': ordered[index - 1] if index > 0 else None,
+                'next': ordered[index + 1] if index + 1 < len(ordered) else None,
+            }
+    PostNavigation.objects.bulk_create(
+        [PostNavigation(post_id=post_id, links=post_links) for post_id, post_links in links.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_term_post_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostNavigation',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='navigation', serialize=False, to='blog.post')),
+                ('links', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(link_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_postnavigation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EditorDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=4)),
+                ('object_id', models.BigIntegerField()),
+                ('field', models.CharField(max_length=20)),
+                ('value', models.TextField()),
+                ('base_version', models.CharField(help_text='Version of the live object the draft started from', max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='editor_drafts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'user', 'field'), name='blog_editordraft_unique_field')],
+            },
+        ),
+    ]
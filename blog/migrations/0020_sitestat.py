@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_notification_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('value', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group', 'key'), name='blog_sitestat_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_sitestat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='blog.category')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='blog.subscriber')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='subscriber',
+            name='categories',
+            field=models.ManyToManyField(blank=True, help_text='Categories whose new posts this subscriber is emailed about', related_name='subscribers', through='blog.Subscription', to='blog.category'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['category', 'subscriber'], name='blog_subscription_fanout_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('subscriber', 'category'), name='blog_subscription_unique'),
+        ),
+    ]
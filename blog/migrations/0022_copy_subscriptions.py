@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:10
+
+from django.db import migrations
+from django.utils.text import slugify
+
+SECTION_CATEGORIES = {
+    'tech': 'Tech',
+    'life': 'Life',
+    'spirit': 'Spirit',
+}
+BATCH_SIZE = 5000
+
+
+def section_category(Category, name):
+    return Category.objects.get_or_create(name=name, defaults={'slug': slugify(name)})[0]
+
+
+def copy_subscriptions(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    Subscriber = apps.get_model('blog', 'Subscriber')
+    Subscription = apps.get_model('blog', 'Subscription')
+
+    for section, name in SECTION_CATEGORIES.items():
+        if not Subscriber.objects.filter(**{section: True}).exists():
+            continue
+        category = section_category(Category, name)
+        ids = Subscriber.objects.filter(**{section: True}).order_by('id').values_list('id', flat=True)
+        batch = []
+        for subscriber_id in ids.iterator(chunk_size=BATCH_SIZE):
+            batch.append(Subscription(subscriber_id=subscriber_id, category=category))
+            if len(batch) == BATCH_SIZE:
+                Subscription.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Subscription.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def copy_flags(apps, schema_editor):
+    Subscriber = apps.get_model('blog', 'Subscriber')
+    Subscription = apps.get_model('blog', 'Subscription')
+
+    for section, name in SECTION_CATEGORIES.items():
+        followers = Subscription.objects.filter(category__name=name).values('subscriber_id')
+        Subscriber.objects.filter(id__in=followers).update(**{section: True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0021_subscription'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_subscriptions, copy_flags),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_copy_subscriptions'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='subscriber',
+            name='life',
+        ),
+        migrations.RemoveField(
+            model_name='subscriber',
+            name='spirit',
+        ),
+        migrations.RemoveField(
+            model_name='subscriber',
+            name='tech',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:14
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import F
+
+
+def confirm_existing(apps, schema_editor):
+    # They signed up before double opt-in; keep them on the send list
+    Subscriber = apps.get_model('blog', 'Subscriber')
+    Subscriber.objects.filter(confirmed_at__isnull=True).update(confirmed_at=F('subscribed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0023_remove_subscriber_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriber',
+            name='bounce_reason',
+            field=models.CharField(blank=True, help_text='Status reported by the bounce or complaint', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='subscriber',
+            name='bounced_at',
+            field=models.DateTimeField(blank=True, help_text='When a hard bounce or complaint deactivated this subscriber', null=True),
+        ),
+        migrations.AlterField(
+            model_name='subscriber',
+            name='confirmation_token',
+            field=models.CharField(blank=True, db_index=True, help_text='Token for email confirmation', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='subscriber',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='blog_subscriber_lower_idx'),
+        ),
+        migrations.RunPython(confirm_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0024_subscriber_confirmation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Times a worker has taken the job on'),
+        ),
+        migrations.AlterField(
+            model_name='notificationjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('cancelled', 'Cancelled'), ('failed', 'Failed')], default='queued', max_length=10),
+        ),
+    ]
@@ -4,40 +4,101 @@ from django.db import models
 # blog/models.py - Replace your entire file with this content
 
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.urls import reverse
-from django.utils.text import slugify
+import datetime
+import math
+import secrets
+
+from django.utils.text import slugify, Truncator
 from ckeditor.fields import RichTextField
+from .utils import html_to_text
+
+# Blog sections served at /blog/<section>/, mapped to the Category they list
+SECTION_CATEGORIES = {
+    'tech': 'Tech',
+    'life': 'Life',
+    'spirit': 'Spirit',
+}
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
+    # Published posts in this category, maintained by blog.taxonomy
+    post_count = models.PositiveIntegerField(default=0, editable=False)
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
     
+    def get_absolute_url(self):
+        return reverse('blog:category_posts', kwargs={'slug': self.slug})
+
+    @classmethod
+    def for_sections(cls, sections):
+        """Return the Categories behind SECTION_CATEGORIES slugs, creating any missing"""
+        return [cls.objects.get_or_create(name=SECTION_CATEGORIES[section])[0] for section in sections]
+
     def __str__(self):
         return self.name
-    
+
     class Meta:
         verbose_name_plural = "Categories"
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True, blank=True)
+    # Published posts with this tag, maintained by blog.taxonomy
+    post_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
     
+    def get_absolute_url(self):
+        return reverse('blog:tag_posts', kwargs={'slug': self.slug})
+    
     def __str__(self):
         return self.name
 
-class Post(models.Model):
+class DerivedContentModel(models.Model):
+    """
+    Plain-text fields derived from `content`, computed once on save so
+    templates and listings never run striptags over the HTML per request.
+    """
+    EXCERPT_WORDS = 25
+    WORDS_PER_MINUTE = 200
+    DERIVED_FIELDS = ('plain_text', 'auto_excerpt', 'word_count', 'reading_time')
+    
+    plain_text = models.TextField(blank=True, editable=False, help_text="Content with HTML stripped")
+    auto_excerpt = models.CharField(max_length=300, blank=True, editable=False,
+                                    help_text="First words of the content")
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Minutes")
+    
+    def update_derived_fields(self):
+        """Recompute the derived fields from the current content"""
+        self.plain_text = html_to_text(self.content)
+        self.auto_excerpt = Truncator(self.plain_text).words(self.EXCERPT_WORDS)[:300]
+        self.word_count = len(self.plain_text.split())
+        self.reading_time = math.ceil(self.word_count / self.WORDS_PER_MINUTE)
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.update_derived_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+        super().save(*args, **kwargs)
+    
+    class Meta:
+        abstract = True
+
+class Post(DerivedContentModel):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -86,16 +147,42 @@ class Post(models.Model):
         help_text="Upload banner image"
     )
     
+    # Fields whose database value signal handlers compare against on save
+    TRACKED_FIELDS = ('status', 'published_date', 'slug', 'title')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS
+        }
+        return instance
+    
+    def field_changed(self, name):
+        """True if a tracked field differs from the value last loaded or saved"""
+        loaded = getattr(self, '_loaded_values', {})
+        return name not in loaded or loaded[name] != getattr(self, name)
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
         if self.status == 'published' and not self.published_date:
             self.published_date = timezone.now()
         super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            name: getattr(self, name) for name in self.TRACKED_FIELDS if name not in deferred
+        }
     
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
     
+    def get_sections(self):
+        """Return the slugs of the blog sections this post is listed in"""
+        names = set(self.categories.values_list('name', flat=True))
+        return [section for section, name in SECTION_CATEGORIES.items() if name in names]
+    
     def get_featured_image_url(self):
         """Return the best available featured image URL"""
         if self.featured_image_upload:
@@ -121,6 +208,10 @@ class Post(models.Model):
     
     class Meta:
         ordering = ['-published_date', '-created_date']
+        indexes = [
+            # Keyset pagination of listings (blog.pagination)
+            models.Index(fields=['status', '-published_date', '-id'], name='blog_post_pub_keyset_idx'),
+        ]
 
 class PageCategory(models.Model):
     """Categories for organizing pages in TOC"""
@@ -141,7 +232,7 @@ class PageCategory(models.Model):
         ordering = ['order', 'name']
         verbose_name_plural = "Page Categories"
 
-class Page(models.Model):
+class Page(DerivedContentModel):
     """Static pages like About, Contact, etc."""
     title = models.CharField(max_length=250)
     slug = models.SlugField(max_length=250, unique=True, blank=True)
@@ -222,45 +313,379 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['created_date']
+        indexes = [
+            # Admin changelist ordering and filters
+            models.Index(fields=['created_date'], name='blog_comment_created_idx'),
+            models.Index(fields=['is_approved', 'created_date'], name='blog_comment_approved_idx'),
+        ]
 
 class Subscriber(models.Model):
     """Email subscribers for blog notifications"""
     email = models.EmailField(unique=True, help_text="Subscriber's email address")
     
-    # Subscription preferences for different blog categories
-    tech = models.BooleanField(default=False, help_text="Subscribe to Technology blog posts")
-    life = models.BooleanField(default=False, help_text="Subscribe to Life Management blog posts")
-    spirit = models.BooleanField(default=False, help_text="Subscribe to Spiritual Growth blog posts")
+    # Categories whose new posts are emailed to this subscriber
+    categories = models.ManyToManyField(
+        Category, through='Subscription', blank=True, related_name='subscribers',
+        help_text="Categories whose new posts this subscriber is emailed about",
+    )
     
     # Subscription metadata
     subscribed_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True, help_text="Whether subscription is active")
-    confirmation_token = models.CharField(max_length=100, blank=True, help_text="Token for email confirmation")
+    # Indexed: the confirmation link looks the subscriber up by token
+    confirmation_token = models.CharField(max_length=100, blank=True, db_index=True, help_text="Token for email confirmation")
     confirmed_at = models.DateTimeField(null=True, blank=True, help_text="When email was confirmed")
+    # Set by manage.py process_bounces when the address hard-bounces or complains
+    bounced_at = models.DateTimeField(null=True, blank=True, help_text="When a hard bounce or complaint deactivated this subscriber")
+    bounce_reason = models.CharField(max_length=255, blank=True, help_text="Status reported by the bounce or complaint")
     
     def __str__(self):
-        categories = []
-        if self.tech:
-            categories.append('Tech')
-        if self.life:
-            categories.append('Life')
-        if self.spirit:
-            categories.append('Spirit')
-        return f'{self.email} ({", ".join(categories) if categories else "No categories"})'
+        names = [category.name for category in self.categories.all()]
+        return f'{self.email} ({", ".join(names) if names else "No categories"})'
     
     @property
     def subscribed_categories(self):
-        """Return list of subscribed category names"""
-        categories = []
-        if self.tech:
-            categories.append('tech')
-        if self.life:
-            categories.append('life')
-        if self.spirit:
-            categories.append('spirit')
-        return categories
+        """Return list of subscribed category slugs (uses prefetched categories)"""
+        return sorted(category.slug for category in self.categories.all())
+    
+    @property
+    def is_confirmed(self):
+        return self.confirmed_at is not None
+    
+    def reset_confirmation(self):
+        """Require double opt-in: clear confirmed_at and issue a new token (not saved)"""
+        self.confirmed_at = None
+        self.confirmation_token = secrets.token_urlsafe(32)
+    
+    def confirm(self):
+        """Mark the address confirmed and retire its token"""
+        self.confirmed_at = timezone.now()
+        self.confirmation_token = ''
+        self.save(update_fields=['confirmed_at', 'confirmation_token'])
     
     class Meta:
         ordering = ['-subscribed_at']
+        indexes = [
+            # Admin changelist ordering and filters
+            models.Index(fields=['-subscribed_at'], name='blog_subscriber_recent_idx'),
+            models.Index(fields=['is_active', '-subscribed_at'], name='blog_subscriber_active_idx'),
+            # Bounce processing matches addresses case-insensitively
+            models.Index(Lower('email'), name='blog_subscriber_lower_idx'),
+        ]
         verbose_name = "Subscriber"
-        verbose_name_plural = "Subscribers"
\ No newline at end of file
+        verbose_name_plural = "Subscribers"
+
+class Subscription(models.Model):
+    """
+    One subscriber following one category.
+
+    Fan-out for a post is a lookup on (category, subscriber): the index
+    covers it, so finding a post's recipients reads only the matching
+    entries, however many subscribers follow other categories.
+    """
+    subscriber = models.ForeignKey(Subscriber, on_delete=models.CASCADE, related_name='subscriptions')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='subscriptions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f'{self.subscriber.email} → {self.category.name}'
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subscriber', 'category'], name='blog_subscription_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'subscriber'], name='blog_subscription_fanout_idx'),
+        ]
+
+class SearchDocument(models.Model):
+    """
+    Plain-text shadow of a Post or Page for the full-text index.
+
+    On PostgreSQL the table carries a generated `search_vector` tsvector column
+    with a GIN index; on SQLite an external-content FTS5 table
+    (blog_searchdocument_fts) is kept in sync by triggers. Both are created in
+    migration 0006 and queried through blog.search.
+    """
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('page', 'Page'),
+    ]
+
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=250)
+    body = models.TextField(blank=True, help_text="Content with HTML stripped")
+    is_public = models.BooleanField(default=False, help_text="Published and visible on the site")
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id} {self.title}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='blog_searchdocument_unique_object'),
+        ]
+
+
+class RelatedPost(models.Model):
+    """Precomputed top-K related posts, maintained by blog.related"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 = most related")
+    score = models.FloatField(help_text="Jaccard similarity of tags and categories")
+
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_id} (#{self.rank})'
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='blog_relatedpost_unique_rank'),
+        ]
+
+
+class RenderedFeed(models.Model):
+    """
+    A fully rendered RSS/Atom feed, regenerated after content changes.
+
+    `key` is '<section or all>:<rss|atom>'. Rows are deleted by blog.signals
+    when published posts change and re-rendered on the next request.
+    """
+    key = models.CharField(max_length=20, unique=True)
+    body = models.TextField()
+    etag = models.CharField(max_length=40)
+    last_modified = models.DateTimeField()
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
+
+class ContentVersion(models.Model):
+    """
+    Version stamps for content that several responses depend on.
+
+    Keys are 'toc', 'posts' (any published post changed) and
+    'section:<slug>'. blog.signals bumps them on writes; views combine them
+    into ETags (see blog.caching) so freshness checks are a single indexed read.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.key} v{self.version}'
+
+
+class ArchiveMonth(models.Model):
+    """
+    Published post counts per section per month, for archive navigation.
+
+    `section` is a SECTION_CATEGORIES slug or 'all' for the whole blog.
+    Maintained incrementally by blog.archives; months with no posts have no row.
+    """
+    section = models.CharField(max_length=20)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    @property
+    def month_start(self):
+        return datetime.date(self.year, self.month, 1)
+
+    def __str__(self):
+        return f'{self.section} {self.year}-{self.month:02d}: {self.post_count}'
+
+    class Meta:
+        ordering = ['section', '-year', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'year', 'month'], name='blog_archivemonth_unique_month'),
+        ]
+
+
+class LegacyRedirect(models.Model):
+    """
+    An old WordPress URL and where it lives now, recorded from the WXR export.
+
+    `old_path` is the normalized key used by blog.redirects ('/2019/03/14/slug',
+    '/about', '/wp-content/uploads/2019/03/photo.jpg'). The target is a post or
+    page (so later slug changes follow automatically) or a fixed URL.
+    """
+    old_path = models.CharField(max_length=500, unique=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True)
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, null=True, blank=True)
+    target_url = models.CharField(max_length=500, blank=True, help_text="Used when there's no post or page")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.old_path
+
+    class Meta:
+        ordering = ['old_path']
+
+
+class PostNavigation(models.Model):
+    """
+    Stored previous/next links of a published post, site-wide ('all') and
+    within each section it belongs to:
+
+        {'all': {'previous': {'id': 3, 'slug': ..., 'title': ...}, 'next': None},
+         'tech': {...}}
+
+    Kept out of the Post row so ordinary saves never write stale links back.
+    Maintained by blog.navigation; read with select_related('navigation').
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='navigation')
+    links = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Navigation for post {self.post_id}'
+
+
+class EditorDraft(models.Model):
+    """
+    Autosaved, unpublished value of one field, per (object, user).
+
+    Written by the frontend editor with a single upsert and no signals, so
+    autosaves never touch the live row, caches or subscribers. Publishing
+    merges a user's drafts into the live object (see blog.editing).
+    """
+    kind = models.CharField(max_length=4)  # 'post' or 'page'
+    object_id = models.BigIntegerField()
+    user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='editor_drafts')
+    field = models.CharField(max_length=20)
+    value = models.TextField()
+    base_version = models.CharField(max_length=40, help_text="Version of the live object the draft started from")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id} {self.field} by {self.user_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id', 'user', 'field'], name='blog_editordraft_unique_field'
+            ),
+        ]
+
+
+class Revision(models.Model):
+    """
+    One saved state of a post or page, numbered per object.
+
+    `data` is zlib-compressed JSON: every tracked field for snapshots,
+    otherwise splices against the previous revision (see blog.revisions).
+    """
+    kind = models.CharField(max_length=4)  # 'post' or 'page'
+    object_id = models.BigIntegerField()
+    number = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    user = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    source = models.CharField(max_length=10, blank=True, help_text="Where the save came from: admin or editor")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id} r{self.number}'
+
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'number'], name='blog_revision_unique_number'),
+        ]
+
+
+class NotificationJob(models.Model):
+    """
+    Emailing one post to its subscribers, run by the notification worker
+    (manage.py run_notification_jobs) rather than inside a request.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+        ('failed', 'Failed'),
+    ]
+    TRIGGER_CHOICES = [
+        ('publish', 'Published'),
+        ('admin', 'Admin action'),
+    ]
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='notification_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES, default='publish')
+    requested_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    # Progress, refreshed after every batch
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times a worker has taken the job on")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress from the worker")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Notify "{self.post}" ({self.get_status_display()})'
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='blog_notifyjob_queue_idx'),
+        ]
+
+
+class NotificationDelivery(models.Model):
+    """One subscriber's email within a NotificationJob."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),  # unsubscribed before their turn
+    ]
+
+    job = models.ForeignKey(NotificationJob, on_delete=models.CASCADE, related_name='deliveries')
+    subscriber = models.ForeignKey(Subscriber, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.email} ({self.status})'
+
+    class Meta:
+        verbose_name_plural = "Notification deliveries"
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'email'], name='blog_notifydelivery_unique_email'),
+        ]
+        indexes = [
+            models.Index(fields=['job', 'status'], name='blog_notifydelivery_status_idx'),
+        ]
+
+
+class SiteStat(models.Model):
+    """
+    One precomputed figure for the admin dashboard, e.g. ('posts', 'status:draft').
+
+    Refreshed a group at a time by blog.dashboard, so showing the dashboard
+    never aggregates the underlying tables.
+    """
+    group = models.CharField(max_length=20)
+    key = models.CharField(max_length=50)
+    value = models.FloatField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.group} {self.key} = {self.value:g}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'key'], name='blog_sitestat_unique_key'),
+        ]
@@ -0,0 +1,123 @@
+# blog/navigation.py
+
+"""
+Previous/next links between published posts, stored in PostNavigation.
+
+Links are kept site-wide ('all') and per section, ordered by
+(published_date, id) like the listings. When a post is published,
+unpublished, re-dated, renamed or moves between sections, only the posts
+whose links can change are recomputed: the post itself, its old
+neighbours (from its stored links) and its new neighbours. Post pages
+then read their links through select_related, with no extra queries.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Post, PostNavigation, SECTION_CATEGORIES
+
+SCOPE_ALL = 'all'
+LINK_FIELDS = ('id', 'slug', 'title')
+
+
+def scope_queryset(scope):
+    posts = Post.objects.filter(status='published', published_date__isnull=False)
+    if scope != SCOPE_ALL:
+        posts = posts.filter(categories__name=SECTION_CATEGORIES[scope])
+    return posts
+
+
+def compute_links(post):
+    """
+    Query the neighbours of a published post in every scope it belongs to.
+
+    Returns:
+        dict: scope -> {'previous': link or None, 'next': link or None}
+    """
+    links = {}
+    date, pk = post.published_date, post.pk
+    for scope in (SCOPE_ALL, *post.get_sections()):
+        posts = scope_queryset(scope).values(*LINK_FIELDS)
+        previous = posts.filter(
+            Q(published_date__lt=date) | Q(published_date=date, id__lt=pk)
+        ).order_by('-published_date', '-id').first()
+        following = posts.filter(
+            Q(published_date__gt=date) | Q(published_date=date, id__gt=pk)
+        ).order_by('published_date', 'id').first()
+        links[scope] = {'previous': previous, 'next': following}
+    return links
+
+
+def linked_ids(links):
+    """All post ids referenced by a links dict."""
+    return {
+        link['id']
+        for scope in links.values()
+        for link in scope.values()
+        if link
+    }
+
+
+def _recompute(post_ids):
+    """Recompute and store the links of the given posts; return the new links by id."""
+    result = {}
+    posts = Post.objects.filter(id__in=post_ids).only('id', 'status', 'published_date')
+    for post in posts:
+        if post.status == 'published' and post.published_date:
+            result[post.pk] = compute_links(post)
+    with transaction.atomic():
+        PostNavigation.objects.filter(post_id__in=set(post_ids) - set(result)).delete()
+        for post_id, links in result.items():
+            PostNavigation.objects.update_or_create(post_id=post_id, defaults={'links': links})
+    return result
+
+
+def refresh_navigation(post_ids, previous_links=()):
+    """
+    Update stored links after the given posts changed.
+
+    Args:
+        post_ids: Posts that were published, unpublished, re-dated, renamed,
+            recategorized or deleted
+        previous_links: Links dicts of posts that no longer exist (deleted)
+
+    Returns:
+        int: Number of posts whose links were recomputed
+    """
+    post_ids = set(post_ids)
+    affected = set(post_ids)
+    for links in PostNavigation.objects.filter(post_id__in=post_ids).values_list('links', flat=True):
+        affected |= linked_ids(links)
+    for links in previous_links:
+        affected |= linked_ids(links)
+
+    new_links = _recompute(post_ids)
+    neighbours = set()
+    for links in new_links.values():
+        neighbours |= linked_ids(links)
+    _recompute((affected | neighbours) - post_ids)
+    return len(affected | neighbours)
+
+
+def rebuild_navigation():
+    """
+    Recompute every post's links from scratch: one ordered id list per scope.
+
+    Returns:
+        int: Number of posts with stored links
+    """
+    links = {}
+    for scope in (SCOPE_ALL, *SECTION_CATEGORIES):
+        ordered = list(scope_queryset(scope).order_by('published_date', 'id').values(*LINK_FIELDS))
+        for index, row in enumerate(ordered):
+            links.setdefault(row['id'], {})[scope] = {
+                'previous': ordered[index - 1] if index > 0 else None,
+                'next': ordered[index + 1] if index + 1 < len(ordered) else None,
+            }
+    with transaction.atomic():
+        PostNavigation.objects.all().delete()
+        PostNavigation.objects.bulk_create(
+            [PostNavigation(post_id=post_id, links=post_links) for post_id, post_links in links.items()],
+            batch_size=1000,
+        )
+    return len(links)
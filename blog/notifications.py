@@ -0,0 +1,229 @@
+# blog/notifications.py
+
+"""
+Background delivery of new-post emails.
+
+Publishing a post (or the admin action) only inserts a NotificationJob.
+The worker (manage.py run_notification_jobs) claims queued jobs, expands
+each into one NotificationDelivery row per recipient, then sends pending
+deliveries in batches over a single SMTP connection, refreshing the job's
+progress counters and heartbeat after every batch. Deliveries are marked
+as each batch finishes, so a crashed worker's job, picked up again once
+its heartbeat is NOTIFICATION_STALE_AFTER seconds old, resends at most the
+batch in flight. A job taken on NOTIFICATION_MAX_ATTEMPTS times without
+finishing is marked failed rather than taken over again. Subscribers who
+unsubscribe before their turn are skipped. Failed deliveries stay failed
+until retried from the admin.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .dashboard import refresh_stats
+from .models import NotificationDelivery, NotificationJob
+from .utils import build_post_notification, post_notification_recipients
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def enqueue_post_notifications(post, trigger='publish', user=None):
+    """
+    Queue emails about `post` to its subscribers.
+
+    Returns:
+        NotificationJob: The new job, or the post's job already waiting to run
+    """
+    waiting = NotificationJob.objects.filter(post=post, status='queued').first()
+    if waiting:
+        return waiting
+    return NotificationJob.objects.create(post=post, trigger=trigger, requested_by=user)
+
+
+def claim_job():
+    """
+    Take the oldest queued job, or a running one whose worker went quiet.
+    Jobs that have already used up their attempts are marked failed and
+    passed over.
+
+    Returns:
+        NotificationJob or None
+    """
+    stale = timezone.now() - timedelta(seconds=settings.NOTIFICATION_STALE_AFTER)
+    while True:
+        with transaction.atomic():
+            job = (
+                NotificationJob.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='queued') | Q(status='running', heartbeat_at__lt=stale))
+                .order_by('created_at')
+                .first()
+            )
+            if job is None:
+                return None
+            now = timezone.now()
+            if job.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                # Every worker that took it on crashed or was killed
+                job.status, job.finished_at = 'failed', now
+                job.save(update_fields=['status', 'finished_at'])
+                logger.error(f'Notification job {job.pk} failed after {job.attempts} attempts')
+                continue
+            job.status = 'running'
+            job.attempts += 1
+            job.started_at = job.started_at or now
+            job.heartbeat_at = now
+            job.finished_at = None
+            job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at', 'finished_at'])
+        return job
+
+
+def plan_deliveries(job):
+    """Create the job's delivery rows, once, from the current subscriber list."""
+    if job.total or job.deliveries.exists():
+        return
+    _, recipients = post_notification_recipients(job.post)
+    batch = []
+    for subscriber_id, email in recipients.values_list('id', 'email').iterator(chunk_size=2000):
+        batch.append(NotificationDelivery(job=job, subscriber_id=subscriber_id, email=email))
+        if len(batch) == 2000:
+            NotificationDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    NotificationDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+    update_progress(job)
+
+
+def update_progress(job, **fields):
+    """Recount the job's deliveries and store the counters plus `fields`."""
+    counts = dict(job.deliveries.values_list('status').annotate(n=Count('id')).order_by())
+    job.sent = counts.get('sent', 0)
+    job.failed = counts.get('failed', 0)
+    job.total = sum(counts.values()) - counts.get('skipped', 0)
+    job.heartbeat_at = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=['sent', 'failed', 'total', 'heartbeat_at', *fields])
+
+
+def send_batch(job, deliveries, domain, post_categories):
+    """Send a batch over one connection and record each outcome."""
+    connection = get_connection()
+    errors = []
+    try:
+        connection.open()
+        for delivery in deliveries:
+            if delivery.subscriber is None or not delivery.subscriber.is_active:
+                delivery.status = 'skipped'
+                continue
+            delivery.attempts += 1
+            try:
+                message = build_post_notification(job.post, post_categories, delivery.subscriber, domain)
+                message.connection = connection
+                message.send()
+                delivery.status, delivery.error, delivery.sent_at = 'sent', '', timezone.now()
+            except Exception as e:
+                delivery.status, delivery.error = 'failed', str(e)
+                errors.append(f'{delivery.email}: {e}')
+                logger.error(f'Failed to send post notification to {delivery.email}: {e}')
+    finally:
+        connection.close()
+    NotificationDelivery.objects.bulk_update(deliveries, ['status', 'attempts', 'error', 'sent_at'])
+    return errors
+
+
+def is_cancelled(job):
+    return NotificationJob.objects.filter(pk=job.pk, status='cancelled').exists()
+
+
+def run_job(job):
+    """
+    Send every pending delivery of a claimed job, batch by batch.
+
+    Returns:
+        NotificationJob: The job with its final counters
+    """
+    plan_deliveries(job)
+    domain = Site.objects.get_current().domain
+    post_categories, _ = post_notification_recipients(job.post)
+    while True:
+        # Cancelling from the admin stops the job at the next batch
+        if is_cancelled(job):
+            update_progress(job)
+            job.refresh_from_db(fields=['status', 'finished_at'])
+            logger.info(f'Notification job {job.pk} cancelled')
+            return job
+        deliveries = list(
+            job.deliveries.filter(status='pending').select_related('subscriber')
+            .prefetch_related('subscriber__categories').order_by('id')[:BATCH_SIZE]
+        )
+        if not deliveries:
+            break
+        errors = send_batch(job, deliveries, domain, post_categories)
+        update_progress(job, **({'last_error': errors[-1]} if errors else {}))
+
+    update_progress(job)
+    # Only a job still running is done; one cancelled during the last batch stays cancelled
+    finished_at = timezone.now()
+    if NotificationJob.objects.filter(pk=job.pk, status='running').update(status='done', finished_at=finished_at):
+        job.status, job.finished_at = 'done', finished_at
+    else:
+        job.refresh_from_db(fields=['status', 'finished_at'])
+    refresh_stats('notifications')
+    logger.info(f'Notification job {job.pk} for "{job.post}": {job.sent} sent, {job.failed} failed')
+    return job
+
+
+def run_pending_jobs():
+    """
+    Run queued jobs until none are left.
+
+    Returns:
+        int: Number of jobs run
+    """
+    count = 0
+    while (job := claim_job()) is not None:
+        try:
+            run_job(job)
+        except Exception as e:
+            # Leave it running; it is claimed again once its heartbeat is stale
+            logger.exception(f'Notification job {job.pk} crashed')
+            NotificationJob.objects.filter(pk=job.pk).update(last_error=str(e))
+        count += 1
+    return count
+
+
+def retry_failed(jobs):
+    """
+    Requeue the failed deliveries of `jobs`.
+
+    Returns:
+        int: Number of deliveries requeued
+    """
+    job_ids = [job.pk for job in jobs if job.status not in ACTIVE_STATUSES]
+    with transaction.atomic():
+        count = NotificationDelivery.objects.filter(job_id__in=job_ids, status='failed').update(
+            status='pending', error=''
+        )
+        NotificationJob.objects.filter(
+            pk__in=NotificationDelivery.objects.filter(job_id__in=job_ids, status='pending').values('job_id')
+        ).update(status='queued', attempts=0, finished_at=None)
+    return count
+
+
+def cancel_jobs(jobs):
+    """
+    Stop queued or running jobs; pending deliveries stay pending.
+
+    Returns:
+        int: Number of jobs cancelled
+    """
+    return NotificationJob.objects.filter(
+        pk__in=[job.pk for job in jobs], status__in=ACTIVE_STATUSES
+    ).update(status='cancelled', finished_at=timezone.now())
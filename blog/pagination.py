@@ -0,0 +1,146 @@
+# blog/pagination.py
+
+"""
+Keyset (cursor) pagination over (published_date, id), newest first.
+
+Each page is one indexed range scan of per_page + 1 rows however deep the
+reader goes, and links stay stable while new posts are published. Cursors
+are '<microseconds since epoch>-<id>' of the boundary row.
+
+Also EstimatedCountPaginator, for admin changelists over large tables.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def make_cursor(post):
+    delta = post.published_date - EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f'{micros}-{post.pk}'
+
+
+def parse_cursor(cursor):
+    """
+    Returns:
+        tuple: (published_date, id), or None if the cursor is malformed
+    """
+    try:
+        micros, pk = cursor.rsplit('-', 1)
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        return None
+
+
+class KeysetPage:
+    """
+    One page of results, shaped enough like django's Page for ListView
+    context (object_list, has_next/has_previous, has_other_pages).
+    """
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        return make_cursor(self.object_list[-1]) if self.has_next_page and self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return make_cursor(self.object_list[0]) if self.has_previous_page and self.object_list else None
+
+
+def keyset_page(queryset, per_page, after=None, before=None):
+    """
+    Fetch the page following `after` (or preceding `before`).
+
+    Args:
+        queryset: Posts to paginate; its ordering is replaced
+        per_page: Page size
+        after: Cursor of the last row of the previous page
+        before: Cursor of the first row of the next page
+
+    Returns:
+        KeysetPage, or None if a cursor is malformed
+    """
+    if before:
+        key = parse_cursor(before)
+        if key is None:
+            return None
+        date, pk = key
+        rows = list(
+            queryset.filter(Q(published_date__gt=date) | Q(published_date=date, id__gt=pk))
+            .order_by('published_date', 'id')[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        return KeysetPage(rows[:per_page][::-1], has_next=True, has_previous=has_previous)
+
+    if after:
+        key = parse_cursor(after)
+        if key is None:
+            return None
+        date, pk = key
+        queryset = queryset.filter(Q(published_date__lt=date) | Q(published_date=date, id__lt=pk))
+    rows = list(queryset.order_by('-published_date', '-id')[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=bool(after))
+
+
+def approximate_count(key, queryset):
+    """
+    Count `queryset`, cached for SECTION_COUNT_CACHE_TIMEOUT seconds.
+    Listings only show it as a rough total, so staleness is fine.
+    """
+    return cache.get_or_set(f'blog:count:{key}', queryset.count, settings.SECTION_COUNT_CACHE_TIMEOUT)
+
+
+def table_estimate(using, table):
+    """Row count of a PostgreSQL table from the planner's statistics (-1 if never analyzed)."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin changelist paginator that doesn't COUNT(*) a whole large table.
+
+    An unfiltered PostgreSQL changelist past ADMIN_ESTIMATED_COUNT_THRESHOLD
+    rows takes its total from pg_class.reltuples, which autovacuum keeps
+    close enough for page links. Filtered lists, small tables and SQLite
+    are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == 'postgresql' and not queryset.query.where:
+            estimate = table_estimate(queryset.db, queryset.model._meta.db_table)
+            if estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,155 @@
+# blog/redirects.py
+
+"""
+Permanent redirects for old WordPress URLs.
+
+Each process holds one dict from normalized legacy keys to current URLs:
+
+    '/2019/03/14/some-slug'  date permalinks (derived from every published post)
+    '?p=123', '?page_id=45'  WordPress ids (wp_post_id / wp_page_id)
+    anything in LegacyRedirect (original links, pages, attachments from WXR)
+
+plus a prefix rule sending /wp-content/uploads/... to the copies that
+fix_wordpress_links stores under /static/uploads/. A lookup is a dict probe;
+the map is built once (three queries) and rebuilt when the 'redirects'
+ContentVersion stamp moves, which this process checks at most every
+REDIRECT_MAP_CHECK_INTERVAL seconds.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import bump_versions, get_versions
+from .models import LegacyRedirect, Page, Post
+
+UPLOADS_PREFIX = '/wp-content/uploads/'
+UPLOADS_TARGET = '/static/uploads/'
+ID_PARAMETERS = ('p', 'page_id')
+
+
+def normalize_path(path):
+    """Legacy keys ignore case and trailing slashes."""
+    return path.rstrip('/').lower() or '/'
+
+
+def request_keys(path, query):
+    """
+    Return the map keys a request could match, most specific first.
+
+    Args:
+        path: request.path_info
+        query: request.GET
+    """
+    path = normalize_path(path)
+    keys = []
+    if path == '/':
+        # WordPress "ugly" permalinks only ever appeared on the site root
+        for parameter in ID_PARAMETERS:
+            value = query.get(parameter, '')
+            if value.isdigit():
+                keys.append(f'?{parameter}={int(value)}')
+    keys.append(path)
+    return keys
+
+
+def date_permalink(published_date, slug):
+    local = timezone.localtime(published_date)
+    return f'/{local:%Y/%m/%d}/{slug}'.lower()
+
+
+def build_redirect_map():
+    """
+    Build the complete legacy key -> URL dict.
+
+    Returns:
+        dict
+    """
+    post_url = lambda slug: reverse('blog:post_detail', kwargs={'slug': slug})
+    page_url = lambda slug: reverse('blog:page_detail', kwargs={'slug': slug})
+    redirects = {}
+
+    for slug, wp_id, published_date in Post.objects.filter(status='published').values_list(
+        'slug', 'wp_post_id', 'published_date'
+    ):
+        url = post_url(slug)
+        if published_date:
+            redirects[date_permalink(published_date, slug)] = url
+        if wp_id:
+            redirects[f'?p={wp_id}'] = url
+
+    for slug, wp_id in Page.objects.filter(is_published=True).values_list('slug', 'wp_page_id'):
+        if wp_id:
+            url = page_url(slug)
+            redirects[f'?page_id={wp_id}'] = url
+            redirects.setdefault(f'?p={wp_id}', url)
+
+    # Recorded links win over derived ones (e.g. the WordPress slug differed)
+    for old_path, post_slug, post_status, page_slug, page_published, target_url in (
+        LegacyRedirect.objects.values_list(
+            'old_path', 'post__slug', 'post__status', 'page__slug', 'page__is_published', 'target_url'
+        )
+    ):
+        if post_slug and post_status == 'published':
+            redirects[old_path] = post_url(post_slug)
+        elif page_slug and page_published:
+            redirects[old_path] = page_url(page_slug)
+        elif target_url:
+            redirects[old_path] = target_url
+    return redirects
+
+
+class RedirectMap:
+    """The per-process map and the bookkeeping deciding when to rebuild it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.redirects = None
+        self.version = None
+        self.checked_at = 0.0
+
+    def clear(self):
+        self.redirects = None
+
+    def get(self):
+        now = time.monotonic()
+        if self.redirects is not None and now - self.checked_at < settings.REDIRECT_MAP_CHECK_INTERVAL:
+            return self.redirects
+        with self.lock:
+            version = get_versions(['redirects'])['redirects'][0]
+            if self.redirects is None or version != self.version:
+                self.redirects = build_redirect_map()
+                self.version = version
+            self.checked_at = now
+            return self.redirects
+
+
+redirect_map = RedirectMap()
+
+
+def find_redirect(path, query):
+    """
+    Return the current URL for a legacy request, or None.
+
+    Args:
+        path: request.path_info
+        query: request.GET
+    """
+    redirects = redirect_map.get()
+    if path.startswith(UPLOADS_PREFIX):
+        # Individual files may be mapped explicitly; otherwise keep the layout
+        return redirects.get(normalize_path(path), UPLOADS_TARGET + path[len(UPLOADS_PREFIX):])
+    for key in request_keys(path, query):
+        url = redirects.get(key)
+        if url and url != path:
+            return url
+    return None
+
+
+def invalidate_redirect_map():
+    """Make every process rebuild its map (this one immediately)."""
+    bump_versions('redirects')
+    redirect_map.clear()
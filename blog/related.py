@@ -0,0 +1,150 @@
+# blog/related.py
+
+"""
+Precomputed related posts.
+
+Similarity is the Jaccard index over a post's combined tag and category set.
+Results are stored as the top RELATED_POSTS_COUNT rows per post in
+RelatedPost, so the detail view needs a single indexed query. Lists are
+refreshed incrementally for posts whose tags/categories/status changed and
+for the posts sharing a tag with them or listing them, or rebuilt in full
+by the refresh_related_posts command.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Post, RelatedPost
+
+logger = logging.getLogger(__name__)
+
+RELATED_POSTS_COUNT = 5
+
+TagLink = Post.tags.through
+CategoryLink = Post.categories.through
+
+
+def load_features(post_ids=None):
+    """
+    Load the tag/category feature set of published posts.
+
+    Args:
+        post_ids: Restrict to these posts (None loads every published post)
+
+    Returns:
+        dict: post id -> set of ('t', tag_id) / ('c', category_id)
+    """
+    features = defaultdict(set)
+    for prefix, link_model, column in (('t', TagLink, 'tag_id'), ('c', CategoryLink, 'category_id')):
+        links = link_model.objects.filter(post__status='published')
+        if post_ids is not None:
+            links = links.filter(post_id__in=post_ids)
+        for post_id, feature_id in links.values_list('post_id', column).iterator():
+            features[post_id].add((prefix, feature_id))
+    return features
+
+
+def posts_sharing(features):
+    """Return ids of published posts having any of the given features."""
+    tag_ids = [feature_id for prefix, feature_id in features if prefix == 't']
+    category_ids = [feature_id for prefix, feature_id in features if prefix == 'c']
+    post_ids = set()
+    if tag_ids:
+        post_ids.update(TagLink.objects.filter(
+            tag_id__in=tag_ids, post__status='published'
+        ).values_list('post_id', flat=True))
+    if category_ids:
+        post_ids.update(CategoryLink.objects.filter(
+            category_id__in=category_ids, post__status='published'
+        ).values_list('post_id', flat=True))
+    return post_ids
+
+
+def top_related(post_id, features, inverted, k=RELATED_POSTS_COUNT):
+    """
+    Rank candidates for one post by Jaccard similarity.
+
+    Args:
+        post_id: Post to rank candidates for
+        features: post id -> feature set (must cover all candidates)
+        inverted: feature -> set of post ids
+        k: Number of results to keep
+
+    Returns:
+        list: (related_id, score) pairs, best first; ties favour newer posts
+    """
+    own = features.get(post_id)
+    if not own:
+        return []
+    candidates = set()
+    for feature in own:
+        candidates.update(inverted[feature])
+    candidates.discard(post_id)
+
+    scored = []
+    for candidate in candidates:
+        other = features[candidate]
+        scored.append((len(own & other) / len(own | other), candidate))
+    scored.sort(key=lambda item: (-item[0], -item[1]))
+    return [(candidate, score) for score, candidate in scored[:k]]
+
+
+def _store(post_ids, features, inverted):
+    rows = []
+    for post_id in post_ids:
+        for rank, (related_id, score) in enumerate(top_related(post_id, features, inverted), start=1):
+            rows.append(RelatedPost(post_id=post_id, related_id=related_id, rank=rank, score=score))
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=post_ids).delete()
+        RelatedPost.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _invert(features):
+    inverted = defaultdict(set)
+    for post_id, post_features in features.items():
+        for feature in post_features:
+            inverted[feature].add(post_id)
+    return inverted
+
+
+def rebuild_related_posts():
+    """Recompute related posts for every post. Returns the number of rows stored."""
+    features = load_features()
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    RelatedPost.objects.exclude(post_id__in=post_ids).delete()
+    return _store(post_ids, features, _invert(features))
+
+
+def refresh_related_posts(post_ids):
+    """
+    Incrementally refresh related posts after `post_ids` changed.
+
+    A change can move a post into or out of its neighbours' top-K, so the
+    lists of every post sharing a tag with it (or currently listing it) are
+    recomputed too. Posts sharing only a category are left alone: a section
+    holds most of the blog, and recomputing all of its lists on every save
+    made each refresh quadratic. Their lists catch up on their own next
+    change or the next full rebuild.
+
+    Returns:
+        int: Number of rows stored
+    """
+    changed = set(post_ids)
+    if not changed:
+        return 0
+
+    changed_features = load_features(changed)
+    affected = set(changed)
+    changed_tags = {feature for feature in set().union(*changed_features.values()) if feature[0] == 't'}
+    affected.update(posts_sharing(changed_tags))
+    affected.update(RelatedPost.objects.filter(related_id__in=changed).values_list('post_id', flat=True))
+
+    affected_features = load_features(affected)
+    universe = posts_sharing(set().union(*affected_features.values())) | affected
+    features = load_features(universe)
+    stored = _store(affected, features, _invert(features))
+    logger.info(f'Refreshed related posts for {len(affected)} posts ({len(changed)} changed)')
+    return stored
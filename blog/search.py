@@ -0,0 +1,362 @@
+# blog/search.py
+
+"""
+Full-text search over posts and pages.
+
+SearchDocument rows hold a plain-text copy of each Post/Page and are kept in
+sync from blog.signals. Queries go to a PostgreSQL tsvector/GIN index or an
+SQLite FTS5 table depending on the database; any other backend falls back to
+icontains over the shadow table.
+"""
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post, Page, SearchDocument
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Longest query we bother parsing
+MAX_QUERY_LENGTH = 200
+
+# Private-use characters marking matched terms in snippets. The snippet text is
+# escaped first and the markers swapped for <mark> afterwards, so stored text
+# can never inject HTML.
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+
+
+def document_kind(obj):
+    """Return the SearchDocument kind for a Post or Page instance."""
+    if isinstance(obj, Post):
+        return 'post'
+    if isinstance(obj, Page):
+        return 'page'
+    raise TypeError(f'Cannot index {type(obj).__name__} objects')
+
+
+def is_public(obj):
+    """Whether the object is visible to anonymous readers."""
+    if isinstance(obj, Post):
+        return obj.status == 'published'
+    return obj.is_published
+
+
+def index_object(obj):
+    """
+    Create or refresh the search document for a Post or Page.
+
+    Args:
+        obj: Post or Page instance (already saved)
+    """
+    SearchDocument.objects.update_or_create(
+        kind=document_kind(obj),
+        object_id=obj.pk,
+        defaults={
+            'title': obj.title,
+            'body': obj.plain_text,
+            'is_public': is_public(obj),
+        },
+    )
+
+
+def remove_object(obj):
+    """Drop the search document for a deleted Post or Page."""
+    SearchDocument.objects.filter(kind=document_kind(obj), object_id=obj.pk).delete()
+
+
+def query_terms(query):
+    """Split a user query into word terms."""
+    return TERM_RE.findall((query or '')[:MAX_QUERY_LENGTH])
+
+
+def search(query, kind=None, public_only=True, limit=50):
+    """
+    Run a ranked full-text query.
+
+    Args:
+        query: Raw user input
+        kind: 'post', 'page' or None for both
+        public_only: Restrict to published objects
+        limit: Maximum number of hits, or None for all of them
+
+    Returns:
+        list: (kind, object_id) tuples, best match first
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(query[:MAX_QUERY_LENGTH], kind, public_only, limit)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(terms, kind, public_only, limit)
+    return _search_fallback(terms, kind, public_only, limit)
+
+
+def search_ids(query, kind, public_only=False, limit=None):
+    """Return matching object ids of one kind (used by the admin, which wants every match)."""
+    return [object_id for _, object_id in search(query, kind, public_only, limit)]
+
+
+def _filters(kind, public_only, alias):
+    clauses, params = [], []
+    if kind:
+        clauses.append(f'{alias}.kind = %s')
+        params.append(kind)
+    if public_only:
+        clauses.append(f'{alias}.is_public')
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+
+def _limit(limit):
+    """The LIMIT clause and its parameters; no clause when limit is None."""
+    return ('', []) if limit is None else (' LIMIT %s', [limit])
+
+
+def _search_postgresql(query, kind, public_only, limit):
+    extra, params = _filters(kind, public_only, 'd')
+    limit_clause, limit_params = _limit(limit)
+    sql = f"""
+        SELECT d.kind, d.object_id
+        FROM blog_searchdocument d, websearch_to_tsquery('english', %s) q
+        WHERE d.search_vector @@ q{extra}
+        ORDER BY ts_rank_cd(d.search_vector, q) DESC, d.id{limit_clause}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, *params, *limit_params])
+        return cursor.fetchall()
+
+
+def fts5_match_expression(terms):
+    """Quote each term so FTS5 treats user input as plain words (implicit AND)."""
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def _search_sqlite(terms, kind, public_only, limit):
+    extra, params = _filters(kind, public_only, 'd')
+    limit_clause, limit_params = _limit(limit)
+    # bm25() is lower-is-better; title matches weigh 10x body matches
+    sql = f"""
+        SELECT d.kind, d.object_id
+        FROM blog_searchdocument_fts f
+        JOIN blog_searchdocument d ON d.id = f.rowid
+        WHERE blog_searchdocument_fts MATCH %s{extra}
+        ORDER BY bm25(blog_searchdocument_fts, 10.0, 1.0), d.id{limit_clause}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [fts5_match_expression(terms), *params, *limit_params])
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, kind, public_only, limit):
+    documents = SearchDocument.objects.all()
+    if kind:
+        documents = documents.filter(kind=kind)
+    if public_only:
+        documents = documents.filter(is_public=True)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return list(documents.values_list('kind', 'object_id')[:limit])
+
+
+def search_page(query, after=None, limit=10, kind=None):
+    """
+    Fetch one page of ranked public hits with highlighted snippets.
+
+    Pagination is keyset-based on (score, document id), where a lower score is a
+    better match, so deep pages cost the same as the first one.
+
+    Args:
+        query: Raw user input
+        after: Cursor string from a previous page's `next_cursor`, or None
+        limit: Page size
+        kind: 'post', 'page' or None for both
+
+    Returns:
+        dict: 'hits' (list of dicts with kind, object_id, snippet) and
+        'next_cursor' (str, or None on the last page)
+    """
+    terms = query_terms(query)
+    if not terms:
+        return {'hits': [], 'next_cursor': None}
+
+    cursor_key = parse_cursor(after)
+    if connection.vendor == 'postgresql':
+        rows = _page_postgresql(query[:MAX_QUERY_LENGTH], cursor_key, limit + 1, kind)
+    elif connection.vendor == 'sqlite':
+        rows = _page_sqlite(terms, cursor_key, limit + 1, kind)
+    else:
+        rows = _page_fallback(terms, cursor_key, limit + 1, kind)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        _, _, doc_id, score, _ = rows[-1]
+        next_cursor = f'{score!r}:{doc_id}'
+
+    hits = [
+        {'kind': kind, 'object_id': object_id, 'snippet': highlight(snippet)}
+        for kind, object_id, _, _, snippet in rows
+    ]
+    return {'hits': hits, 'next_cursor': next_cursor}
+
+
+def parse_cursor(value):
+    """Decode a 'score:id' cursor; malformed cursors restart from the top."""
+    try:
+        score, doc_id = (value or '').rsplit(':', 1)
+        return float(score), int(doc_id)
+    except ValueError:
+        return None
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the highlight markers into <mark> tags."""
+    html = escape(snippet or '')
+    html = html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    return mark_safe(html)
+
+
+def _page_postgresql(query, cursor_key, limit, kind):
+    extra, params = _filters(kind, True, 'd')
+    keyset, keyset_params = '', []
+    if cursor_key:
+        keyset = 'WHERE (score, id) > (%s, %s)'
+        keyset_params = list(cursor_key)
+    headline_options = (
+        f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+        'MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
+    )
+    # ts_headline is only evaluated for the rows on this page
+    sql = f"""
+        WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query),
+        ranked AS (
+            SELECT d.id, d.kind, d.object_id, d.body,
+                   -ts_rank_cd(d.search_vector, q.query) AS score
+            FROM blog_searchdocument d, q
+            WHERE d.search_vector @@ q.query{extra}
+        ),
+        page AS (
+            SELECT * FROM ranked {keyset}
+            ORDER BY score, id
+            LIMIT %s
+        )
+        SELECT page.kind, page.object_id, page.id, page.score,
+               ts_headline('english', page.body, q.query, %s)
+        FROM page, q
+        ORDER BY page.score, page.id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, *params, *keyset_params, limit, headline_options])
+        return cursor.fetchall()
+
+
+def _page_sqlite(terms, cursor_key, limit, kind):
+    extra, params = _filters(kind, True, 'd')
+    keyset, keyset_params = '', []
+    if cursor_key:
+        keyset = 'WHERE score > %s OR (score = %s AND id > %s)'
+        keyset_params = [cursor_key[0], cursor_key[0], cursor_key[1]]
+    match = fts5_match_expression(terms)
+    sql = f"""
+        SELECT kind, object_id, id, score FROM (
+            SELECT d.kind, d.object_id, d.id, bm25(blog_searchdocument_fts, 10.0, 1.0) AS score
+            FROM blog_searchdocument_fts
+            JOIN blog_searchdocument d ON d.id = blog_searchdocument_fts.rowid
+            WHERE blog_searchdocument_fts MATCH %s{extra}
+        ) {keyset}
+        ORDER BY score, id
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *params, *keyset_params, limit])
+        rows = cursor.fetchall()
+        if not rows:
+            return []
+        # snippet() in the ranked query would run for every match before the
+        # sort, so fetch snippets for this page's rows only
+        placeholders = ', '.join(['%s'] * len(rows))
+        cursor.execute(
+            f"""
+            SELECT rowid, snippet(blog_searchdocument_fts, 1, %s, %s, ' … ', 24)
+            FROM blog_searchdocument_fts
+            WHERE blog_searchdocument_fts MATCH %s AND rowid IN ({placeholders})
+            """,
+            [HIGHLIGHT_START, HIGHLIGHT_STOP, match, *[row[2] for row in rows]],
+        )
+        snippets = dict(cursor.fetchall())
+    return [(*row, snippets.get(row[2], '')) for row in rows]
+
+
+def _page_fallback(terms, cursor_key, limit, kind):
+    # No ranking here: every hit scores 0 and pages are ordered by id
+    documents = SearchDocument.objects.filter(is_public=True)
+    if kind:
+        documents = documents.filter(kind=kind)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    if cursor_key:
+        documents = documents.filter(id__gt=cursor_key[1])
+    rows = documents.order_by('id').values_list('kind', 'object_id', 'id', 'body')[:limit]
+    return [(kind, object_id, doc_id, 0.0, body[:200]) for kind, object_id, doc_id, body in rows]
+
+
+def load_objects(keys):
+    """
+    Resolve (kind, object_id) keys to Post/Page instances.
+
+    Returns:
+        dict: (kind, object_id) -> instance; ids that no longer exist are absent
+    """
+    post_ids = [object_id for kind, object_id in keys if kind == 'post']
+    page_ids = [object_id for kind, object_id in keys if kind == 'page']
+    objects = {}
+    if post_ids:
+        objects.update({('post', p.pk): p for p in Post.objects.filter(pk__in=post_ids).defer('content')})
+    if page_ids:
+        objects.update({('page', p.pk): p for p in Page.objects.filter(pk__in=page_ids).defer('content')})
+    return objects
+
+
+def cached_search_results(query, after=None, limit=10):
+    """
+    Public search results ready for the template, cached briefly per query.
+
+    Popular queries are answered from the cache for SEARCH_CACHE_TIMEOUT
+    seconds; new or edited content shows up once the entry expires.
+
+    Returns:
+        dict: 'results' (list of dicts with title, url, date, snippet) and
+        'next_cursor'
+    """
+    normalized = ' '.join(query.lower().split())[:MAX_QUERY_LENGTH]
+    digest = hashlib.md5(f'{normalized}|{after or ""}|{limit}'.encode()).hexdigest()
+    cache_key = f'blog:search:{digest}'
+
+    data = cache.get(cache_key)
+    if data is None:
+        page = search_page(normalized, after=after, limit=limit)
+        objects = load_objects([(hit['kind'], hit['object_id']) for hit in page['hits']])
+        results = []
+        for hit in page['hits']:
+            obj = objects.get((hit['kind'], hit['object_id']))
+            if obj is None:
+                continue
+            results.append({
+                'kind': hit['kind'],
+                'title': obj.title,
+                'url': obj.get_absolute_url(),
+                'date': getattr(obj, 'published_date', None),
+                'snippet': hit['snippet'],
+            })
+        data = {'results': results, 'next_cursor': page['next_cursor']}
+        cache.set(cache_key, data, settings.SEARCH_CACHE_TIMEOUT)
+    return data
@@ -1,8 +1,19 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
-from django.test import RequestFactory
-from .models import Post
-from .utils import send_post_notifications
+from .archives import month_of, refresh_archive_months
+from .caching import bump_versions, section_key
+from .dashboard import refresh_stats
+from .cdn import purge
+from .feeds import invalidate_feeds
+from .models import Category, LegacyRedirect, Post, PostNavigation, Page, PageCategory, Tag, SECTION_CATEGORIES
+from .navigation import refresh_navigation
+from .notifications import enqueue_post_notifications
+from .redirects import invalidate_redirect_map
+from .related import refresh_related_posts
+from .search import index_object, remove_object
+from .taxonomy import TERM_MODELS, refresh_post_counts, refresh_post_terms
+from .sitemaps import shard_for, update_sitemap_shard
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,56 +21,263 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=Post)
 def send_post_notification_on_publish(sender, instance, created, **kwargs):
     """
-    Send email notifications to subscribers when a post is published.
+    Queue email notifications to subscribers when a post is published.
     
     This signal is triggered when:
     - A new post is created with status 'published'
     - An existing post's status changes to 'published'
+    
+    The emails are sent by the notification worker (blog.notifications);
+    resending for an already published post is done from the admin action.
     """
     
     # Only send notifications for published posts
     if instance.status != 'published':
         return
     
-    # For new posts, send notifications immediately
-    if created:
-        logger.info(f'New post created and published: "{instance.title}", sending notifications')
-        send_notifications_for_post(instance)
+    # Partial saves (e.g. the frontend editor) that don't touch status aren't publish events
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'status' not in update_fields:
         return
     
-    # For existing posts, we'll send notifications on any update to a published post
-    # This is simpler and ensures notifications are sent when needed
-    # You can manually control this via the admin action if needed
-    logger.info(f'Published post updated: "{instance.title}", sending notifications')
-    send_notifications_for_post(instance)
+    if created or instance.field_changed('status'):
+        logger.info(f'Post published: "{instance.title}", queueing notifications')
+        transaction.on_commit(lambda: enqueue_post_notifications(instance))
 
-def send_notifications_for_post(post):
-    """
-    Helper function to send notifications for a post.
-    Creates a mock request since signals don't have access to the original request.
-    """
-    try:
-        # Create a mock request for the email function
-        factory = RequestFactory()
-        request = factory.get('/')
-        
-        # Send notifications
-        results = send_post_notifications(request, post)
-        
-        logger.info(f'Post notification results for "{post.title}": '
-                   f'{results["success_count"]} sent, {results["failure_count"]} failed')
-        
-        if results['errors']:
-            for error in results['errors']:
-                logger.error(f'Post notification error: {error}')
-                
-    except Exception as e:
-        logger.error(f'Failed to send notifications for post "{post.title}": {str(e)}')
-
-# Alternative approach: Manual notification function for admin use
-def manually_send_post_notifications(post):
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Page)
+def update_search_index(sender, instance, **kwargs):
+    """Keep the full-text search document in sync with the saved object."""
+    index_object(instance)
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Page)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop the search document of a deleted object."""
+    remove_object(instance)
+
+def posts_from_m2m(instance, action, reverse, pk_set):
     """
-    Manually send notifications for a post.
-    This can be called from Django admin or management commands.
+    Return the ids of posts affected by an m2m_changed signal on Post.tags or
+    Post.categories, whichever side of the relation it was sent from.
     """
-    send_notifications_for_post(post)
\ No newline at end of file
+    if not reverse:
+        return {instance.pk}
+    if action == 'pre_clear':
+        # pk_set is None for clear(); remember the posts before they're unlinked
+        instance._cleared_post_ids = set(instance.post_set.values_list('id', flat=True))
+        return set()
+    if action == 'post_clear':
+        return getattr(instance, '_cleared_post_ids', set())
+    return set(pk_set or ())
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.categories.through)
+def refresh_related_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh related posts once tag/category links have been committed."""
+    if action not in ('pre_clear', 'post_add', 'post_remove', 'post_clear'):
+        return
+    post_ids = posts_from_m2m(instance, action, reverse, pk_set)
+    if post_ids:
+        transaction.on_commit(lambda: refresh_related_posts(post_ids))
+
+@receiver(post_save, sender=Post)
+def refresh_related_on_status_change(sender, instance, created, **kwargs):
+    """A post entering or leaving 'published' changes its neighbours' lists."""
+    if not created and instance.field_changed('status'):
+        transaction.on_commit(lambda: refresh_related_posts([instance.pk]))
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feeds_on_post_change(sender, instance, **kwargs):
+    """Published content changed: feeds are re-rendered on their next request."""
+    if instance.status == 'published' or instance.field_changed('status'):
+        transaction.on_commit(invalidate_feeds)
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def invalidate_feeds_on_category_change(sender, action, **kwargs):
+    """Category links decide which section feeds a post appears in."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(invalidate_feeds)
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Page)
+def update_sitemap(sender, instance, **kwargs):
+    """Rewrite the sitemap shard holding this object once the change is committed."""
+    # Resolve the shard now: a deleted instance has no pk by commit time
+    kind, shard = shard_for(instance)
+    transaction.on_commit(lambda: update_sitemap_shard(kind, shard))
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=PageCategory)
+@receiver(post_delete, sender=PageCategory)
+def bump_toc_version(sender, **kwargs):
+    """Every page embeds the TOC, so any page or page category change invalidates all ETags."""
+    bump_versions('toc')
+    purge('toc')
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_versions(sender, instance, **kwargs):
+    """Invalidate post pages (related lists) and the listings the post appears in."""
+    if instance.status == 'published' or instance.field_changed('status'):
+        # A deleted post's category links are already gone, so bump every section
+        sections = instance.get_sections() if 'created' in kwargs else SECTION_CATEGORIES
+        keys = ['posts', *(section_key(section) for section in sections)]
+        bump_versions(*keys)
+        purge(*keys, f'post-{instance.pk}')
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def bump_section_versions(sender, action, **kwargs):
+    """Category links move posts between section listings."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        keys = ['posts', *(section_key(section) for section in SECTION_CATEGORIES)]
+        bump_versions(*keys)
+        purge(*keys)
+
+@receiver(post_save, sender=Post)
+def update_archive_on_save(sender, instance, **kwargs):
+    """Refresh the month a post left and the month it entered."""
+    if not (instance.field_changed('status') or instance.field_changed('published_date')):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    months = set()
+    if loaded.get('status') == 'published' and loaded.get('published_date'):
+        months.add(month_of(loaded['published_date']))
+    if instance.status == 'published' and instance.published_date:
+        months.add(month_of(instance.published_date))
+    if months:
+        transaction.on_commit(lambda: refresh_archive_months(months))
+
+@receiver(post_delete, sender=Post)
+def update_archive_on_delete(sender, instance, **kwargs):
+    if instance.status == 'published' and instance.published_date:
+        months = {month_of(instance.published_date)}
+        transaction.on_commit(lambda: refresh_archive_months(months))
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def update_archive_on_category_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Section counts of the affected posts' months change with their categories."""
+    if action not in ('pre_clear', 'post_add', 'post_remove', 'post_clear'):
+        return
+    post_ids = posts_from_m2m(instance, action, reverse, pk_set)
+    if post_ids:
+        months = {
+            month_of(value) for value in Post.objects.filter(
+                id__in=post_ids, status='published', published_date__isnull=False
+            ).values_list('published_date', flat=True)
+        }
+        transaction.on_commit(lambda: refresh_archive_months(months))
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_redirects_on_post_change(sender, instance, **kwargs):
+    """Derived permalinks depend on a post's slug, status and date."""
+    if any(instance.field_changed(name) for name in ('slug', 'status', 'published_date')) or 'created' not in kwargs:
+        transaction.on_commit(invalidate_redirect_map)
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=LegacyRedirect)
+@receiver(post_delete, sender=LegacyRedirect)
+def invalidate_redirects(sender, **kwargs):
+    transaction.on_commit(invalidate_redirect_map)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.categories.through)
+def refresh_term_counts_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Tag/Category.post_count in step with the links just changed."""
+    model = Tag if sender is Post.tags.through else Category
+    if reverse:
+        # Sent from the term side: only that term's count can change
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            transaction.on_commit(lambda: refresh_post_counts(model, [instance.pk]))
+        return
+    if instance.status != 'published':
+        return
+    if action == 'pre_clear':
+        relation = 'tags' if model is Tag else 'categories'
+        instance._cleared_term_ids = set(getattr(instance, relation).values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        term_ids = set(pk_set or ()) if action != 'post_clear' else getattr(instance, '_cleared_term_ids', set())
+        if term_ids:
+            transaction.on_commit(lambda: refresh_post_counts(model, term_ids))
+
+@receiver(post_save, sender=Post)
+def refresh_term_counts_on_status_change(sender, instance, created, **kwargs):
+    if not created and instance.field_changed('status'):
+        transaction.on_commit(lambda: refresh_post_terms([instance.pk]))
+
+@receiver(pre_delete, sender=Post)
+def remember_terms_before_delete(sender, instance, **kwargs):
+    # The m2m rows are gone by post_delete
+    if instance.status == 'published':
+        instance._term_ids = {
+            model: set(getattr(instance, relation).values_list('id', flat=True))
+            for relation, model in TERM_MODELS.items()
+        }
+
+@receiver(post_delete, sender=Post)
+def refresh_term_counts_on_delete(sender, instance, **kwargs):
+    for model, term_ids in getattr(instance, '_term_ids', {}).items():
+        if term_ids:
+            transaction.on_commit(lambda model=model, term_ids=term_ids: refresh_post_counts(model, term_ids))
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def bump_versions_on_tag_change(sender, action, **kwargs):
+    """Tag listings and related-post lists move with tag links."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_versions('posts')
+        purge('posts')
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tag_cloud_version(sender, **kwargs):
+    """A renamed or deleted tag changes the tag cloud on every listing."""
+    bump_versions('tags')
+    purge('tags')
+
+@receiver(post_save, sender=Post)
+def refresh_navigation_on_save(sender, instance, **kwargs):
+    """Previous/next links move when a post is (un)published, re-dated or renamed."""
+    changed = any(instance.field_changed(name) for name in ('status', 'published_date', 'slug', 'title'))
+    if changed and (instance.status == 'published' or instance.field_changed('status')):
+        transaction.on_commit(lambda: refresh_navigation([instance.pk]))
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def refresh_navigation_on_category_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Section links change when a post enters or leaves a section."""
+    if action not in ('pre_clear', 'post_add', 'post_remove', 'post_clear'):
+        return
+    post_ids = posts_from_m2m(instance, action, reverse, pk_set)
+    if post_ids and action != 'pre_clear':
+        transaction.on_commit(lambda: refresh_navigation(post_ids))
+
+@receiver(pre_delete, sender=Post)
+def remember_navigation_before_delete(sender, instance, **kwargs):
+    # The PostNavigation row is cascade-deleted with the post
+    instance._navigation_links = list(
+        PostNavigation.objects.filter(post_id=instance.pk).values_list('links', flat=True)
+    )
+
+@receiver(post_delete, sender=Post)
+def refresh_navigation_on_delete(sender, instance, **kwargs):
+    previous_links = getattr(instance, '_navigation_links', [])
+    if previous_links:
+        transaction.on_commit(lambda: refresh_navigation([], previous_links))
+
+@receiver(post_save, sender=Post)
+def refresh_post_stats_on_save(sender, instance, created, **kwargs):
+    """Recount posts per status for the admin dashboard when a status changes"""
+    if created or instance.field_changed('status'):
+        transaction.on_commit(lambda: refresh_stats('posts'))
+
+@receiver(post_delete, sender=Post)
+@receiver(m2m_changed, sender=Post.categories.through)
+def refresh_post_stats(sender, action='post_delete', **kwargs):
+    """Recount posts per status and section for the admin dashboard"""
+    if action.startswith('post_'):
+        transaction.on_commit(lambda: refresh_stats('posts'))
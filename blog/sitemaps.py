@@ -0,0 +1,187 @@
+# blog/sitemaps.py
+
+"""
+Incrementally maintained, sharded XML sitemaps written to SITEMAP_ROOT.
+
+Posts and pages are split into shards by primary key range
+(SITEMAP_SHARD_SIZE ids per file), so saving an object rewrites only the
+shard it lives in plus the small index. A manifest.json next to the files
+records each shard's lastmod, which keeps index rewrites free of queries.
+The files are served by blog.middleware.SitemapMiddleware through
+WhiteNoise, so crawlers never reach a view or the database.
+"""
+
+import fcntl
+import gzip
+import json
+import logging
+import os
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db.models import Max
+from django.urls import reverse
+
+from .models import Post, Page
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'sitemap.xml'
+MANIFEST_FILENAME = 'manifest.json'
+
+SITEMAP_KINDS = {
+    'posts': (Post, {'status': 'published'}),
+    'pages': (Page, {'is_published': True}),
+}
+
+
+def shard_filename(kind, shard):
+    return f'sitemap-{kind}-{shard}.xml'
+
+
+def kind_for(obj):
+    return 'posts' if isinstance(obj, Post) else 'pages'
+
+
+def base_url():
+    # Site.objects.get_current() is cached per process after the first call
+    return f'https://{Site.objects.get_current().domain}'
+
+
+@contextmanager
+def locked_root():
+    """Serialize writers (several gunicorn workers may save at once)."""
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    with open(os.path.join(settings.SITEMAP_ROOT, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_file(filename, content):
+    """Atomically write a sitemap file plus a .gz variant for WhiteNoise."""
+    path = os.path.join(settings.SITEMAP_ROOT, filename)
+    data = content.encode('utf-8')
+    for target, payload in ((path, data), (path + '.gz', gzip.compress(data))):
+        tmp = f'{target}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, target)
+
+
+def remove_file(filename):
+    path = os.path.join(settings.SITEMAP_ROOT, filename)
+    for target in (path, path + '.gz'):
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(settings.SITEMAP_ROOT, MANIFEST_FILENAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest):
+    path = os.path.join(settings.SITEMAP_ROOT, MANIFEST_FILENAME)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(f'{path}.tmp', path)
+
+
+def render_shard(kind, shard):
+    """
+    Render one shard.
+
+    Returns:
+        tuple: (xml string, lastmod datetime), or (None, None) if the shard is empty
+    """
+    model, published = SITEMAP_KINDS[kind]
+    size = settings.SITEMAP_SHARD_SIZE
+    rows = list(
+        model.objects.filter(**published, id__gte=shard * size, id__lt=(shard + 1) * size)
+        .order_by('id')
+        .values_list('slug', 'modified_date')
+    )
+    if not rows:
+        return None, None
+
+    root = base_url()
+    url_name = 'post_detail' if kind == 'posts' else 'page_detail'
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for slug, modified in rows:
+        location = root + reverse(f'blog:{url_name}', kwargs={'slug': slug})
+        lines.append(f'<url><loc>{escape(location)}</loc><lastmod>{modified.isoformat()}</lastmod></url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines), max(modified for _, modified in rows)
+
+
+def render_index(manifest):
+    root = base_url()
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for filename, lastmod in sorted(manifest.items()):
+        lines.append(f'<sitemap><loc>{escape(root)}/{filename}</loc><lastmod>{lastmod}</lastmod></sitemap>')
+    lines.append('</sitemapindex>')
+    return '\n'.join(lines)
+
+
+def _write_shards(shards, manifest):
+    for kind, shard in shards:
+        filename = shard_filename(kind, shard)
+        content, lastmod = render_shard(kind, shard)
+        if content is None:
+            remove_file(filename)
+            manifest.pop(filename, None)
+        else:
+            write_file(filename, content)
+            manifest[filename] = lastmod.isoformat()
+
+
+def shard_for(obj):
+    """Return the (kind, shard) a Post or Page belongs to."""
+    return kind_for(obj), obj.pk // settings.SITEMAP_SHARD_SIZE
+
+
+def update_sitemap_shard(kind, shard):
+    """Rewrite one shard (after a save or delete inside it) and the index."""
+    try:
+        with locked_root():
+            manifest = read_manifest()
+            _write_shards([(kind, shard)], manifest)
+            write_manifest(manifest)
+            write_file(INDEX_FILENAME, render_index(manifest))
+    except OSError as e:
+        logger.error(f'Failed to update sitemap shard {kind}/{shard}: {e}')
+
+
+def build_sitemaps():
+    """
+    Rebuild every shard and the index from scratch.
+
+    Returns:
+        int: Number of shard files written
+    """
+    size = settings.SITEMAP_SHARD_SIZE
+    shards = []
+    for kind, (model, published) in SITEMAP_KINDS.items():
+        max_id = model.objects.filter(**published).aggregate(max_id=Max('id'))['max_id']
+        if max_id is not None:
+            shards.extend((kind, shard) for shard in range(max_id // size + 1))
+
+    with locked_root():
+        for filename in os.listdir(settings.SITEMAP_ROOT):
+            if filename.startswith('sitemap-'):
+                os.remove(os.path.join(settings.SITEMAP_ROOT, filename))
+        manifest = {}
+        _write_shards(shards, manifest)
+        write_manifest(manifest)
+        write_file(INDEX_FILENAME, render_index(manifest))
+    return len(manifest)
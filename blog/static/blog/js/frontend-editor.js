@@ -9,6 +9,10 @@ class FrontendEditor {
         this.currentElement = null;
         this.originalContent = null;
         this.toolbar = null;
+        // Unpublished edits autosave to a per-user draft (see blog/editing.py)
+        this.autosaveDelay = 2000;
+        this.autosaveTimer = null;
+        this.hasDraft = false;
         this.init();
     }
 
@@ -19,6 +23,7 @@ class FrontendEditor {
         this.createToolbar();
         this.attachEventListeners();
         this.makeContentEditable();
+        this.restoreDraft();
     }
 
     isStaffUser() {
@@ -163,6 +168,7 @@ class FrontendEditor {
         // Make element editable
         element.contentEditable = true;
         element.classList.add('editing-active');
+        element.oninput = () => this.scheduleAutosave();
         
         // Add rich text toolbar for content editing
         if (element.dataset.editable === 'content') {
@@ -179,8 +185,10 @@ class FrontendEditor {
     stopEditing() {
         if (!this.currentElement) return;
         
+        this.autosaveNow();
         this.currentElement.contentEditable = false;
         this.currentElement.classList.remove('editing-active');
+        this.currentElement.oninput = null;
         this.hideRichTextToolbar();
         this.currentElement = null;
         this.originalContent = null;
@@ -278,6 +286,11 @@ class FrontendEditor {
         const status = document.getElementById('edit-status');
         status.textContent = 'Saving...';
         
+        if (this.hasDraft || this.autosaveTimer) {
+            await this.publishDraft();
+            return;
+        }
+        
         try {
             const endpoint = contentType === 'title' || contentType === 'content' ? 
                 (this.isPost() ? `/blog/edit/post/${contentId}/` : `/blog/edit/page/${contentId}/`) :
@@ -287,21 +300,26 @@ class FrontendEditor {
                 throw new Error('Unknown content type');
             }
             
-            const response = await fetch(endpoint, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    [contentType]: newContent
-                })
-            });
+            // Send only a splice of the body when possible (see blog/editing.py)
+            let payload = await this.buildPayload(contentType, this.originalContent, newContent);
+            let { response, result } = await this.postChanges(endpoint, payload);
             
-            const result = await response.json();
+            if (response.status === 409 && result.reason === 'stale_base') {
+                // The stored HTML differs from what the browser rendered; send it whole
+                payload = this.fullPayload(contentType, newContent);
+                ({ response, result } = await this.postChanges(endpoint, payload));
+            }
+            
+            if (response.status === 409 && result.reason === 'conflict') {
+                this.showMessage('Someone else saved this since you opened it. Copy your changes and reload the page.', 'error');
+                status.textContent = 'Save conflict';
+                return;
+            }
             
             if (result.success) {
                 this.showMessage('Changes saved successfully!', 'success');
                 this.originalContent = newContent; // Update original content
+                document.body.dataset.contentVersion = result.version;
                 status.textContent = 'Saved successfully';
                 
                 // Update any slug if title changed
@@ -323,7 +341,165 @@ class FrontendEditor {
         }
     }
 
+    draftEndpoint(action = 'draft') {
+        const kind = this.isPost() ? 'post' : 'page';
+        return `/blog/edit/${kind}/${this.getContentId()}/${action}/`;
+    }
+
+    scheduleAutosave() {
+        clearTimeout(this.autosaveTimer);
+        this.autosaveTimer = setTimeout(() => this.autosaveNow(), this.autosaveDelay);
+    }
+
+    async autosaveNow() {
+        if (!this.autosaveTimer || !this.currentElement) return;
+        clearTimeout(this.autosaveTimer);
+        this.autosaveTimer = null;
+        
+        const field = this.currentElement.dataset.editable;
+        try {
+            const { result } = await this.postChanges(
+                this.draftEndpoint(), this.fullPayload(field, this.currentElement.innerHTML)
+            );
+            if (result.success) {
+                this.hasDraft = true;
+                document.getElementById('edit-status').textContent = 'Draft saved';
+            }
+        } catch (error) {
+            // The next keystroke retries; the edit is still on screen
+            console.error('Autosave error:', error);
+        }
+    }
+
+    async restoreDraft() {
+        if (!this.getContentId()) return;
+        try {
+            const response = await fetch(this.draftEndpoint());
+            const result = await response.json();
+            const fields = Object.keys(result.fields || {});
+            fields.forEach(field => {
+                const element = document.querySelector(`[data-editable="${field}"]`);
+                if (element) {
+                    element.innerHTML = result.fields[field];
+                }
+            });
+            if (fields.length) {
+                // Keep editing against the version the draft was started from,
+                // so publishing it still detects saves made since
+                document.body.dataset.contentVersion = result.version;
+                this.hasDraft = true;
+                this.showMessage('Showing your unpublished draft. Save to publish it, Cancel to discard it.', 'info');
+            }
+        } catch (error) {
+            console.error('Draft load error:', error);
+        }
+    }
+
+    async publishDraft() {
+        const status = document.getElementById('edit-status');
+        await this.autosaveNow();
+        try {
+            const { response, result } = await this.postChanges(this.draftEndpoint('publish'), {});
+            if (response.status === 409 && result.reason === 'conflict') {
+                this.showMessage('Someone else saved this since you started your draft. Your draft is kept; copy your changes and reload the page.', 'error');
+                status.textContent = 'Publish conflict';
+                return;
+            }
+            if (!result.success) {
+                throw new Error(result.message || 'Publish failed');
+            }
+            this.hasDraft = false;
+            if (this.currentElement) {
+                this.originalContent = this.currentElement.innerHTML;
+            }
+            document.body.dataset.contentVersion = result.version;
+            this.showMessage('Changes published!', 'success');
+            status.textContent = 'Published';
+        } catch (error) {
+            console.error('Publish error:', error);
+            this.showMessage(`Error publishing: ${error.message}`, 'error');
+            status.textContent = 'Publish failed';
+        }
+    }
+
+    async discardDraft() {
+        clearTimeout(this.autosaveTimer);
+        this.autosaveTimer = null;
+        this.hasDraft = false;
+        await fetch(this.draftEndpoint(), {
+            method: 'DELETE',
+            headers: { 'X-CSRFToken': this.csrfToken() }
+        });
+        // Drafts of other fields may be on screen; show the live version again
+        window.location.reload();
+    }
+
+    async postChanges(endpoint, payload) {
+        const response = await fetch(endpoint, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': this.csrfToken(),
+            },
+            body: JSON.stringify(payload)
+        });
+        return { response, result: await response.json() };
+    }
+
+    csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]*)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    fullPayload(field, value) {
+        return {
+            version: document.body.dataset.contentVersion,
+            fields: { [field]: value }
+        };
+    }
+
+    async buildPayload(field, base, value) {
+        // Titles are short; crypto.subtle only exists on secure origins
+        if (field !== 'content' || base === null || !(window.crypto && crypto.subtle)) {
+            return this.fullPayload(field, value);
+        }
+        
+        // One splice covering everything between the common prefix and suffix.
+        // String offsets are UTF-16 code units, which is what the server expects.
+        let start = 0;
+        const limit = Math.min(base.length, value.length);
+        while (start < limit && base[start] === value[start]) {
+            start++;
+        }
+        let suffix = 0;
+        while (suffix < limit - start &&
+               base[base.length - 1 - suffix] === value[value.length - 1 - suffix]) {
+            suffix++;
+        }
+        
+        return {
+            version: document.body.dataset.contentVersion,
+            patches: {
+                [field]: {
+                    base_hash: await this.sha256(base),
+                    ops: [[start, base.length - suffix, value.slice(start, value.length - suffix)]]
+                }
+            }
+        };
+    }
+
+    async sha256(text) {
+        const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+        return Array.from(new Uint8Array(digest))
+            .map(byte => byte.toString(16).padStart(2, '0'))
+            .join('');
+    }
+
     cancelEdit() {
+        if (this.hasDraft || this.autosaveTimer) {
+            this.discardDraft();
+            return;
+        }
         if (this.currentElement && this.originalContent !== null) {
             this.currentElement.innerHTML = this.originalContent;
             this.showMessage('Changes discarded', 'info');
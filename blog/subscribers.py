@@ -0,0 +1,276 @@
+# blog/subscribers.py
+
+"""
+Bulk export and import of subscribers.
+
+Exports stream: rows come from a server-side cursor (.iterator()) and are
+written out as they are read, so memory stays flat however long the list.
+Imports read CSV, a JSON array (as exported) or JSON Lines incrementally,
+validate rows a batch at a time and upsert each batch on `email` with one
+INSERT ... ON CONFLICT DO UPDATE. A million-row file is a thousand
+statements, with one batch in memory at a time. Addresses match existing
+subscribers regardless of case: a row for an address already stored with
+different capitals updates that subscriber under its stored spelling.
+
+The tech, life and spirit columns stand for the blog sections' categories:
+exported as an EXISTS on the subscription index, imported by adding and
+removing Subscription rows for each batch.
+
+Imported rows are written with bulk_create, so no signals fire and no
+welcome emails go out. `subscribed_at` is set on insert and never imported.
+A file without a confirmed_at column is taken as a list of confirmed
+addresses: new rows are confirmed as of the import (existing rows keep
+theirs), since nothing is sent until an address is confirmed.
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .dashboard import refresh_stats
+from .models import Category, SECTION_CATEGORIES, Subscriber, Subscription
+
+EXPORT_FIELDS = ('email', 'tech', 'life', 'spirit', 'is_active', 'subscribed_at', 'confirmed_at')
+IMPORT_FIELDS = ('email', 'tech', 'life', 'spirit', 'is_active', 'confirmed_at')
+BOOLEAN_FIELDS = ('tech', 'life', 'spirit', 'is_active')
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', 'off', ''}
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 50
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    category_ids = dict(Category.objects.filter(name__in=SECTION_CATEGORIES.values()).values_list('name', 'id'))
+    sections = {
+        section: Exists(Subscription.objects.filter(subscriber=OuterRef('pk'), category_id=category_ids[name]))
+        if name in category_ids else Value(False)
+        for section, name in SECTION_CATEGORIES.items()
+    }
+    return (
+        queryset.prefetch_related(None).order_by('id').annotate(**sections)
+        .values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def stream_csv(queryset):
+    """Yield the subscribers in `queryset` as CSV lines, header first."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in export_rows(queryset):
+        yield writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+
+
+def stream_json(queryset):
+    """Yield the subscribers in `queryset` as one JSON array, an object per line."""
+    yield '['
+    separator = '\n'
+    for row in export_rows(queryset):
+        yield separator + json.dumps(dict(zip(EXPORT_FIELDS, row)), default=lambda value: value.isoformat())
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def iter_csv(text_file):
+    yield from csv.DictReader(text_file)
+
+
+def iter_json(text_file, read_size=1 << 16):
+    """
+    Yield the objects of a JSON array, or of JSON Lines, without reading
+    the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+    while True:
+        # Skip whitespace and the array punctuation between objects
+        while position < len(buffer) and buffer[position] in ' \t\r\n,[]':
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = text_file.read(read_size), 0
+            eof = not buffer
+            continue
+        try:
+            obj, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError(f'Invalid JSON near: {buffer[position:position + 80]!r}')
+            chunk = text_file.read(read_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield obj
+        position = end
+
+
+def parse_boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else '').strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f'not a boolean: {value!r}')
+
+
+def clean_row(row):
+    """
+    Validate one import row.
+
+    Returns:
+        dict: Field values for the columns present in the row
+
+    Raises:
+        ValueError: with a message naming the problem
+    """
+    if not isinstance(row, dict):
+        raise ValueError('not an object')
+    email = str(row.get('email') or '').strip()
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError(f'invalid email {email!r}')
+
+    values = {'email': email}
+    for name in BOOLEAN_FIELDS:
+        if name in row:
+            values[name] = parse_boolean(row[name])
+    if row.get('confirmed_at'):
+        confirmed_at = parse_datetime(str(row['confirmed_at']))
+        if confirmed_at is None:
+            raise ValueError(f'invalid confirmed_at {row["confirmed_at"]!r}')
+        values['confirmed_at'] = confirmed_at
+    return values
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+
+
+def import_subscribers(rows, batch_size=1000, columns=None):
+    """
+    Upsert subscribers from an iterable of dicts, one batch at a time.
+
+    Args:
+        rows: Dicts with an 'email' key and any of IMPORT_FIELDS
+        batch_size: Rows validated and written per statement
+        columns: Fields to overwrite on existing subscribers (default: the
+            importable fields present in the first row); rows missing one
+            of them get the model default, or are unsubscribed from a
+            missing section
+
+    Returns:
+        ImportResult
+    """
+    result = ImportResult()
+    batch = {}
+    sections = None
+    section_categories = []
+    imported_at = timezone.now()
+
+    def update_subscriptions():
+        emails = [values['email'] for values in batch.values()]
+        ids = dict(Subscriber.objects.filter(email__in=emails).values_list('email', 'id'))
+        added = []
+        for section, category in section_categories:
+            removed = [ids[values['email']] for values in batch.values() if not values.get(section)]
+            Subscription.objects.filter(category=category, subscriber_id__in=removed).delete()
+            added += [
+                Subscription(subscriber_id=ids[values['email']], category=category)
+                for values in batch.values() if values.get(section)
+            ]
+        Subscription.objects.bulk_create(added, ignore_conflicts=True)
+
+    def flush():
+        if not batch:
+            return
+        # Write to existing subscribers under their stored spelling, so the
+        # upsert's conflict on email finds them; blog_subscriber_lower_idx
+        # serves the lookup
+        stored = dict(
+            Subscriber.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=list(batch))
+            .values_list('email_lower', 'email')
+        )
+        for key, values in batch.items():
+            values['email'] = stored.get(key, values['email'])
+        defaults = {} if 'confirmed_at' in columns else {'confirmed_at': imported_at}
+        subscribers = []
+        for values in batch.values():
+            fields = {name: value for name, value in values.items() if name not in SECTION_CATEGORIES}
+            subscribers.append(Subscriber(**{**defaults, **fields}))
+        Subscriber.objects.bulk_create(
+            subscribers,
+            update_conflicts=bool(columns),
+            ignore_conflicts=not columns,
+            unique_fields=['email'] if columns else None,
+            update_fields=columns or None,
+        )
+        if section_categories:
+            update_subscriptions()
+        result.imported += len(batch)
+        batch.clear()
+
+    for row in rows:
+        result.rows += 1
+        if columns is None and isinstance(row, dict):
+            columns = [name for name in IMPORT_FIELDS if name in row and name != 'email']
+        if sections is None and columns is not None:
+            sections = [name for name in columns if name in SECTION_CATEGORIES]
+            columns = [name for name in columns if name not in SECTION_CATEGORIES]
+            section_categories = list(zip(sections, Category.for_sections(sections)))
+        try:
+            values = clean_row(row)
+        except ValueError as e:
+            result.invalid += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(f'Row {result.rows}: {e}')
+            continue
+        # The same address twice in one statement is a conflict with itself
+        batch[values['email'].lower()] = values
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    refresh_stats('subscribers')
+    return result
+
+
+def import_file(binary_file, name, batch_size=1000):
+    """
+    Import an uploaded or opened file; the format follows the extension
+    (.csv, .json, .jsonl/.ndjson).
+
+    Returns:
+        ImportResult
+    """
+    text_file = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    if name.lower().endswith('.csv'):
+        rows = iter_csv(text_file)
+    elif name.lower().endswith(('.json', '.jsonl', '.ndjson')):
+        rows = iter_json(text_file)
+    else:
+        raise ValueError('Use a .csv, .json or .jsonl file')
+    try:
+        return import_subscribers(rows, batch_size=batch_size)
+    finally:
+        text_file.detach()
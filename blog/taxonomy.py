@@ -0,0 +1,86 @@
+# blog/taxonomy.py
+
+"""
+Denormalized post counts on Tag and Category, and the tag cloud.
+
+post_count holds the number of published posts carrying the tag or
+category. blog.signals refreshes the counts of just the terms touched by
+an m2m change or by a post being published, unpublished or deleted, each
+refresh being one correlated UPDATE. Listings and the tag cloud then read
+the counts straight from the small term tables. Refreshing tag counts
+bumps the 'tags' version stamp that listing ETags depend on.
+"""
+
+import math
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .caching import bump_versions
+from .cdn import purge
+from .models import Category, Post, Tag
+
+TAG_CLOUD_SIZE = 40
+TAG_CLOUD_WEIGHTS = 5
+
+TERM_MODELS = {
+    'tags': Tag,
+    'categories': Category,
+}
+
+
+def refresh_post_counts(model, ids=None):
+    """
+    Recompute post_count for some (or all) tags or categories.
+
+    Args:
+        model: Tag or Category
+        ids: Primary keys to refresh, or None for every row
+
+    Returns:
+        int: Number of rows updated
+    """
+    through = Post.tags.through if model is Tag else Post.categories.through
+    term_field = 'tag' if model is Tag else 'category'
+    published = (
+        through.objects.filter(**{term_field: OuterRef('pk')}, post__status='published')
+        .values(term_field)
+        .annotate(count=Count('post'))
+        .values('count')
+    )
+    rows = model.objects.all() if ids is None else model.objects.filter(pk__in=ids)
+    updated = rows.update(post_count=Coalesce(Subquery(published, output_field=IntegerField()), Value(0)))
+    if model is Tag:
+        # The tag cloud on every listing reads these counts
+        bump_versions('tags')
+        purge('tags')
+    return updated
+
+
+def refresh_post_terms(post_ids):
+    """Refresh the counts of every tag and category of the given posts."""
+    for relation, model in TERM_MODELS.items():
+        ids = set(
+            Post.objects.filter(id__in=post_ids, **{f'{relation}__isnull': False})
+            .values_list(relation, flat=True)
+        )
+        if ids:
+            refresh_post_counts(model, ids)
+
+
+def tag_cloud(size=TAG_CLOUD_SIZE):
+    """
+    The most used tags, alphabetically, each with a weight from 1 to
+    TAG_CLOUD_WEIGHTS on a log scale of its post count.
+
+    Returns:
+        list: Tag instances with a `weight` attribute
+    """
+    tags = list(Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')[:size])
+    if not tags:
+        return []
+    low, high = math.log(tags[-1].post_count), math.log(tags[0].post_count)
+    spread = (high - low) or 1
+    for tag in tags:
+        tag.weight = 1 + round((math.log(tag.post_count) - low) / spread * (TAG_CLOUD_WEIGHTS - 1))
+    return sorted(tags, key=lambda tag: tag.name.lower())
@@ -0,0 +1,11 @@
+from django import template
+
+from blog.dashboard import dashboard_context
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/blog/dashboard.html', takes_context=True)
+def site_dashboard(context):
+    """The stored dashboard figures, for the admin index"""
+    return {**dashboard_context(), 'csrf_token': context.get('csrf_token')}
@@ -1,3 +1,262 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import notifications
+from .models import (
+    Category, Comment, EditorDraft, NotificationDelivery, NotificationJob, Post, Revision, SearchDocument, Subscriber,
+    Subscription,
+)
+from .revisions import reconstruct
+from .search import search_ids
+from .subscribers import import_subscribers
+
+
+class AdminChangelistQueryTests(TestCase):
+    """The changelists run a fixed number of queries, however many rows they show"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.categories = [Category.objects.create(name=name, slug=name.lower()) for name in ('Tech', 'Life')]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_posts(self, count):
+        posts = Post.objects.bulk_create(
+            Post(title=f'Post {i}', slug=f'post-{i}', content='<p>Body</p>', status='published')
+            for i in range(Post.objects.count(), Post.objects.count() + count)
+        )
+        Post.categories.through.objects.bulk_create(
+            Post.categories.through(post_id=post.pk, category_id=self.categories[i % 2].pk)
+            for i, post in enumerate(posts)
+        )
+        return posts
+
+    def add_subscribers(self, count):
+        start = Subscriber.objects.count()
+        subscribers = Subscriber.objects.bulk_create(
+            Subscriber(email=f'reader{i}@example.com') for i in range(start, start + count)
+        )
+        Subscription.objects.bulk_create(
+            Subscription(subscriber=subscriber, category=category)
+            for subscriber in subscribers for category in self.categories
+        )
+
+    def assertChangelistQueries(self, url, add_rows, queries):
+        """The same query count at 5 rows and at 25"""
+        for rows in (5, 20):
+            add_rows(rows)
+            with self.assertNumQueries(queries):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_post_changelist(self):
+        self.assertChangelistQueries(reverse('admin:blog_post_changelist'), self.add_posts, 7)
+
+    def test_post_changelist_category_filter(self):
+        url = reverse('admin:blog_post_changelist') + f'?category={self.categories[0].pk}'
+        self.assertChangelistQueries(url, self.add_posts, 7)
+        response = self.client.get(url)
+        self.assertNotIn('DISTINCT', str(response.context['cl'].queryset.query))
+        self.assertEqual(response.context['cl'].result_count, 13)
+
+    def test_comment_changelist(self):
+        post = self.add_posts(1)[0]
+
+        def add_comments(count):
+            Comment.objects.bulk_create(
+                Comment(post=post, author_name='Reader', content='Nice', created_date=timezone.now())
+                for _ in range(count)
+            )
+
+        self.assertChangelistQueries(reverse('admin:blog_comment_changelist'), add_comments, 6)
+
+    def test_subscriber_changelist(self):
+        self.assertChangelistQueries(reverse('admin:blog_subscriber_changelist'), self.add_subscribers, 8)
+
+    def test_subscriber_changelist_category_filter(self):
+        url = reverse('admin:blog_subscriber_changelist') + f'?category={self.categories[1].pk}'
+        self.assertChangelistQueries(url, self.add_subscribers, 8)
+        self.assertNotIn('DISTINCT', str(self.client.get(url).context['cl'].queryset.query))
+
+
+class AdminSearchTests(TestCase):
+    """Admin searches go through the full-text index and keep every match"""
+
+    def test_more_than_a_thousand_matches(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        posts = Post.objects.bulk_create(
+            Post(title=f'Widget {i}', slug=f'widget-{i}', content='<p>Widgets</p>') for i in range(1001)
+        )
+        SearchDocument.objects.bulk_create(
+            SearchDocument(kind='post', object_id=post.pk, title=post.title, body='Widgets') for post in posts
+        )
+        self.assertEqual(len(search_ids('widget', 'post')), 1001)
+        self.client.force_login(user)
+        response = self.client.get(reverse('admin:blog_post_changelist'), {'q': 'widget'})
+        self.assertEqual(response.context['cl'].result_count, 1001)
+
+
+class SubscriberImportTests(TestCase):
+    """Imported addresses match existing subscribers regardless of case"""
+
+    def setUp(self):
+        self.tech = Category.objects.create(name='Tech', slug='tech')
+        self.subscriber = Subscriber.objects.create(
+            email='Foo@Example.com', is_active=False, confirmed_at=timezone.now()
+        )
+
+    def test_unsubscribed_address_stays_unsubscribed(self):
+        result = import_subscribers([{'email': 'foo@example.com'}, {'email': 'new@example.com'}])
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(
+            sorted(Subscriber.objects.values_list('email', 'is_active')),
+            [('Foo@Example.com', False), ('new@example.com', True)],
+        )
+
+    def test_updates_the_stored_spelling(self):
+        import_subscribers([{'email': 'FOO@example.com', 'tech': 'yes', 'is_active': 'yes'}])
+        subscriber = Subscriber.objects.get()
+        self.assertEqual(
+            (subscriber.pk, subscriber.email, subscriber.is_active), (self.subscriber.pk, 'Foo@Example.com', True)
+        )
+        self.assertEqual(list(subscriber.categories.all()), [self.tech])
+
+
+class RevisionBaselineTests(TestCase):
+    """The first tracked save of an existing post keeps its original content"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(title='Original', slug='original', content='<p>First draft</p>')
+
+    def assertBaseline(self, source):
+        revisions = list(Revision.objects.filter(kind='post', object_id=self.post.pk).order_by('number'))
+        self.assertEqual([(r.number, r.source) for r in revisions], [(1, ''), (2, source)])
+        self.assertEqual(reconstruct('post', self.post.pk, 1)['content'], '<p>First draft</p>')
+        self.assertEqual(reconstruct('post', self.post.pk, 2)['content'], '<p>Second draft</p>')
+
+    def test_editor_save(self):
+        response = self.client.post(
+            reverse('blog:edit_post_content', args=[self.post.pk]),
+            json.dumps({'fields': {'content': '<p>Second draft</p>'}}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertBaseline('editor')
+
+    def test_admin_save(self):
+        response = self.client.post(reverse('admin:blog_post_change', args=[self.post.pk]), {
+            'title': 'Original', 'slug': 'original', 'content': '<p>Second draft</p>', 'status': 'draft',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertBaseline('admin')
+
+
+class FrontendEditorTests(TestCase):
+    """Requests the frontend editor endpoints reject"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.post = Post.objects.create(
+            title='Original', slug='original', content='<p>First draft</p>',
+            status='published', published_date=timezone.now(),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post_json(self, url, body):
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+    def test_save_rejects_non_object_fields(self):
+        url = reverse('blog:edit_post_content', args=[self.post.pk])
+        for body in ({'fields': ['title']}, {'patches': []}):
+            response = self.post_json(url, body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['reason'], 'invalid')
+
+    def test_autosave_needs_an_existing_object(self):
+        response = self.post_json(
+            reverse('blog:editor_draft', args=['post', self.post.pk + 1]),
+            {'version': 'v1', 'fields': {'title': 'Draft'}},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(EditorDraft.objects.exists())
+
+    def test_draft_endpoints_need_the_csrf_token(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.user)
+        draft_url = reverse('blog:editor_draft', args=['post', self.post.pk])
+        publish_url = reverse('blog:publish_editor_draft', args=['post', self.post.pk])
+        body = {'version': 'v1', 'fields': {'title': 'Draft'}}
+        self.assertEqual(self.post_json(draft_url, body).status_code, 403)
+        self.assertEqual(self.post_json(publish_url, {}).status_code, 403)
+        self.assertEqual(self.client.delete(draft_url).status_code, 403)
+
+        # The post page sets the cookie the editor sends back
+        self.assertEqual(self.client.get(self.post.get_absolute_url()).status_code, 200)
+        token = self.client.cookies['csrftoken'].value
+        response = self.client.post(
+            draft_url, json.dumps(body), content_type='application/json', headers={'X-CSRFToken': token}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', NOTIFICATION_MAX_ATTEMPTS=3)
+class NotificationWorkerTests(TestCase):
+    """Claiming, finishing and giving up on notification jobs"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Tech', slug='tech')
+        self.post = Post.objects.create(title='New', slug='new', content='<p>Body</p>')
+        self.post.categories.add(category)
+        subscriber = Subscriber.objects.create(email='reader@example.com', confirmed_at=timezone.now())
+        Subscription.objects.create(subscriber=subscriber, category=category)
+        self.job = NotificationJob.objects.create(post=self.post)
+
+    def test_cancel_during_last_batch(self):
+        send_batch = notifications.send_batch
+
+        def cancel_while_sending(job, *args):
+            notifications.cancel_jobs([job])
+            return send_batch(job, *args)
+
+        # Cancelled after the worker last checked, so it runs to the end
+        with mock.patch.object(notifications, 'send_batch', cancel_while_sending), \
+                mock.patch.object(notifications, 'is_cancelled', return_value=False):
+            job = notifications.run_job(notifications.claim_job())
+        self.assertEqual(job.status, 'cancelled')
+        self.assertEqual(NotificationJob.objects.get(pk=self.job.pk).status, 'cancelled')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_crashing_job_fails_after_max_attempts(self):
+        NotificationDelivery.objects.create(job=self.job, email='reader@example.com')
+        with mock.patch.object(notifications, 'run_job', side_effect=RuntimeError('boom')), \
+                self.assertLogs('blog.notifications', 'ERROR') as logs:
+            for attempt in range(1, 4):
+                self.assertEqual(notifications.run_pending_jobs(), 1)
+                self.assertEqual(NotificationJob.objects.get(pk=self.job.pk).attempts, attempt)
+                # The worker went quiet long enough for the job to be taken over
+                NotificationJob.objects.filter(pk=self.job.pk).update(
+                    heartbeat_at=timezone.now() - timedelta(days=1)
+                )
+            self.assertEqual(notifications.run_pending_jobs(), 0)
+        self.assertIn(f'Notification job {self.job.pk} failed after 3 attempts', logs.output[-1])
+        job = NotificationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertEqual(notifications.retry_failed([job]), 0)
+        job = NotificationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.attempts), ('queued', 0))
@@ -2,23 +2,43 @@
 
 from django.urls import path
 from .views import (
-    PostDetailView, PageDetailView, BlogSectionView,
-    subscribe_view, subscribe_success_view, unsubscribe_view, unsubscribe_success_view,
-    edit_post_content, edit_page_content, coaching_inquiry
+    PostDetailView, PageDetailView, BlogSectionView, ArchiveMonthView, TagPostsView, CategoryPostsView,
+    search_view, subscribe_view, subscribe_pending_view, subscribe_confirm_view, subscribe_success_view,
+    unsubscribe_view, unsubscribe_token_view, unsubscribe_success_view,
+    edit_post_content, edit_page_content, editor_draft, publish_editor_draft, refresh_dashboard, coaching_inquiry
 )
+from .feeds import feed_view
 
 app_name = 'blog'
 
 urlpatterns = [
     path('post/<slug:slug>/', PostDetailView.as_view(), name='post_detail'),
     path('page/<slug:slug>/', PageDetailView.as_view(), name='page_detail'),
+    path('search/', search_view, name='search'),
     path('subscribe/', subscribe_view, name='subscribe'),
+    path('subscribe/pending/', subscribe_pending_view, name='subscribe_pending'),
+    path('subscribe/confirm/<str:token>/', subscribe_confirm_view, name='subscribe_confirm'),
     path('subscribe/success/', subscribe_success_view, name='subscribe_success'),
     path('unsubscribe/', unsubscribe_view, name='unsubscribe'),
     path('unsubscribe/success/', unsubscribe_success_view, name='unsubscribe_success'),
+    path('unsubscribe/<str:token>/', unsubscribe_token_view, name='unsubscribe_token'),
     path('coaching-inquiry/', coaching_inquiry, name='coaching_inquiry'),
     # Frontend editing endpoints
     path('edit/post/<int:post_id>/', edit_post_content, name='edit_post_content'),
     path('edit/page/<int:page_id>/', edit_page_content, name='edit_page_content'),
+    path('edit/<str:kind>/<int:object_id>/draft/', editor_draft, name='editor_draft'),
+    path('edit/<str:kind>/<int:object_id>/publish/', publish_editor_draft, name='publish_editor_draft'),
+    path('dashboard/refresh/', refresh_dashboard, name='refresh_dashboard'),
+    # Tag and category listings
+    path('tag/<slug:slug>/', TagPostsView.as_view(), name='tag_posts'),
+    path('category/<slug:slug>/', CategoryPostsView.as_view(), name='category_posts'),
+    # Monthly archives (site-wide and per section)
+    path('<int:year>/<int:month>/', ArchiveMonthView.as_view(), name='archive_month'),
+    path('<str:section>/<int:year>/<int:month>/', ArchiveMonthView.as_view(), name='section_archive_month'),
+    # Feeds (site-wide and per section)
+    path('feed/', feed_view, {'feed_format': 'rss'}, name='feed_rss'),
+    path('feed/atom/', feed_view, {'feed_format': 'atom'}, name='feed_atom'),
+    path('<str:section>/feed/', feed_view, {'feed_format': 'rss'}, name='section_feed_rss'),
+    path('<str:section>/feed/atom/', feed_view, {'feed_format': 'atom'}, name='section_feed_atom'),
     path('<str:section>/', BlogSectionView.as_view(), name='blog_section'),
 ]
\ No newline at end of file
@@ -2,7 +2,12 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
+from django.urls import reverse
+from django.utils.html import strip_tags
+from .unsubscribe import list_unsubscribe_headers, unsubscribe_url
+from html import unescape
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -22,15 +27,19 @@ def send_subscription_notification(request, subscriber):
         current_site = get_current_site(request)
         domain = current_site.domain
         
+        from .models import SECTION_CATEGORIES
+        categories = list(subscriber.categories.order_by('name'))
+        
         # Email context
         context = {
             'subscriber': subscriber,
             'domain': domain,
+            'categories': categories,
+            'section_total': len(SECTION_CATEGORIES),
         }
         
         # Email subject
-        categories = subscriber.subscribed_categories
-        category_text = ', '.join([cat.title() for cat in categories])
+        category_text = ', '.join([cat.name for cat in categories])
         subject = f'🎉 New Blog Subscription: {subscriber.email} ({category_text})'
         
         # Recipient email
@@ -111,7 +120,7 @@ Greg Dyche
 {domain}
 
 ---
-To manage your subscription or unsubscribe, visit: https://{domain}/blog/unsubscribe/
+To unsubscribe, visit: {unsubscribe_url(subscriber, domain)}
 """
         
         # Create email message
@@ -119,7 +128,8 @@ To manage your subscription or unsubscribe, visit: https://{domain}/blog/unsubsc
             subject=subject,
             body=text_content,
             from_email=from_email,
-            to=[to_email]
+            to=[to_email],
+            headers=list_unsubscribe_headers(subscriber, domain),
         )
         
         # Send email
@@ -132,124 +142,112 @@ To manage your subscription or unsubscribe, visit: https://{domain}/blog/unsubsc
         logger.error(f'Failed to send welcome email to {subscriber.email}: {str(e)}')
         return False
 
-def send_post_notifications(request, post):
+def send_confirmation_email(request, subscriber):
     """
-    Send email notifications to subscribers when a new post is published.
+    Send the double opt-in link to a new subscriber.
     
     Args:
-        request: The HTTP request object (for getting domain)
-        post: The Post model instance that was published
+        request: The HTTP request object
+        subscriber: The Subscriber model instance, with a confirmation_token
     
     Returns:
-        dict: Results of email sending (success_count, failure_count, errors)
+        bool: True if email sent successfully, False otherwise
     """
     try:
-        # Import here to avoid circular imports
-        from .models import Subscriber
+        domain = get_current_site(request).domain
+        confirm_url = f"https://{domain}{reverse('blog:subscribe_confirm', args=[subscriber.confirmation_token])}"
         
-        # Get current site domain
-        current_site = get_current_site(request)
-        domain = current_site.domain
-        
-        # Get post categories
-        post_categories = post.categories.all()
-        if not post_categories:
-            logger.info(f'Post "{post.title}" has no categories, skipping notifications')
-            return {'success_count': 0, 'failure_count': 0, 'errors': []}
-        
-        # Find relevant subscribers based on post categories
-        relevant_subscribers = Subscriber.objects.filter(is_active=True)
-        
-        # Filter subscribers who are interested in at least one of the post's categories
-        category_filters = []
-        for category in post_categories:
-            if category.name.lower() == 'tech':
-                category_filters.append('tech')
-            elif category.name.lower() == 'life':
-                category_filters.append('life')
-            elif category.name.lower() == 'spirit':
-                category_filters.append('spirit')
-        
-        if not category_filters:
-            logger.info(f'Post "{post.title}" categories do not match subscription categories')
-            return {'success_count': 0, 'failure_count': 0, 'errors': []}
-        
-        # Build Q objects for filtering
-        from django.db.models import Q
-        filter_q = Q()
-        for cat_filter in category_filters:
-            filter_q |= Q(**{cat_filter: True})
-        
-        relevant_subscribers = relevant_subscribers.filter(filter_q)
-        
-        if not relevant_subscribers.exists():
-            logger.info(f'No subscribers found for post "{post.title}" categories')
-            return {'success_count': 0, 'failure_count': 0, 'errors': []}
-        
-        # Email subject
-        category_names = [cat.name for cat in post_categories]
-        subject = f'📝 New {"/".join(category_names)} Post: {post.title}'
+        text_content = f"""
+Hi there!
+
+Please confirm that you'd like to receive Well Scripted Life updates for: {', '.join([cat.title() for cat in subscriber.subscribed_categories])}
+
+Confirm your subscription:
+{confirm_url}
+
+If you didn't sign up, ignore this email and you won't hear from us again.
+
+Best regards,
+Greg Dyche
+{domain}
+"""
         
-        # From email
-        from_email = settings.DEFAULT_FROM_EMAIL
+        msg = EmailMultiAlternatives(
+            subject='Please confirm your Well Scripted Life subscription',
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[subscriber.email]
+        )
+        msg.send()
         
-        success_count = 0
-        failure_count = 0
-        errors = []
-        
-        # Send emails to relevant subscribers
-        for subscriber in relevant_subscribers:
-            try:
-                # Email context for this subscriber
-                context = {
-                    'post': post,
-                    'subscriber': subscriber,
-                    'domain': domain,
-                }
-                
-                # Render email templates
-                text_content = render_to_string(
-                    'blog/emails/new_post_notification.txt', 
-                    context
-                )
-                html_content = render_to_string(
-                    'blog/emails/new_post_notification.html', 
-                    context
-                )
-                
-                # Create email message
-                msg = EmailMultiAlternatives(
-                    subject=subject,
-                    body=text_content,
-                    from_email=from_email,
-                    to=[subscriber.email]
-                )
-                msg.attach_alternative(html_content, "text/html")
-                
-                # Send email
-                msg.send()
-                success_count += 1
-                
-                logger.info(f'Post notification sent successfully to {subscriber.email} for post "{post.title}"')
-                
-            except Exception as e:
-                failure_count += 1
-                error_msg = f'Failed to send post notification to {subscriber.email}: {str(e)}'
-                logger.error(error_msg)
-                errors.append(error_msg)
-        
-        logger.info(f'Post notifications completed for "{post.title}": {success_count} sent, {failure_count} failed')
-        
-        return {
-            'success_count': success_count,
-            'failure_count': failure_count,
-            'errors': errors
-        }
+        logger.info(f'Confirmation email sent successfully to {subscriber.email}')
+        return True
         
     except Exception as e:
-        logger.error(f'Failed to send post notifications for "{post.title}": {str(e)}')
-        return {
-            'success_count': 0,
-            'failure_count': 0,
-            'errors': [str(e)]
-        }
\ No newline at end of file
+        logger.error(f'Failed to send confirmation email to {subscriber.email}: {str(e)}')
+        return False
+
+def post_notification_recipients(post):
+    """
+    Find the confirmed, active subscribers interested in a post's categories.
+    
+    Args:
+        post: The Post model instance
+    
+    Returns:
+        tuple: (list of the post's categories, Subscriber QuerySet of those
+        following any of them)
+    """
+    from .models import Subscriber, Subscription
+    
+    post_categories = list(post.categories.all())
+    if not post_categories:
+        return post_categories, Subscriber.objects.none()
+    # A semi-join on the (category, subscriber) index: reads only the
+    # matching subscriptions, and a subscriber in several categories once
+    followers = Subscription.objects.filter(category__in=post_categories).values('subscriber_id')
+    return post_categories, Subscriber.objects.filter(
+        id__in=followers, is_active=True, confirmed_at__isnull=False
+    ).order_by()
+
+def build_post_notification(post, post_categories, subscriber, domain):
+    """
+    Render the new-post email for one subscriber.
+    
+    Returns:
+        EmailMultiAlternatives: Ready to send
+    """
+    category_names = [cat.name for cat in post_categories]
+    subject = f'📝 New {"/".join(category_names)} Post: {post.title}'
+    followed = {category.pk for category in subscriber.categories.all()}
+    context = {
+        'post': post,
+        'subscriber': subscriber,
+        'domain': domain,
+        # The post's categories that brought it to this subscriber
+        'matched_categories': [cat for cat in post_categories if cat.pk in followed],
+        'unsubscribe_url': unsubscribe_url(subscriber, domain),
+    }
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=render_to_string('blog/emails/new_post_notification.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[subscriber.email],
+        headers=list_unsubscribe_headers(subscriber, domain),
+    )
+    msg.attach_alternative(render_to_string('blog/emails/new_post_notification.html', context), "text/html")
+    return msg
+
+def html_to_text(html):
+    """
+    Convert rich-text HTML to whitespace-normalized plain text.
+
+    Args:
+        html: HTML string from a RichTextField
+
+    Returns:
+        str: Text with tags stripped and entities unescaped
+    """
+    # Keep words in adjacent block elements apart once the tags are gone
+    html = re.sub(r'<(br|/p|/div|/li|/h[1-6]|/tr|/blockquote)\b[^>]*>', ' ', html or '', flags=re.I)
+    return ' '.join(unescape(strip_tags(html)).split())
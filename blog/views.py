@@ -2,26 +2,71 @@
 
 from django.views.generic import DetailView, ListView
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.contrib.auth.decorators import user_passes_test
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-import json
-from .models import Post, Page, Category, Subscriber
+from django.utils.decorators import method_decorator
+from datetime import date
+from .models import Post, PostNavigation, Page, Category, Tag, Subscriber, RelatedPost, SECTION_CATEGORIES
+from .archives import archive_months, month_range
+from . import editing
+from .dashboard import refresh_stats
+from .caching import conditional_view, post_detail_probe, page_detail_probe, section_probe
+from .pagination import approximate_count, keyset_page
 from .forms import SubscriptionForm, CoachingInquiryForm, ContactPageInquiryForm
-from .utils import send_subscription_notification, send_welcome_email
+from .search import cached_search_results, MAX_QUERY_LENGTH
+from .taxonomy import tag_cloud
+from .unsubscribe import read_token, unsubscribe
+from .utils import send_confirmation_email, send_subscription_notification, send_welcome_email
 
+@method_decorator(conditional_view(post_detail_probe), name='dispatch')
 class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
-    queryset = Post.objects.filter(status='published')
+    # Stored previous/next links come with the post (see blog.navigation)
+    queryset = Post.objects.filter(status='published').select_related('navigation')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['post_navigation'] = self.get_navigation()
+        # Precomputed by blog.related; one indexed query joined to the targets
+        entries = RelatedPost.objects.filter(
+            post=self.object, related__status='published'
+        ).select_related('related').defer('related__content').order_by('rank')
+        context['related_posts'] = [entry.related for entry in entries]
+        return context
+    
+    def get_navigation(self):
+        """Previous/next rows for the template, site-wide first, then per section"""
+        try:
+            links = self.object.navigation.links
+        except PostNavigation.DoesNotExist:
+            return []
+        rows = []
+        for scope, label in [('all', 'All posts'), *SECTION_CATEGORIES.items()]:
+            if scope not in links:
+                continue
+            row = {'label': label}
+            for direction in ('previous', 'next'):
+                link = links[scope][direction]
+                if link:
+                    row[direction] = {
+                        'title': link['title'],
+                        'url': reverse('blog:post_detail', kwargs={'slug': link['slug']}),
+                    }
+            rows.append(row)
+        return rows
 
+@method_decorator(conditional_view(page_detail_probe), name='dispatch')
 class PageDetailView(DetailView):
     model = Page
     template_name = 'blog/page_detail.html'
     queryset = Page.objects.filter(is_published=True)
 
+@method_decorator(conditional_view(section_probe), name='dispatch')
 class BlogSectionView(ListView):
     model = Post
     template_name = 'blog/blog_section.html'
@@ -30,17 +75,25 @@ class BlogSectionView(ListView):
     
     def get_queryset(self):
         section = self.kwargs.get('section')
-        queryset = Post.objects.filter(status='published')
+        queryset = Post.objects.filter(status='published', published_date__isnull=False)
         
-        # Filter by section based on categories
-        if section == 'tech':
-            queryset = queryset.filter(categories__name='Tech').distinct()
-        elif section == 'life':
-            queryset = queryset.filter(categories__name='Life').distinct()
-        elif section == 'spirit':
-            queryset = queryset.filter(categories__name='Spirit').distinct()
+        # Filter by section based on categories (names are unique, so no DISTINCT needed)
+        if section in SECTION_CATEGORIES:
+            queryset = queryset.filter(categories__name=SECTION_CATEGORIES[section])
         
-        return queryset.order_by('-published_date')
+        # Cards only need the stored excerpt, never the full HTML body
+        return queryset.defer('content', 'plain_text').prefetch_related('categories')
+    
+    def paginate_queryset(self, queryset, page_size):
+        """Keyset pagination on (published_date, id) via ?after= / ?before= cursors"""
+        page = keyset_page(
+            queryset, page_size,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        if page is None:
+            raise Http404('Invalid page cursor')
+        return None, page, page.object_list, page.has_other_pages()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -66,7 +119,85 @@ class BlogSectionView(ListView):
         
         context['section'] = section
         context['section_info'] = section_info.get(section, {})
+        context['archive_section'] = section if section in SECTION_CATEGORIES else None
+        context['archive_months'] = archive_months(context['archive_section'])
+        context['tag_cloud'] = tag_cloud()
+        context['post_count'] = self.get_post_count(context)
+        return context
+    
+    def get_post_count(self, context):
+        return approximate_count(f'section:{self.kwargs.get("section")}', self.get_queryset())
+
+class ArchiveMonthView(BlogSectionView):
+    """Posts published in one month, site-wide or within one section"""
+    
+    def get_queryset(self):
+        section = self.kwargs.get('section')
+        year, month = self.kwargs['year'], self.kwargs['month']
+        if (section is not None and section not in SECTION_CATEGORIES) or not 1 <= month <= 12 or not 1 <= year <= 9998:
+            raise Http404('No such archive')
+        start, end = month_range(year, month)
+        return super().get_queryset().filter(published_date__gte=start, published_date__lt=end)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['archive_date'] = date(self.kwargs['year'], self.kwargs['month'], 1)
         return context
+    
+    def get_post_count(self, context):
+        # Exact, and already loaded for the archive navigation
+        key = (self.kwargs['year'], self.kwargs['month'])
+        return next((m.post_count for m in context['archive_months'] if (m.year, m.month) == key), 0)
+
+class TermPostsView(BlogSectionView):
+    """Published posts carrying one tag or filed in one category"""
+    term_model = None
+    relation = None
+    title_prefix = ''
+    
+    def get_term(self):
+        if not hasattr(self, 'term'):
+            self.term = get_object_or_404(self.term_model, slug=self.kwargs['slug'])
+        return self.term
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(**{self.relation: self.get_term()})
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        term = self.get_term()
+        context['term'] = term
+        context['section_info'] = {
+            'title': f'{self.title_prefix}{term.name}',
+            'description': getattr(term, 'description', ''),
+        }
+        return context
+    
+    def get_post_count(self, context):
+        # Denormalized by blog.taxonomy
+        return self.get_term().post_count
+
+class TagPostsView(TermPostsView):
+    term_model = Tag
+    relation = 'tags'
+    title_prefix = 'Tagged: '
+
+class CategoryPostsView(TermPostsView):
+    term_model = Category
+    relation = 'categories'
+    title_prefix = ''
+
+def search_view(request):
+    """Ranked full-text search over published posts and pages"""
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    after = request.GET.get('after')
+    data = cached_search_results(query, after=after) if query else {'results': [], 'next_cursor': None}
+    return render(request, 'blog/search.html', {
+        'query': query,
+        'after': after,
+        'results': data['results'],
+        'next_cursor': data['next_cursor'],
+    })
 
 def subscribe_view(request):
     """Handle blog subscription form submission"""
@@ -76,29 +207,21 @@ def subscribe_view(request):
             try:
                 subscriber = form.save()
                 
-                # Send notification email to admin
-                notification_sent = send_subscription_notification(request, subscriber)
-                
-                # Send welcome email to subscriber (optional)
-                welcome_sent = send_welcome_email(request, subscriber)
-                
-                # Log email status (for debugging)
-                if not notification_sent:
-                    print(f"Warning: Failed to send notification email for {subscriber.email}")
-                if not welcome_sent:
-                    print(f"Warning: Failed to send welcome email to {subscriber.email}")
+                # Double opt-in: nothing is sent to the address until it confirms
+                if not send_confirmation_email(request, subscriber):
+                    print(f"Warning: Failed to send confirmation email to {subscriber.email}")
                 
                 messages.success(
                     request, 
-                    f'Thank you for subscribing! You\'ll receive notifications for {", ".join([cat.title() for cat in subscriber.subscribed_categories])} blog posts.'
+                    f'Almost done! Check {subscriber.email} for a link to confirm your subscription.'
                 )
                 # If it's an AJAX request, return JSON response
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return JsonResponse({
                         'success': True, 
-                        'message': 'Successfully subscribed!'
+                        'message': 'Check your email to confirm your subscription.'
                     })
-                return redirect('blog:subscribe_success')
+                return redirect('blog:subscribe_pending')
             except Exception as e:
                 messages.error(request, 'An error occurred. Please try again.')
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -119,6 +242,44 @@ def subscribe_view(request):
     
     return render(request, 'blog/subscribe.html', {'form': form})
 
+def subscribe_pending_view(request):
+    """Page asking the new subscriber to confirm by email"""
+    return render(request, 'blog/subscribe_pending.html')
+
+def subscribe_confirm_view(request, token):
+    """
+    Confirm a subscription from the emailed link. GET shows a confirm
+    button and POST confirms, so link scanners that fetch every URL in a
+    message can't confirm on the reader's behalf.
+    """
+    # Indexed lookup on confirmation_token
+    subscriber = Subscriber.objects.filter(confirmation_token=token).first() if token else None
+    if subscriber is None:
+        return render(request, 'blog/subscribe_confirm.html', {'invalid': True}, status=404)
+    
+    if request.method == 'POST':
+        subscriber.confirm()
+        
+        # Send notification email to admin
+        notification_sent = send_subscription_notification(request, subscriber)
+        
+        # Send welcome email to subscriber (optional)
+        welcome_sent = send_welcome_email(request, subscriber)
+        
+        # Log email status (for debugging)
+        if not notification_sent:
+            print(f"Warning: Failed to send notification email for {subscriber.email}")
+        if not welcome_sent:
+            print(f"Warning: Failed to send welcome email to {subscriber.email}")
+        
+        messages.success(
+            request, 
+            f'Thank you for subscribing! You\'ll receive notifications for {", ".join([cat.title() for cat in subscriber.subscribed_categories])} blog posts.'
+        )
+        return redirect('blog:subscribe_success')
+    
+    return render(request, 'blog/subscribe_confirm.html', {'subscriber': subscriber})
+
 def subscribe_success_view(request):
     """Thank you page after successful subscription"""
     return render(request, 'blog/subscribe_success.html')
@@ -128,19 +289,37 @@ def unsubscribe_view(request, email=None):
     if request.method == 'POST':
         email = request.POST.get('email')
         if email:
-            try:
-                subscriber = Subscriber.objects.get(email=email, is_active=True)
-                subscriber.is_active = False
-                subscriber.save()
+            # One UPDATE on the unique email index
+            if Subscriber.objects.filter(email=email, is_active=True).update(is_active=False):
                 messages.success(request, 'You have been successfully unsubscribed.')
                 return redirect('blog:unsubscribe_success')
-            except Subscriber.DoesNotExist:
-                messages.error(request, 'Email address not found in our subscription list.')
+            messages.error(request, 'Email address not found in our subscription list.')
         else:
             messages.error(request, 'Please provide a valid email address.')
     
     return render(request, 'blog/unsubscribe.html')
 
+@csrf_exempt
+def unsubscribe_token_view(request, token):
+    """
+    Signed unsubscribe link from an email (see blog.unsubscribe).
+    
+    GET shows a one-button confirmation, so link scanners don't unsubscribe
+    anyone. POST unsubscribes, whether from that button or from a mail
+    client's RFC 8058 one-click request (which carries no CSRF token).
+    """
+    subscriber_id = read_token(token)
+    if subscriber_id is None:
+        return render(request, 'blog/unsubscribe.html', {'invalid_link': True}, status=404)
+    
+    if request.method == 'POST':
+        unsubscribe(subscriber_id)
+        if request.POST.get('List-Unsubscribe') == 'One-Click':
+            return HttpResponse('Unsubscribed', content_type='text/plain')
+        return redirect('blog:unsubscribe_success')
+    
+    return render(request, 'blog/unsubscribe.html', {'token': token})
+
 def unsubscribe_success_view(request):
     """Confirmation page after successful unsubscription"""
     return render(request, 'blog/unsubscribe_success.html')
@@ -154,55 +333,42 @@ def is_staff_user(user):
 @require_POST
 @csrf_exempt
 def edit_post_content(request, post_id):
-    """AJAX endpoint to update post content"""
-    try:
-        post = get_object_or_404(Post, id=post_id)
-        data = json.loads(request.body)
-        
-        if 'title' in data:
-            post.title = data['title']
-        if 'content' in data:
-            post.content = data['content']
-        if 'excerpt' in data:
-            post.excerpt = data['excerpt']
-            
-        post.save()
-        
-        return JsonResponse({
-            'success': True,
-            'message': 'Post updated successfully'
-        })
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'message': str(e)
-        }, status=400)
+    """AJAX endpoint to update post content (delta protocol, see blog.editing)"""
+    return editing.apply_edit(Post, post_id, request.body, editing.EDITABLE['post'][1], request.user)
 
 @user_passes_test(is_staff_user)
 @require_POST  
 @csrf_exempt
 def edit_page_content(request, page_id):
-    """AJAX endpoint to update page content"""
-    try:
-        page = get_object_or_404(Page, id=page_id)
-        data = json.loads(request.body)
-        
-        if 'title' in data:
-            page.title = data['title']
-        if 'content' in data:
-            page.content = data['content']
-            
-        page.save()
-        
-        return JsonResponse({
-            'success': True,
-            'message': 'Page updated successfully'
-        })
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'message': str(e)
-        }, status=400)
+    """AJAX endpoint to update page content (delta protocol, see blog.editing)"""
+    return editing.apply_edit(Page, page_id, request.body, editing.EDITABLE['page'][1], request.user)
+
+@user_passes_test(is_staff_user)
+def editor_draft(request, kind, object_id):
+    """AJAX endpoint for the editor's autosave draft: GET loads, POST saves, DELETE discards"""
+    if kind not in editing.EDITABLE:
+        raise Http404
+    if request.method == 'POST':
+        return editing.autosave(kind, object_id, request.user, request.body)
+    if request.method == 'DELETE':
+        return editing.discard_draft(kind, object_id, request.user)
+    return editing.load_draft(kind, object_id, request.user)
+
+@user_passes_test(is_staff_user)
+@require_POST
+def refresh_dashboard(request):
+    """Recompute the admin dashboard figures now"""
+    refresh_stats()
+    messages.success(request, 'Dashboard figures refreshed.')
+    return redirect('admin:index')
+
+@user_passes_test(is_staff_user)
+@require_POST
+def publish_editor_draft(request, kind, object_id):
+    """AJAX endpoint merging the user's draft into the live post or page"""
+    if kind not in editing.EDITABLE:
+        raise Http404
+    return editing.publish_draft(kind, object_id, request.user)
 
 
 def coaching_inquiry(request):
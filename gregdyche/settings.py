@@ -90,6 +90,10 @@ MIDDLEWARE = [
     # WhiteNoise serves static files efficiently in production.
     # It should be placed directly after SecurityMiddleware.
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Sitemap files are generated at runtime and served the same way.
+    'blog.middleware.SitemapMiddleware',
+    # Old WordPress URLs are answered from an in-memory map before any DB work.
+    'blog.middleware.LegacyRedirectMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -164,6 +168,59 @@ MEDIA_URL = '/media/'
 # Note: This is not suitable for production on ephemeral filesystems like Railway.
 # Consider using a service like AWS S3 for production media storage.
 MEDIA_ROOT = BASE_DIR / 'media'
+# When DEBUG is off, serve MEDIA_ROOT through blog.media.serve_media
+# (sendfile, ETag/Last-Modified, byte ranges, precompressed .br/.gz variants).
+SERVE_MEDIA = config('SERVE_MEDIA', default=True, cast=bool)
+# Browser cache lifetime for uploaded media, in seconds (default 30 days).
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=60 * 60 * 24 * 30, cast=int)
+
+
+# --- Sitemaps ---
+
+# Directory the sharded sitemap files are written to (rebuilt on deploy by
+# `manage.py build_sitemaps`, then kept up to date on save).
+SITEMAP_ROOT = config('SITEMAP_ROOT', default=str(BASE_DIR / 'sitemaps'))
+# Objects per sitemap shard, by primary key range (the protocol allows 50,000).
+SITEMAP_SHARD_SIZE = config('SITEMAP_SHARD_SIZE', default=10000, cast=int)
+# Cache lifetime of sitemap responses, in seconds.
+SITEMAP_MAX_AGE = config('SITEMAP_MAX_AGE', default=3600, cast=int)
+
+
+# --- Search ---
+
+# Seconds a public search results page stays cached.
+SEARCH_CACHE_TIMEOUT = config('SEARCH_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds the approximate post count on section listings stays cached.
+SECTION_COUNT_CACHE_TIMEOUT = config('SECTION_COUNT_CACHE_TIMEOUT', default=600, cast=int)
+
+# --- Admin ---
+
+# Seconds between refreshes of the admin dashboard's subscriber figures (done by the notification worker).
+DASHBOARD_REFRESH_INTERVAL = config('DASHBOARD_REFRESH_INTERVAL', default=900, cast=int)
+
+# Unfiltered admin changelists over bigger tables show an estimated total (PostgreSQL only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+
+# --- Conditional Responses ---
+
+# Mixed into page ETags so a deploy (new templates) invalidates cached copies.
+CONTENT_ETAG_SALT = config('RAILWAY_GIT_COMMIT_SHA', default='')
+
+# --- Legacy Redirects ---
+
+# How often (seconds) each process checks whether its WordPress redirect map is stale.
+REDIRECT_MAP_CHECK_INTERVAL = config('REDIRECT_MAP_CHECK_INTERVAL', default=30, cast=int)
+
+# --- CDN ---
+
+# Shared-cache lifetime of anonymous HTML; content changes purge it earlier.
+CDN_S_MAXAGE = config('CDN_S_MAXAGE', default=86400, cast=int)
+CDN_STALE_WHILE_REVALIDATE = config('CDN_STALE_WHILE_REVALIDATE', default=60, cast=int)
+# 'blog.cdn.FastlyPurgeBackend' in production; the local backend only records purges.
+CDN_PURGE_BACKEND = config('CDN_PURGE_BACKEND', default='blog.cdn.LocalPurgeBackend')
+FASTLY_API_TOKEN = config('FASTLY_API_TOKEN', default='')
+FASTLY_SERVICE_ID = config('FASTLY_SERVICE_ID', default='')
 
 
 # --- Default Primary Key ---
@@ -210,6 +267,16 @@ ADMIN_EMAIL = config('ADMIN_EMAIL', default='gregdyche@creighton.edu')
 # Email for notifications about new subscriptions
 SUBSCRIPTION_NOTIFICATION_EMAIL = ADMIN_EMAIL
 
+# New-post emails are sent by the worker process (manage.py run_notification_jobs).
+# Seconds between checks for queued jobs, and after which a silent running job is taken over.
+NOTIFICATION_POLL_INTERVAL = config('NOTIFICATION_POLL_INTERVAL', default=5, cast=int)
+NOTIFICATION_STALE_AFTER = config('NOTIFICATION_STALE_AFTER', default=600, cast=int)
+# A job taken on this many times without finishing is marked failed instead of being taken over again.
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=3, cast=int)
+
+# Local mbox file or Maildir receiving bounces and complaints for manage.py process_bounces
+BOUNCE_MAILBOX = config('BOUNCE_MAILBOX', default='')
+
 # Google Chat Webhook URL for contact form notifications
 # User needs to generate this URL from their Google Chat space
 # and add it to their environment variables (e.g., .env file for local, Railway secrets for production).
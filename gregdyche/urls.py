@@ -7,21 +7,27 @@ The `urlpatterns` list routes URLs to views. For more information please see:
     https://docs.djangoproject.com/en/5.2/topics/http/urls/
 """
 
+import re
+
 from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse
 from django.conf import settings
 from django.shortcuts import redirect, render, get_object_or_404
+from blog.caching import HOMEPAGE_SLUG, conditional_view, home_probe
+from blog.homepage import latest_by_section
 from blog.models import Page
 
 # This function must be defined to be used below  
+@conditional_view(home_probe)
 def home(request):
     # Load the homepage Page object and render with editing capability
     try:
-        homepage = get_object_or_404(Page, slug='well-scripted-life-by-greg-dyche', is_published=True)
+        homepage = get_object_or_404(Page, slug=HOMEPAGE_SLUG, is_published=True)
         context = {
             'page': homepage,
             'is_homepage': True,  # Special flag for template
+            'latest_by_section': latest_by_section(request),
         }
         return render(request, 'blog/page_detail.html', context)
     except Page.DoesNotExist:
@@ -59,4 +65,11 @@ urlpatterns = [
 # Serve media files during development
 if settings.DEBUG:
     from django.conf.urls.static import static
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# In production, serve uploads with conditional requests, ranges and sendfile
+elif settings.SERVE_MEDIA:
+    from django.urls import re_path
+    from blog.media import serve_media
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]